@@ -6,7 +6,7 @@ type GameName = 'snake_game' | 'space_invaders' | 'chess' | '2048';
 
 function App() {
 	const canvasRef = React.useRef<HTMLCanvasElement>(null);
-	const packages = React.useMemo(() => ['micropip', 'pygame-ce'], []);
+	const packages = React.useMemo(() => ['micropip', 'pygame-ce', 'numpy'], []);
 	const [score, setScore] = React.useState(0);
 	const [isGameEnded, setIsGameEnded] = React.useState(false);
 	const [speed, setSpeed] = React.useState(60);
@@ -0,0 +1,328 @@
+import random
+import sys
+import time
+
+# A board is one int: 16 nibbles, each the exponent of its tile (0 = empty,
+# k = 2**k). Row i (top = 0) is bits 16*i .. 16*i + 15 and column j is the
+# nibble at 4*j inside its row, so LEFT packs toward the low nibble.
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+
+ROW_MASK = 0xFFFF
+# Exponents saturate at 15 (32768) since a tile has to fit in a nibble
+MAX_EXPONENT = 15
+
+_tables = None
+
+
+def _move_row_left(row):
+    """Slide and merge one packed row toward column 0.
+
+    Returns (new_row, score_gained). Each tile merges at most once per move,
+    as in Game2048.take_turn.
+    """
+    tiles = [(row >> (4 * j)) & 0xF for j in range(4)]
+    packed = [t for t in tiles if t]
+    out = []
+    score = 0
+    i = 0
+    while i < len(packed):
+        if i + 1 < len(packed) and packed[i] == packed[i + 1]:
+            merged = min(packed[i] + 1, MAX_EXPONENT)
+            out.append(merged)
+            score += 1 << merged
+            i += 2
+        else:
+            out.append(packed[i])
+            i += 1
+    result = 0
+    for j, t in enumerate(out):
+        result |= t << (4 * j)
+    return result, score
+
+
+def _reverse_row(row):
+    return (
+        ((row & 0xF) << 12)
+        | ((row & 0xF0) << 4)
+        | ((row >> 4) & 0xF0)
+        | ((row >> 12) & 0xF)
+    )
+
+
+def build_tables(chunk=1024):
+    """Generator filling the row tables, yielding every chunk rows.
+
+    The game drives it across frames; tables() runs it in one go.
+    """
+    global _tables
+    if _tables is not None:
+        return
+    left = [0] * 65536
+    right = [0] * 65536
+    score = [0] * 65536
+    for row in range(65536):
+        if row and not row % chunk:
+            yield
+        moved, gained = _move_row_left(row)
+        left[row] = moved
+        score[row] = gained
+    for row in range(65536):
+        if row and not row % chunk:
+            yield
+        rev = _reverse_row(row)
+        right[row] = _reverse_row(left[rev])
+    _tables = (left, right, score)
+
+
+def tables():
+    """The 65536-entry row tables, built on first use.
+
+    Returns (left, right, score): the packed result of moving a row left,
+    the result of moving it right, and the score the move gains. A row and
+    its mirror merge the same values, so one score table serves both.
+    """
+    if _tables is None:
+        for _ in build_tables():
+            pass
+    return _tables
+
+
+def transpose(board):
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def _apply_rows(board, table, score_table):
+    r0 = board & ROW_MASK
+    r1 = (board >> 16) & ROW_MASK
+    r2 = (board >> 32) & ROW_MASK
+    r3 = (board >> 48) & ROW_MASK
+    moved = table[r0] | (table[r1] << 16) | (table[r2] << 32) | (table[r3] << 48)
+    gained = score_table[r0] + score_table[r1] + score_table[r2] + score_table[r3]
+    return moved, gained
+
+
+def move(board, direction):
+    """Apply a move; returns (new_board, score_gained).
+
+    new_board == board means the move changed nothing and must not spawn.
+    """
+    left, right, score = tables()
+    if direction == "LEFT":
+        return _apply_rows(board, left, score)
+    if direction == "RIGHT":
+        return _apply_rows(board, right, score)
+    t = transpose(board)
+    if direction == "UP":
+        moved, gained = _apply_rows(t, left, score)
+    else:
+        moved, gained = _apply_rows(t, right, score)
+    return transpose(moved), gained
+
+
+def can_move(board):
+    """True if any direction changes the board (the real game-over test)."""
+    left, right, _ = tables()
+    for b in (board, transpose(board)):
+        for shift in (0, 16, 32, 48):
+            row = (b >> shift) & ROW_MASK
+            if left[row] != row or right[row] != row:
+                return True
+    return False
+
+
+def empty_cells(board):
+    return [i for i in range(16) if not (board >> (4 * i)) & 0xF]
+
+
+def spawn(board, rng=random):
+    """Put a 2 (90%) or a 4 (10%) on a random empty cell."""
+    empty = empty_cells(board)
+    if not empty:
+        return board
+    cell = empty[rng.randrange(len(empty))]
+    exponent = 2 if rng.randint(1, 10) == 10 else 1
+    return board | (exponent << (4 * cell))
+
+
+def from_values(values):
+    """Pack a 4x4 list of tile values (0, 2, 4, ...) into a board."""
+    board = 0
+    for i in range(4):
+        for j in range(4):
+            value = values[i][j]
+            if value:
+                board |= (value.bit_length() - 1) << (4 * (4 * i + j))
+    return board
+
+
+def to_values(board):
+    """Unpack a board into a 4x4 list of tile values."""
+    values = [[0] * 4 for _ in range(4)]
+    for i in range(4):
+        for j in range(4):
+            exponent = (board >> (4 * (4 * i + j))) & 0xF
+            if exponent:
+                values[i][j] = 1 << exponent
+    return values
+
+
+def max_tile(board):
+    return 1 << max((board >> (4 * i)) & 0xF for i in range(16))
+
+
+def reference_take_turn(direc, board):
+    """The list-based move from the original Game2048.take_turn.
+
+    Kept as the reference the bitboard is checked and benchmarked against.
+    Mutates and returns board, plus the score gained.
+    """
+    merged = [[False] * 4 for _ in range(4)]
+    s = 0
+    if direc == "UP":
+        for i in range(4):
+            for j in range(4):
+                shift = 0
+                if i > 0:
+                    for q in range(i):
+                        if board[q][j] == 0:
+                            shift += 1
+                    if shift > 0:
+                        board[i - shift][j] = board[i][j]
+                        board[i][j] = 0
+                    if (
+                        i - shift - 1 >= 0
+                        and board[i - shift - 1][j] == board[i - shift][j] != 0
+                        and not merged[i - shift][j]
+                        and not merged[i - shift - 1][j]
+                    ):
+                        board[i - shift - 1][j] *= 2
+                        s += board[i - shift - 1][j]
+                        board[i - shift][j] = 0
+                        merged[i - shift - 1][j] = True
+
+    elif direc == "DOWN":
+        for i in range(3):
+            for j in range(4):
+                shift = 0
+                for q in range(i + 1):
+                    if board[3 - q][j] == 0:
+                        shift += 1
+                if shift > 0:
+                    board[2 - i + shift][j] = board[2 - i][j]
+                    board[2 - i][j] = 0
+                if (
+                    3 - i + shift <= 3
+                    and board[2 - i + shift][j] == board[3 - i + shift][j] != 0
+                    and not merged[3 - i + shift][j]
+                    and not merged[2 - i + shift][j]
+                ):
+                    board[3 - i + shift][j] *= 2
+                    s += board[3 - i + shift][j]
+                    board[2 - i + shift][j] = 0
+                    merged[3 - i + shift][j] = True
+
+    elif direc == "LEFT":
+        for i in range(4):
+            for j in range(4):
+                shift = 0
+                for q in range(j):
+                    if board[i][q] == 0:
+                        shift += 1
+                if shift > 0:
+                    board[i][j - shift] = board[i][j]
+                    board[i][j] = 0
+                if (
+                    j - shift - 1 >= 0
+                    and board[i][j - shift] == board[i][j - shift - 1] != 0
+                    and not merged[i][j - shift]
+                    and not merged[i][j - shift - 1]
+                ):
+                    board[i][j - shift - 1] *= 2
+                    s += board[i][j - shift - 1]
+                    board[i][j - shift] = 0
+                    merged[i][j - shift - 1] = True
+
+    elif direc == "RIGHT":
+        for i in range(4):
+            for j in range(4):
+                shift = 0
+                for q in range(j):
+                    if board[i][3 - q] == 0:
+                        shift += 1
+                if shift > 0:
+                    board[i][3 - j + shift] = board[i][3 - j]
+                    board[i][3 - j] = 0
+                if (
+                    4 - j + shift <= 3
+                    and board[i][4 - j + shift] == board[i][3 - j + shift] != 0
+                    and not merged[i][4 - j + shift]
+                    and not merged[i][3 - j + shift]
+                ):
+                    board[i][4 - j + shift] *= 2
+                    s += board[i][4 - j + shift]
+                    board[i][3 - j + shift] = 0
+                    merged[i][4 - j + shift] = True
+    return board, s
+
+
+def check_parity(games=2000, seed=0):
+    """Play random games, comparing every move with reference_take_turn.
+
+    Returns the number of moves checked; raises AssertionError on mismatch.
+    """
+    rng = random.Random(seed)
+    checked = 0
+    for _ in range(games):
+        board = spawn(spawn(0, rng), rng)
+        while can_move(board):
+            direction = rng.choice(DIRECTIONS)
+            expected, expected_score = reference_take_turn(direction, to_values(board))
+            moved, gained = move(board, direction)
+            assert to_values(moved) == expected, (hex(board), direction)
+            assert gained == expected_score, (hex(board), direction)
+            checked += 1
+            if moved != board:
+                board = spawn(moved, rng)
+    return checked
+
+
+def benchmark(moves=200000, seed=0):
+    """Moves per second for the bitboard and for the reference move."""
+    rng = random.Random(seed)
+    boards = []
+    board = spawn(spawn(0, rng), rng)
+    while len(boards) < 1000:
+        boards.append(board)
+        moved, _ = move(board, rng.choice(DIRECTIONS))
+        board = spawn(moved, rng) if can_move(moved) else spawn(spawn(0, rng), rng)
+    directions = [rng.choice(DIRECTIONS) for _ in range(len(boards))]
+
+    tables()
+    start = time.perf_counter()
+    for k in range(moves):
+        move(boards[k % 1000], directions[k % 1000])
+    bitboard_rate = moves / (time.perf_counter() - start)
+
+    values = [to_values(b) for b in boards]
+    ref_moves = moves // 10
+    start = time.perf_counter()
+    for k in range(ref_moves):
+        reference_take_turn(directions[k % 1000], [row[:] for row in values[k % 1000]])
+    reference_rate = ref_moves / (time.perf_counter() - start)
+    return bitboard_rate, reference_rate
+
+
+if __name__ == "__main__":
+    if "--parity" in sys.argv:
+        print(f"parity ok over {check_parity()} moves")
+    else:
+        bitboard_rate, reference_rate = benchmark()
+        print(f"bitboard:  {bitboard_rate:,.0f} moves/s")
+        print(f"reference: {reference_rate:,.0f} moves/s")
@@ -0,0 +1,253 @@
+import sys
+import time
+
+import numpy as np
+
+import bitboard
+from bitboard import DIRECTIONS
+
+# Action codes index into DIRECTIONS
+UP, DOWN, LEFT, RIGHT = range(4)
+
+# Where rows pack into nibbles (the bitboard and the row tables) tiles
+# saturate at 2**MAX_EXPONENT. Bigger boards keep a whole byte per exponent
+# and only stop at 2**WIDE_MAX_EXPONENT, the largest tile an int64 score holds.
+MAX_EXPONENT = bitboard.MAX_EXPONENT
+WIDE_MAX_EXPONENT = 62
+POWERS = np.array([1 << k for k in range(WIDE_MAX_EXPONENT + 1)], dtype=np.int64)
+
+# Up to this size every possible row fits in a lookup table (16**5 rows)
+TABLE_MAX_SIZE = 5
+
+_row_tables = {}
+
+
+def _slide_left(rows, max_exponent=MAX_EXPONENT):
+    """Slide and merge every row of a (rows, N) array toward column 0.
+
+    Returns (new_rows, score_gained_per_row). Tiles are compacted, equal
+    neighbours merged left to right (each tile at most once, since the
+    right half of a merge becomes empty), then compacted again. Merges
+    stop growing at 2**max_exponent.
+    """
+    rows = _compact(rows)
+    gained = np.zeros(len(rows), dtype=np.int64)
+    for j in range(rows.shape[1] - 1):
+        a = rows[:, j]
+        b = rows[:, j + 1]
+        merge = (a == b) & (a != 0)
+        if not merge.any():
+            continue
+        a[merge] = np.minimum(a[merge] + 1, max_exponent)
+        b[merge] = 0
+        gained[merge] += POWERS[a[merge]]
+    return _compact(rows), gained
+
+
+def _compact(rows):
+    filled = rows != 0
+    target = np.cumsum(filled, axis=1) - 1
+    out = np.zeros_like(rows)
+    out[np.nonzero(filled)[0], target[filled]] = rows[filled]
+    return out
+
+
+def row_tables(size):
+    """Build (once per size) the tables for every packed row of size tiles.
+
+    A row packs to sum(tile[j] * 16**j). Returns (moved, gained, changed):
+    the moved rows as size-byte records, the score each gains, and whether
+    the move changes it. The tables come from _slide_left itself.
+    """
+    if size not in _row_tables:
+        keys = np.arange(16**size, dtype=np.int64)
+        rows = ((keys[:, None] >> (4 * np.arange(size))) & 0xF).astype(np.uint8)
+        moved, gained = _slide_left(rows)
+        changed = (moved != rows).any(axis=1)
+        records = np.ascontiguousarray(moved).view(np.dtype((np.void, size)))
+        _row_tables[size] = (records.ravel(), gained.astype(np.int32), changed)
+    return _row_tables[size]
+
+
+def _orientations(size):
+    """Cell permutations turning each direction into a move to column 0.
+
+    Returns (forward, inverse), each shaped (4, size * size): oriented[c] is
+    tiles[forward[d][c]] and tiles[c] is oriented[inverse[d][c]].
+    """
+    cells = np.arange(size * size).reshape(size, size)
+    # In DIRECTIONS order: UP reads columns top down, DOWN bottom up
+    forward = np.stack([cells.T, cells.T[:, ::-1], cells, cells[:, ::-1]])
+    forward = forward.reshape(4, -1)
+    inverse = np.argsort(forward, axis=1)
+    return forward, inverse
+
+
+class BoardBatch:
+    """Play many independent N x N 2048 boards at once with NumPy.
+
+    tiles holds exponents (0 = empty, k = 2**k) with shape (boards, N, N).
+    A move gathers every board's cells so its direction points at column
+    0, slides all rows of the batch together, and scatters them back.
+    Boards up to TABLE_MAX_SIZE slide through row_tables(); bigger ones
+    run _slide_left directly. The rules match bitboard.move; tiles
+    saturate at 2**max_exponent, which is MAX_EXPONENT where the nibble
+    tables apply and WIDE_MAX_EXPONENT above them.
+    """
+
+    def __init__(self, boards, size=4, seed=None, start_tiles=2):
+        self.boards = boards
+        self.size = size
+        self.start_tiles = start_tiles
+        self.rng = np.random.default_rng(seed)
+        self._rows = np.arange(boards, dtype=np.int64)
+        self._base = (self._rows * size * size)[:, None]
+        self._forward, self._inverse = _orientations(size)
+        if size <= TABLE_MAX_SIZE:
+            self._tables = row_tables(size)
+            self.max_exponent = MAX_EXPONENT
+        else:
+            self._tables = None
+            self.max_exponent = WIDE_MAX_EXPONENT
+        self._weights = (16 ** np.arange(size)).astype(np.uint32)
+
+        self.tiles = np.zeros((boards, size, size), dtype=np.uint8)
+        self.score = np.zeros(boards, dtype=np.int64)
+        self.alive = np.zeros(boards, dtype=np.bool_)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Clear the selected boards (all by default) and deal start tiles."""
+        rows = self._rows if mask is None else np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        self.tiles[rows] = 0
+        self.score[rows] = 0
+        self.alive[rows] = True
+        for _ in range(self.start_tiles):
+            self._spawn(rows)
+
+    def _spawn(self, rows):
+        flat = self.tiles.reshape(self.boards, -1)
+        # The k-th empty cell of each board, k uniform over its empty cells
+        seen = np.cumsum(flat[rows] == 0, axis=1, dtype=np.int16)
+        count = seen[:, -1]
+        has_room = count > 0
+        k = (self.rng.random(rows.size) * count).astype(np.int16)
+        cell = (seen <= k[:, None]).argmin(axis=1)
+        exponent = np.where(self.rng.random(rows.size) < 0.1, 2, 1)
+        flat[rows[has_room], cell[has_room]] = exponent[has_room]
+
+    def spawn(self, mask=None):
+        """Put a 2 (90%) or a 4 (10%) on a random empty cell of each board."""
+        rows = self._rows if mask is None else np.flatnonzero(mask)
+        if rows.size:
+            self._spawn(rows)
+
+    def _slide(self, rows):
+        """(new_rows, gained, changed) for a (rows, N) array of rows."""
+        if self._tables is None:
+            new, gained = _slide_left(rows, self.max_exponent)
+            return new, gained, (new != rows).any(axis=1)
+        moved, gains, changed = self._tables
+        keys = rows @ self._weights
+        new = np.take(moved, keys).view(np.uint8).reshape(rows.shape)
+        return new, np.take(gains, keys), np.take(changed, keys)
+
+    def move(self, actions):
+        """Apply one action (an index into DIRECTIONS) per board in place.
+
+        Returns (moved, gained): which boards changed, and the score each
+        one gained. Boards that did not change must not spawn a tile.
+        """
+        actions = np.asarray(actions)
+        n = self.size
+        oriented = np.take(self.tiles, self._base + self._forward[actions])
+        new, gains, changed = self._slide(oriented.reshape(-1, n))
+        self.tiles = np.take(new, self._base + self._inverse[actions]).reshape(
+            self.tiles.shape
+        )
+        gained = gains.reshape(self.boards, n).sum(axis=1, dtype=np.int64)
+        moved = changed.reshape(self.boards, n).any(axis=1)
+        self.score += gained
+        return moved, gained
+
+    def can_move(self):
+        """Which boards still have an empty cell or a mergeable pair."""
+        flat = self.tiles.reshape(self.boards, -1)
+        result = ~flat.all(axis=1)
+        # Only full boards need the neighbour test
+        full = np.flatnonzero(~result)
+        if full.size:
+            t = self.tiles[full]
+            result[full] = (t[:, :, 1:] == t[:, :, :-1]).any(axis=(1, 2)) | (
+                t[:, 1:, :] == t[:, :-1, :]
+            ).any(axis=(1, 2))
+        return result
+
+    def step(self, actions):
+        """Move, spawn on the boards that changed, and update alive.
+
+        Returns the moved mask. Scores accumulate in self.score.
+        """
+        moved, _ = self.move(actions)
+        self.spawn(moved)
+        self.alive &= self.can_move()
+        return moved
+
+    def values(self, board):
+        """One board as a list of lists of tile values (0, 2, 4, ...)."""
+        t = self.tiles[board].astype(np.int64)
+        return np.where(t > 0, POWERS[t], 0).tolist()
+
+
+def check_parity(boards=256, moves=400, seed=0):
+    """Check 4 x 4 batches against bitboard.move, move by move.
+
+    Raises AssertionError on the first board that disagrees.
+    """
+    rng = np.random.default_rng(seed)
+    batch = BoardBatch(boards, 4, seed=seed)
+    shifts = 4 * np.arange(16, dtype=np.uint64)
+    checked = 0
+    for _ in range(moves):
+        before = [
+            int((batch.tiles[b].reshape(16).astype(np.uint64) << shifts).sum())
+            for b in range(boards)
+        ]
+        actions = rng.integers(0, 4, size=boards)
+        moved, gained = batch.move(actions)
+        for b in range(boards):
+            expected, expected_gain = bitboard.move(before[b], DIRECTIONS[actions[b]])
+            assert batch.values(b) == bitboard.to_values(expected), (b, "tiles")
+            assert int(gained[b]) == expected_gain, (b, "score")
+            assert bool(moved[b]) == (expected != before[b]), (b, "moved")
+            checked += 1
+        batch.spawn(moved)
+        batch.alive &= batch.can_move()
+        batch.reset(~batch.alive)
+    return checked
+
+
+def benchmark(boards=16384, size=4, moves=200, seed=0):
+    """Board-moves per second with random actions and auto-reset."""
+    batch = BoardBatch(boards, size, seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, 4, size=(moves, boards))
+    start = time.perf_counter()
+    for t in range(moves):
+        batch.step(actions[t])
+        if t % 16 == 0:
+            batch.reset(~batch.alive)
+    elapsed = time.perf_counter() - start
+    return boards * moves / elapsed
+
+
+if __name__ == "__main__":
+    if "--parity" in sys.argv:
+        print(f"parity ok over {check_parity()} moves")
+    else:
+        for size in (4, 5, 8):
+            for boards in (4096, 65536):
+                rate = benchmark(boards=boards, size=size)
+                print(f"{size}x{size} {boards:>6} boards: {rate / 1e6:.2f}M moves/s")
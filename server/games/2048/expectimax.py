@@ -0,0 +1,252 @@
+import sys
+import time
+from collections import OrderedDict
+
+import bitboard
+from bitboard import DIRECTIONS, ROW_MASK
+
+# Heuristic weights (monotonic rows, free cells, pending merges, big sums)
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+_row_scores = None
+
+
+def _build_row_scores(chunk=4096):
+    """Generator filling the row heuristic table, yielding every chunk rows."""
+    global _row_scores
+    table = [0.0] * 65536
+    for row in range(65536):
+        if row and not row % chunk:
+            yield
+        tiles = [(row >> (4 * j)) & 0xF for j in range(4)]
+        total = sum(t**SUM_POWER for t in tiles)
+        empty = tiles.count(0)
+        merges = 0
+        prev = 0
+        counter = 0
+        for t in tiles:
+            if not t:
+                continue
+            if prev == t:
+                counter += 1
+            elif counter > 0:
+                merges += 1 + counter
+                counter = 0
+            prev = t
+        if counter > 0:
+            merges += 1 + counter
+        mono_left = 0.0
+        mono_right = 0.0
+        for j in range(1, 4):
+            a = tiles[j - 1] ** MONOTONICITY_POWER
+            b = tiles[j] ** MONOTONICITY_POWER
+            if tiles[j - 1] > tiles[j]:
+                mono_left += a - b
+            else:
+                mono_right += b - a
+        table[row] = (
+            LOST_PENALTY
+            + EMPTY_WEIGHT * empty
+            + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(mono_left, mono_right)
+            - SUM_WEIGHT * total
+        )
+    _row_scores = table
+
+
+def row_scores():
+    """The heuristic score of every packed row, built on first use."""
+    if _row_scores is None:
+        for _ in _build_row_scores():
+            pass
+    return _row_scores
+
+
+def evaluate(board):
+    table = row_scores()
+    t = bitboard.transpose(board)
+    return (
+        table[board & ROW_MASK]
+        + table[(board >> 16) & ROW_MASK]
+        + table[(board >> 32) & ROW_MASK]
+        + table[(board >> 48) & ROW_MASK]
+        + table[t & ROW_MASK]
+        + table[(t >> 16) & ROW_MASK]
+        + table[(t >> 32) & ROW_MASK]
+        + table[(t >> 48) & ROW_MASK]
+    )
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class Expectimax:
+    """Depth-limited expectimax over bitboards with iterative deepening.
+
+    Chance nodes whose cumulative probability drops below min_probability
+    are scored by the heuristic instead of expanded. Chance-node values
+    are cached in a transposition table of at most tt_size entries, with
+    least-recently-used eviction; an entry only answers searches that need
+    no more depth than it was stored with.
+
+    search() is a generator so the game loop can run it a slice at a time:
+    run_slice() advances it until its frame budget is spent and returns
+    control, letting the board keep rendering while the solver thinks.
+    """
+
+    def __init__(self, tt_size=200000, max_depth=6, min_probability=0.0001):
+        self.tt = OrderedDict()
+        self.tt_size = tt_size
+        self.max_depth = max_depth
+        self.min_probability = min_probability
+        self._slice_end = float("inf")
+        self._deadline = float("inf")
+        # Metrics for the last search
+        self.nodes = 0
+        self.tt_lookups = 0
+        self.tt_hits = 0
+        self.depth_reached = 0
+        self.elapsed = 0.0
+
+    # ------ tree ------
+    def _max_node(self, board, depth, prob):
+        best = 0.0
+        for direction in DIRECTIONS:
+            moved, _ = bitboard.move(board, direction)
+            if moved != board:
+                value = yield from self._chance_node(moved, depth, prob)
+                if value > best:
+                    best = value
+        return best
+
+    def _chance_node(self, board, depth, prob):
+        self.nodes += 1
+        if not self.nodes & 255:
+            now = time.perf_counter()
+            if now >= self._deadline:
+                raise _OutOfTime
+            if now >= self._slice_end:
+                yield
+        if depth <= 0 or prob < self.min_probability:
+            return evaluate(board)
+
+        self.tt_lookups += 1
+        entry = self.tt.get(board)
+        if entry is not None and entry[0] >= depth:
+            self.tt_hits += 1
+            self.tt.move_to_end(board)
+            return entry[1]
+
+        empty = bitboard.empty_cells(board)
+        if not empty:
+            return evaluate(board)
+        share = prob / len(empty)
+        total = 0.0
+        for cell in empty:
+            shift = 4 * cell
+            two = yield from self._max_node(
+                board | (1 << shift), depth - 1, share * 0.9
+            )
+            four = yield from self._max_node(
+                board | (2 << shift), depth - 1, share * 0.1
+            )
+            total += 0.9 * two + 0.1 * four
+        value = total / len(empty)
+
+        self.tt[board] = (depth, value)
+        self.tt.move_to_end(board)
+        if len(self.tt) > self.tt_size:
+            self.tt.popitem(last=False)
+        return value
+
+    # ------ driving ------
+    def search(self, board, time_limit=0.25):
+        """Generator: iterative deepening; returns the best direction.
+
+        Returns None when no move changes the board. The deepest fully
+        searched depth wins; a depth cut off by time_limit is discarded.
+        The first search also builds the heuristic table, a chunk per slice.
+        """
+        if _row_scores is None:
+            yield from _build_row_scores()
+        start = time.perf_counter()
+        self._deadline = start + time_limit
+        self.nodes = 0
+        self.tt_lookups = 0
+        self.tt_hits = 0
+        self.depth_reached = 0
+        moves = []
+        for direction in DIRECTIONS:
+            moved, _ = bitboard.move(board, direction)
+            if moved != board:
+                moves.append((direction, moved))
+        best = moves[0][0] if moves else None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                values = []
+                for direction, moved in moves:
+                    value = yield from self._chance_node(moved, depth, 1.0)
+                    values.append((value, direction))
+                if values:
+                    best = max(values)[1]
+                self.depth_reached = depth
+        except _OutOfTime:
+            pass
+        self.elapsed = time.perf_counter() - start
+        return best
+
+    def run_slice(self, search, budget):
+        """Advance a search() for about budget seconds.
+
+        Returns (done, direction); direction is only meaningful once done.
+        """
+        self._slice_end = time.perf_counter() + budget
+        try:
+            next(search)
+        except StopIteration as finished:
+            return True, finished.value
+        return False, None
+
+    def best_move(self, board, time_limit=0.25):
+        """Run a whole search without yielding (for headless tools)."""
+        search = self.search(board, time_limit)
+        while True:
+            done, direction = self.run_slice(search, float("inf"))
+            if done:
+                return direction
+
+    def stats(self):
+        return {
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes / self.elapsed if self.elapsed else 0.0,
+            "tt_hit_rate": self.tt_hits / self.tt_lookups if self.tt_lookups else 0.0,
+            "tt_entries": len(self.tt),
+            "depth_reached": self.depth_reached,
+        }
+
+
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(0)
+    solver = Expectimax()
+    board = bitboard.spawn(bitboard.spawn(0, rng), rng)
+    score = 0
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for _ in range(moves):
+        direction = solver.best_move(board, time_limit=0.05)
+        if direction is None:
+            break
+        board, gained = bitboard.move(board, direction)
+        score += gained
+        board = bitboard.spawn(board, rng)
+    print(f"score {score}, max tile {bitboard.max_tile(board)}")
+    for key, value in solver.stats().items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
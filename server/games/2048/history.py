@@ -0,0 +1,184 @@
+import random
+import sys
+import time
+from array import array
+
+import bitboard
+from bitboard import DIRECTIONS
+
+
+def spawn_rng(seed, index):
+    """The generator for a game's index-th spawn.
+
+    Seeding every spawn from (seed, index) makes the spawn sequence part of
+    the game's identity, so the RNG state to remember is a single counter.
+    """
+    return random.Random((seed << 32) | index)
+
+
+class History:
+    """Undo/redo for a bitboard game, stored as moves plus checkpoints.
+
+    Every move is one byte (its index in DIRECTIONS). Every
+    checkpoint_every moves the board and score are kept as a checkpoint.
+    Spawns come from spawn_rng(seed, start_spawns + move), so the states
+    of a block between two checkpoints replay from the first of them.
+    The block the cursor is in is kept expanded, so undo and redo are a
+    list lookup; only stepping into another block replays it, once.
+
+    With retention set, moves older than retention are dropped a block at
+    a time, so memory stays bounded however long the game runs.
+    """
+
+    def __init__(self, board, seed, start_spawns=2, checkpoint_every=32, retention=None):
+        self.seed = seed
+        self.start_spawns = start_spawns
+        self.every = checkpoint_every
+        self.retention = retention
+        self.moves = bytearray()
+        self.boards = array("Q", [board])
+        self.scores = array("Q", [0])
+        # Absolute move numbers: moves[0] is move `first`, the current state
+        # is after `cursor` moves, and redo can go up to `end`
+        self.first = 0
+        self.cursor = 0
+        self.end = 0
+        # (board, score) after each move of the expanded block
+        self.block_start = 0
+        self.block = [(board, 0)]
+
+    def record(self, direction, board, score):
+        """Add a move played from the current state, dropping any redo."""
+        if self.cursor < self.end:
+            del self.moves[self.cursor - self.first :]
+            del self.boards[self.cursor // self.every - self.first // self.every + 1 :]
+            del self.scores[len(self.boards) :]
+            self.end = self.cursor
+            if self.block_start <= self.cursor:
+                del self.block[self.cursor - self.block_start + 1 :]
+        self.moves.append(DIRECTIONS.index(direction))
+        self.cursor += 1
+        self.end = self.cursor
+        if self.cursor % self.every == 0:
+            self.boards.append(board)
+            self.scores.append(score)
+            self.block_start = self.cursor
+            self.block = [(board, score)]
+        else:
+            if self.block_start + len(self.block) != self.cursor:
+                self._expand(self.cursor - 1)
+            self.block.append((board, score))
+        if self.retention is not None and self.end - self.first >= self.retention + self.every:
+            del self.moves[: self.every]
+            del self.boards[0]
+            del self.scores[0]
+            self.first += self.every
+
+    def _expand(self, move):
+        """Replay the block holding move, from its checkpoint up to end."""
+        start = move - move % self.every
+        k = start // self.every - self.first // self.every
+        board = self.boards[k]
+        score = self.scores[k]
+        block = [(board, score)]
+        for m in range(start, min(start + self.every - 1, self.end)):
+            board, gained = bitboard.move(board, DIRECTIONS[self.moves[m - self.first]])
+            board = bitboard.spawn(board, spawn_rng(self.seed, self.start_spawns + m))
+            score += gained
+            block.append((board, score))
+        self.block_start = start
+        self.block = block
+
+    def state(self, move):
+        """(board, score) after the given absolute move number."""
+        offset = move - self.block_start
+        if not 0 <= offset < len(self.block):
+            self._expand(move)
+            offset = move - self.block_start
+        return self.block[offset]
+
+    def spawns(self):
+        """How many tiles have spawned by the current state."""
+        return self.start_spawns + self.cursor
+
+    def undo(self):
+        """Step back one move; returns (board, score) or None at the start."""
+        if self.cursor == self.first:
+            return None
+        self.cursor -= 1
+        return self.state(self.cursor)
+
+    def redo(self):
+        """Step forward one undone move; returns (board, score) or None."""
+        if self.cursor == self.end:
+            return None
+        self.cursor += 1
+        return self.state(self.cursor)
+
+    def nbytes(self):
+        """Bytes of stored moves and checkpoints (the expanded block aside)."""
+        return (
+            len(self.moves)
+            + self.boards.itemsize * len(self.boards)
+            + self.scores.itemsize * len(self.scores)
+        )
+
+
+def _deep_size(obj):
+    size = sys.getsizeof(obj)
+    if isinstance(obj, list):
+        size += sum(_deep_size(item) for item in obj)
+    return size
+
+
+def benchmark(seed=0, checkpoint_every=32, retention=256):
+    """Memory per thousand moves and undo/redo cost over one long game.
+
+    A depth-1 expectimax plays the game so it runs to a few thousand
+    moves. The history is compared with keeping a copy of the 4x4
+    board_values list per move, and with a history capped at retention.
+    """
+    from expectimax import Expectimax
+
+    solver = Expectimax(max_depth=1)
+    board = 0
+    for spawn in range(2):
+        board = bitboard.spawn(board, spawn_rng(seed, spawn))
+    history = History(board, seed, 2, checkpoint_every)
+    capped = History(board, seed, 2, checkpoint_every, retention)
+    copies = []
+    score = 0
+    while True:
+        direction = solver.best_move(board, time_limit=float("inf"))
+        if direction is None:
+            break
+        board, gained = bitboard.move(board, direction)
+        board = bitboard.spawn(board, spawn_rng(seed, history.spawns()))
+        score += gained
+        history.record(direction, board, score)
+        capped.record(direction, board, score)
+        copies.append([row[:] for row in bitboard.to_values(board)])
+
+    moves = history.end
+    history_bytes = history.nbytes() / moves * 1000
+    list_bytes = _deep_size(copies) / moves * 1000
+
+    start = time.perf_counter()
+    while history.undo() is not None:
+        pass
+    undo_us = (time.perf_counter() - start) / moves * 1e6
+    start = time.perf_counter()
+    while history.redo() is not None:
+        pass
+    redo_us = (time.perf_counter() - start) / moves * 1e6
+    assert history.state(history.cursor) == (board, score)
+    return moves, history_bytes, list_bytes, capped.nbytes(), undo_us, redo_us
+
+
+if __name__ == "__main__":
+    moves, history_bytes, list_bytes, capped_bytes, undo_us, redo_us = benchmark()
+    print(f"{moves} moves")
+    print(f"history:      {history_bytes:8.0f} bytes per 1000 moves")
+    print(f"list copies:  {list_bytes:8.0f} bytes per 1000 moves")
+    print(f"retention 256: {capped_bytes:7d} bytes in total")
+    print(f"undo {undo_us:.1f} us, redo {redo_us:.1f} us")
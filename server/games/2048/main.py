@@ -1,6 +1,17 @@
 import pygame
 import random
 import asyncio
+import time
+
+import bitboard
+from expectimax import Expectimax
+from history import History, spawn_rng
+from tiles import TileCache
+
+# Tiles per side. 4 plays on the bitboard; bigger boards (5, 6, 8, ...) run
+# on a one-board BoardBatch and have no hints or autoplay. Up to 5x5 tiles
+# stop at 2**bitboard.MAX_EXPONENT, which the game shows under the score.
+BOARD_SIZE = 4
 
 
 class Game2048:
@@ -34,10 +45,13 @@ class Game2048:
         # -----------------------------
         self.font_size = int(24 * self.SCALE)
         self.font = pygame.font.Font("freesansbold.ttf", self.font_size)
+        self.small_font = pygame.font.Font("freesansbold.ttf", int(16 * self.SCALE))
 
-        # Tile sizes and offsets
-        self.tile_size = int(75 * self.SCALE)
-        self.tile_offset = int(20 * self.SCALE)
+        # Tile sizes and offsets, shrunk to fit BOARD_SIZE tiles per side
+        self.size = BOARD_SIZE
+        self.tile_scale = self.SCALE * 4 / self.size
+        self.tile_size = int(75 * self.tile_scale)
+        self.tile_offset = int(20 * self.tile_scale)
         self.tile_gap = self.tile_size + self.tile_offset
 
         self.score_y1 = int(410 * self.SCALE)
@@ -61,17 +75,50 @@ class Game2048:
             "other": (0, 0, 0),
             "bg": (187, 173, 160),
         }
+        self.tile_cache = TileCache(self.colors)
 
         # -----------------------------
         # 3) GAME VARIABLES
         # -----------------------------
-        self.board_values = [[0 for _ in range(4)] for _ in range(4)]
+        # The board is a packed bitboard (or the batch engine for other
+        # sizes); board_values mirrors it for drawing
+        self.board = 0
+        self.batch = None
+        self.cap_text = None
+        if self.size != 4:
+            # Only the bigger boards need NumPy, so it's imported here
+            from board_batch import BoardBatch
+
+            self.batch = BoardBatch(1, self.size, start_tiles=0)
+            if self.batch.max_exponent == bitboard.MAX_EXPONENT:
+                self.cap_text = self.font.render(
+                    f"Tiles stop at {1 << bitboard.MAX_EXPONENT}", True, "black"
+                )
+        self.board_values = [[0 for _ in range(self.size)] for _ in range(self.size)]
         self.game_over = False
         self.spawn_new = True
         self.init_count = 0
         self.direction = ""
         self.score = 0
 
+        # Undo (U) and redo (R) on the bitboard. Each spawn is seeded from
+        # (seed, spawn number), so the history only keeps moves and checkpoints
+        self.seed = random.randrange(1 << 31)
+        self.spawns = 0
+        self.history = None
+        self.last_move = ""
+
+        # Expectimax hints (H) and autoplay (A); the solver is built on first use
+        self.solver = None
+        self.search = None
+        self.autoplay = False
+        self.hint = ""
+        # H asks for a hint; it's searched once the pending tile has spawned
+        self.hint_wanted = False
+        self.think_time = 0.25
+        # The last search's depth, node rate and TT hit rate, under the hint
+        self.search_text = None
+
         # -----------------------------
         # 4) MAIN LOOP CONTROL
         # -----------------------------
@@ -102,113 +149,98 @@ class Game2048:
             over_txt2, (rect_x + int(30 * self.SCALE), rect_y + int(55 * self.SCALE))
         )
 
-    def take_turn(self, direc, board):
-        merged = [[False] * 4 for _ in range(4)]
-        s = self.score
-        if direc == "UP":
-            for i in range(4):
-                for j in range(4):
-                    shift = 0
-                    if i > 0:
-                        for q in range(i):
-                            if board[q][j] == 0:
-                                shift += 1
-                        if shift > 0:
-                            board[i - shift][j] = board[i][j]
-                            board[i][j] = 0
-                        if (
-                            i - shift - 1 >= 0
-                            and board[i - shift - 1][j] == board[i - shift][j] != 0
-                            and not merged[i - shift][j]
-                            and not merged[i - shift - 1][j]
-                        ):
-                            board[i - shift - 1][j] *= 2
-                            s += board[i - shift - 1][j]
-                            board[i - shift][j] = 0
-                            merged[i - shift - 1][j] = True
-
-        elif direc == "DOWN":
-            for i in range(3):
-                for j in range(4):
-                    shift = 0
-                    for q in range(i + 1):
-                        if board[3 - q][j] == 0:
-                            shift += 1
-                    if shift > 0:
-                        board[2 - i + shift][j] = board[2 - i][j]
-                        board[2 - i][j] = 0
-                    if (
-                        3 - i + shift <= 3
-                        and board[2 - i + shift][j] == board[3 - i + shift][j] != 0
-                        and not merged[3 - i + shift][j]
-                        and not merged[2 - i + shift][j]
-                    ):
-                        board[3 - i + shift][j] *= 2
-                        s += board[3 - i + shift][j]
-                        board[2 - i + shift][j] = 0
-                        merged[3 - i + shift][j] = True
-
-        elif direc == "LEFT":
-            for i in range(4):
-                for j in range(4):
-                    shift = 0
-                    for q in range(j):
-                        if board[i][q] == 0:
-                            shift += 1
-                    if shift > 0:
-                        board[i][j - shift] = board[i][j]
-                        board[i][j] = 0
-                    if (
-                        j - shift - 1 >= 0
-                        and board[i][j - shift] == board[i][j - shift - 1] != 0
-                        and not merged[i][j - shift]
-                        and not merged[i][j - shift - 1]
-                    ):
-                        board[i][j - shift - 1] *= 2
-                        s += board[i][j - shift - 1]
-                        board[i][j - shift] = 0
-                        merged[i][j - shift - 1] = True
-
-        elif direc == "RIGHT":
-            for i in range(4):
-                for j in range(4):
-                    shift = 0
-                    for q in range(j):
-                        if board[i][3 - q] == 0:
-                            shift += 1
-                    if shift > 0:
-                        board[i][3 - j + shift] = board[i][3 - j]
-                        board[i][3 - j] = 0
-                    if (
-                        4 - j + shift <= 3
-                        and board[i][4 - j + shift] == board[i][3 - j + shift] != 0
-                        and not merged[i][4 - j + shift]
-                        and not merged[i][3 - j + shift]
-                    ):
-                        board[i][4 - j + shift] *= 2
-                        s += board[i][4 - j + shift]
-                        board[i][3 - j + shift] = 0
-                        merged[i][4 - j + shift] = True
-
-        self.score = s
+    def take_turn(self, direc):
+        """Apply a move; returns False if it changed nothing."""
+        if self.batch is not None:
+            moved, gained = self.batch.move([bitboard.DIRECTIONS.index(direc)])
+            if not moved[0]:
+                return False
+            gained = int(gained[0])
+            self.board_values = self.batch.values(0)
+        else:
+            moved, gained = bitboard.move(self.board, direc)
+            if moved == self.board:
+                return False
+            self.board = moved
+            self.board_values = bitboard.to_values(moved)
+            self.last_move = direc
+        # A hint or search for the old board is stale now
+        self.hint = ""
+        self.search = None
+        self.score += gained
         pyodide.globals.get("setScore")(self.score)
-        return board
-
-    def new_pieces(self, board):
-        count = 0
-        full = False
-        while any(0 in row for row in board) and count < 1:
-            row = random.randint(0, 3)
-            col = random.randint(0, 3)
-            if board[row][col] == 0:
-                count += 1
-                if random.randint(1, 10) == 10:
-                    board[row][col] = 4
-                else:
-                    board[row][col] = 2
-        if count < 1:
-            full = True
-        return board, full
+        return True
+
+    def new_pieces(self):
+        """Spawn a tile; returns True when no move is left afterwards."""
+        if self.batch is not None:
+            self.batch.spawn()
+            self.board_values = self.batch.values(0)
+            return not self.batch.can_move()[0]
+        self.board = bitboard.spawn(self.board, spawn_rng(self.seed, self.spawns))
+        self.spawns += 1
+        self.board_values = bitboard.to_values(self.board)
+        if self.history is not None:
+            self.history.record(self.last_move, self.board, self.score)
+        elif self.spawns == 2:
+            self.history = History(self.board, self.seed, self.spawns)
+        return not bitboard.can_move(self.board)
+
+    def restore(self, state):
+        """Show a (board, score) from the history; None means nothing to do."""
+        if state is None:
+            return
+        self.board, self.score = state
+        self.board_values = bitboard.to_values(self.board)
+        self.spawns = self.history.spawns()
+        self.direction = ""
+        self.hint = ""
+        self.search = None
+        pyodide.globals.get("setScore")(self.score)
+        if self.game_over:
+            self.game_over = False
+            pyodide.globals.get("setIsGameEnded")(False)
+
+    def start_search(self):
+        if self.solver is None:
+            self.solver = Expectimax()
+        self.search = self.solver.search(self.board, self.think_time)
+
+    def step_search(self):
+        """Give the solver half a frame, then get back to drawing."""
+        done, direction = self.solver.run_slice(self.search, 0.5 / self.speed)
+        if not done:
+            return
+        self.search = None
+        stats = self.solver.stats()
+        self.search_text = self.small_font.render(
+            f"Depth {stats['depth_reached']}, "
+            f"{stats['nodes_per_second'] / 1000:.0f}k nodes/s, "
+            f"TT hits {stats['tt_hit_rate']:.0%}",
+            True,
+            "black",
+        )
+        if self.autoplay:
+            self.direction = direction or ""
+        else:
+            self.hint = direction or ""
+
+    def draw_hint(self):
+        if self.autoplay:
+            text = "Autoplay"
+        elif self.hint:
+            text = f"Hint: {self.hint}"
+        else:
+            return
+        hint_txt = self.font.render(text, True, "black")
+        self.screen.blit(
+            hint_txt, (int(10 * self.SCALE), self.score_y1 + int(30 * self.SCALE))
+        )
+        if self.search_text is not None:
+            self.screen.blit(
+                self.search_text,
+                (int(10 * self.SCALE), self.score_y1 + int(60 * self.SCALE)),
+            )
 
     def draw_board(self):
         pygame.draw.rect(
@@ -220,56 +252,56 @@ class Game2048:
         )
         sc_txt = self.font.render(f"Score: {self.score}", True, "black")
         self.screen.blit(sc_txt, (int(10 * self.SCALE), self.score_y1))
+        # Big boards have no hints, so the cap takes the hint line
+        if self.cap_text is not None:
+            self.screen.blit(
+                self.cap_text, (int(10 * self.SCALE), self.score_y1 + int(30 * self.SCALE))
+            )
 
     def draw_pieces(self):
-        for i in range(4):
-            for j in range(4):
-                value = self.board_values[i][j]
-                value_color = (
-                    self.colors["light text"] if value > 8 else self.colors["dark text"]
-                )
-                color = (
-                    self.colors[value] if value in self.colors else self.colors["other"]
-                )
-
+        # Stamps are drawn once per (value, tile_size) and reused every frame
+        self.tile_cache.use(self.tile_scale)
+        for i in range(self.size):
+            for j in range(self.size):
+                stamp = self.tile_cache.stamp(self.board_values[i][j], self.tile_size)
                 left_x = j * self.tile_gap + self.tile_offset
                 top_y = i * self.tile_gap + self.tile_offset
+                self.screen.blit(stamp, (left_x, top_y))
 
-                pygame.draw.rect(
-                    self.screen,
-                    color,
-                    [left_x, top_y, self.tile_size, self.tile_size],
-                    0,
-                    5,
-                )
-                pygame.draw.rect(
-                    self.screen,
-                    "black",
-                    [left_x, top_y, self.tile_size, self.tile_size],
-                    2,
-                    5,
-                )
+    async def load_tables(self):
+        """Build the bitboard's row tables behind a loading frame.
 
-                if value > 0:
-                    val_str = str(value)
-                    length = len(val_str)
-                    tile_font_size = max(
-                        int((48 - 5 * length) * self.SCALE), int(12 * self.SCALE)
-                    )
-                    tile_font = pygame.font.Font("freesansbold.ttf", tile_font_size)
-                    value_text = tile_font.render(val_str, True, value_color)
-                    text_rect = value_text.get_rect(
-                        center=(
-                            left_x + self.tile_size // 2,
-                            top_y + self.tile_size // 2,
-                        )
-                    )
-                    self.screen.blit(value_text, text_rect)
+        Each frame gets half its budget of building, as the solver does.
+        """
+        loading = self.font.render("Loading...", True, "black")
+        build = bitboard.build_tables()
+        done = False
+        while not done and self.run_game:
+            self.timer.tick(self.speed)
+            self.screen.fill("gray")
+            self.draw_board()
+            self.screen.blit(
+                loading, (int(10 * self.SCALE), self.score_y1 + int(30 * self.SCALE))
+            )
+            pygame.display.flip()
+            end = time.perf_counter() + 0.5 / self.speed
+            while time.perf_counter() < end:
+                try:
+                    next(build)
+                except StopIteration:
+                    done = True
+                    break
+            for event in pygame.event.get(pygame.QUIT):
+                self.run_game = False
+            await asyncio.sleep(0)
 
     # -----------------------------
     # 6) MAIN LOOP
     # -----------------------------
     async def run(self):
+        # The bitboard's tables are built before the first tile spawns
+        if self.batch is None:
+            await self.load_tables()
         while self.run_game:
             self.timer.tick(self.speed)
             self.screen.fill("gray")
@@ -277,18 +309,32 @@ class Game2048:
             # Draw background, scores, pieces
             self.draw_board()
             self.draw_pieces()
+            self.draw_hint()
 
             # Possibly spawn new tile
             if self.spawn_new or self.init_count < 2:
-                self.board_values, self.game_over = self.new_pieces(self.board_values)
+                self.game_over = self.new_pieces()
                 self.spawn_new = False
                 self.init_count += 1
 
-            # If a direction has been chosen, take a turn
+            # If a direction has been chosen, take a turn. A move that
+            # changes nothing doesn't spawn a tile.
             if self.direction != "" and not self.game_over:
-                self.board_values = self.take_turn(self.direction, self.board_values)
+                self.spawn_new = self.take_turn(self.direction)
                 self.direction = ""
-                self.spawn_new = True
+
+            # Let the solver think within this frame's budget
+            if not self.game_over:
+                if (
+                    (self.autoplay or self.hint_wanted)
+                    and self.search is None
+                    and self.direction == ""
+                    and not self.spawn_new
+                ):
+                    self.hint_wanted = False
+                    self.start_search()
+                if self.search is not None:
+                    self.step_search()
 
             if self.game_over:
                 self.draw_over()
@@ -300,6 +346,12 @@ class Game2048:
                 if event.type == pygame.QUIT:
                     self.run_game = False
                 elif event.type == pygame.KEYUP:
+                    # Undo and redo also work once the game is over
+                    if self.history is not None and not self.spawn_new:
+                        if event.key == pygame.K_u:
+                            self.restore(self.history.undo())
+                        elif event.key == pygame.K_r:
+                            self.restore(self.history.redo())
                     # Only handle arrows if game is not over
                     if not self.game_over:
                         if event.key == pygame.K_UP:
@@ -310,6 +362,15 @@ class Game2048:
                             self.direction = "LEFT"
                         elif event.key == pygame.K_RIGHT:
                             self.direction = "RIGHT"
+                        # The solver only knows the 4x4 bitboard
+                        elif (
+                            event.key == pygame.K_h
+                            and self.batch is None
+                            and self.search is None
+                        ):
+                            self.hint_wanted = True
+                        elif event.key == pygame.K_a and self.batch is None:
+                            self.autoplay = not self.autoplay
 
             pygame.display.flip()
             await asyncio.sleep(0)
@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+import time
+
+import pygame
+
+FONT = "freesansbold.ttf"
+
+
+def font_size(value, tile_scale):
+    """Text size for a tile value: longer numbers get a smaller font."""
+    length = len(str(value))
+    return max(int((48 - 5 * length) * tile_scale), int(12 * tile_scale))
+
+
+def draw_tile(surface, colors, value, left_x, top_y, tile_size, tile_scale):
+    """Draw one tile straight onto surface.
+
+    This is how Game2048.draw_pieces drew every tile each frame, font
+    construction included; the cache composes its stamps with it.
+    """
+    value_color = colors["light text"] if value > 8 else colors["dark text"]
+    color = colors[value] if value in colors else colors["other"]
+
+    pygame.draw.rect(surface, color, [left_x, top_y, tile_size, tile_size], 0, 5)
+    pygame.draw.rect(surface, "black", [left_x, top_y, tile_size, tile_size], 2, 5)
+
+    if value > 0:
+        tile_font = pygame.font.Font(FONT, font_size(value, tile_scale))
+        value_text = tile_font.render(str(value), True, value_color)
+        text_rect = value_text.get_rect(
+            center=(left_x + tile_size // 2, top_y + tile_size // 2)
+        )
+        surface.blit(value_text, text_rect)
+
+
+class TileCache:
+    """Fully drawn tile surfaces, keyed by (value, tile_size).
+
+    Each stamp is a transparent surface holding the fill, the border and
+    the centred text, so drawing the board is one blit per tile. The
+    text size also depends on the scale, so use() drops every stamp when
+    the scale changes.
+    """
+
+    def __init__(self, colors):
+        self.colors = colors
+        self.stamps = {}
+        self.scale = None
+        self.misses = 0
+
+    def use(self, scale):
+        if scale != self.scale:
+            self.stamps.clear()
+            self.scale = scale
+
+    def stamp(self, value, tile_size):
+        key = (value, tile_size)
+        surface = self.stamps.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+            draw_tile(surface, self.colors, value, 0, 0, tile_size, self.scale)
+            self.stamps[key] = surface
+        return surface
+
+
+def benchmark(sizes=(4, 8), frames=300, seed=0):
+    """Milliseconds per board draw, per-tile fonts against cached stamps."""
+    pygame.init()
+    rng = random.Random(seed)
+    colors = {0: (204, 192, 179), "light text": (249, 246, 242)}
+    colors.update({"dark text": (119, 110, 101), "other": (0, 0, 0)})
+    screen = pygame.Surface((400, 400))
+    results = []
+    for size in sizes:
+        tile_scale = 4 / size
+        tile_size = int(75 * tile_scale)
+        gap = tile_size + int(20 * tile_scale)
+        boards = [
+            [rng.choice([0, 0, 2, 4, 8, 64, 512, 2048]) for _ in range(size * size)]
+            for _ in range(16)
+        ]
+
+        start = time.perf_counter()
+        for f in range(frames):
+            for k, value in enumerate(boards[f % 16]):
+                i, j = divmod(k, size)
+                draw_tile(screen, colors, value, j * gap, i * gap, tile_size, tile_scale)
+        before = (time.perf_counter() - start) / frames * 1e3
+
+        cache = TileCache(colors)
+        cache.use(tile_scale)
+        start = time.perf_counter()
+        for f in range(frames):
+            for k, value in enumerate(boards[f % 16]):
+                i, j = divmod(k, size)
+                screen.blit(cache.stamp(value, tile_size), (j * gap, i * gap))
+        after = (time.perf_counter() - start) / frames * 1e3
+        results.append((size, before, after))
+    return results
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    for size, before, after in benchmark(frames=frames):
+        print(f"{size}x{size}: {before:6.2f} ms/frame per-tile fonts, {after:5.2f} cached")
@@ -0,0 +1,203 @@
+import argparse
+import csv
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+from bitboard import DIRECTIONS
+from expectimax import Expectimax
+from history import spawn_rng
+
+# Games longer than this are cut off (a corner strategy can stall forever)
+MAX_MOVES = 100000
+
+# Columns of the per-game CSV, one per play_game result key
+RESULT_FIELDS = ("strategy", "seed", "score", "max_tile", "moves", "cpu_seconds")
+
+
+# ------ strategies: (board, rng) -> direction, or None when stuck ------
+def _moves(board):
+    """(direction, new_board, gained) for every move that changes board."""
+    result = []
+    for direction in DIRECTIONS:
+        moved, gained = bitboard.move(board, direction)
+        if moved != board:
+            result.append((direction, moved, gained))
+    return result
+
+
+def random_strategy(board, rng):
+    moves = _moves(board)
+    return rng.choice(moves)[0] if moves else None
+
+
+def greedy_strategy(board, rng):
+    """The move that scores most right now; ties are broken at random."""
+    moves = _moves(board)
+    if not moves:
+        return None
+    best = max(gained for _, _, gained in moves)
+    return rng.choice([d for d, _, gained in moves if gained == best])
+
+
+def corner_strategy(board, rng):
+    """Keep the big tiles in the top-left corner.
+
+    Plays the better scoring of UP and LEFT, then RIGHT, and DOWN only
+    when nothing else moves.
+    """
+    moves = {d: gained for d, _, gained in _moves(board)}
+    toward = [d for d in ("UP", "LEFT") if d in moves]
+    if toward:
+        return max(toward, key=lambda d: moves[d])
+    for direction in ("RIGHT", "DOWN"):
+        if direction in moves:
+            return direction
+    return None
+
+
+# Set up by play_game: a fresh fixed-depth solver per game keeps every
+# game reproducible whatever else its worker played before
+_solver = None
+
+
+def expectimax_strategy(board, rng):
+    return _solver.best_move(board, time_limit=float("inf"))
+
+
+STRATEGIES = {
+    "random": random_strategy,
+    "greedy": greedy_strategy,
+    "corner": corner_strategy,
+    "expectimax": expectimax_strategy,
+}
+
+
+def play_game(job):
+    """Play one seeded game headlessly; job is (strategy, seed, depth).
+
+    Uses the same bitboard move and spawn as Game2048.take_turn and
+    new_pieces: a move that changes nothing spawns nothing, and the game
+    ends when no direction changes the board. Spawn i comes from
+    spawn_rng(seed, i) as in the game, so a History seeded with seed
+    replays it.
+    """
+    global _solver
+    name, seed, depth = job
+    strategy = STRATEGIES[name]
+    # Strategies draw from their own stream so they all face the same spawns
+    choices = random.Random(f"{seed}-choices")
+    _solver = Expectimax(max_depth=depth) if name == "expectimax" else None
+    start = time.process_time()
+    board = bitboard.spawn(bitboard.spawn(0, spawn_rng(seed, 0)), spawn_rng(seed, 1))
+    score = 0
+    moves = 0
+    while moves < MAX_MOVES and bitboard.can_move(board):
+        direction = strategy(board, choices)
+        if direction is None:
+            break
+        moved, gained = bitboard.move(board, direction)
+        if moved == board:
+            break
+        board = bitboard.spawn(moved, spawn_rng(seed, 2 + moves))
+        score += gained
+        moves += 1
+    return {
+        "strategy": name,
+        "seed": seed,
+        "score": score,
+        "max_tile": bitboard.max_tile(board),
+        "moves": moves,
+        "cpu_seconds": round(time.process_time() - start, 4),
+    }
+
+
+def run_tournament(strategies, games, seed=0, workers=None, depth=1):
+    """Play games per strategy on a process pool.
+
+    Every strategy plays the same seeds, so they face the same spawns for
+    as long as their boards agree. Returns (results, elapsed_seconds).
+    """
+    jobs = [(name, seed + g, depth) for name in strategies for g in range(games)]
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1:
+        results = [play_game(job) for job in jobs]
+    else:
+        # Big chunks keep pickling overhead low; several per worker even
+        # out the slow strategies
+        chunksize = max(1, len(jobs) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(play_game, jobs, chunksize=chunksize))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    """Per-strategy mean score, max-tile distribution and games per second."""
+    summary = {}
+    for name in dict.fromkeys(r["strategy"] for r in results):
+        rows = [r for r in results if r["strategy"] == name]
+        tiles = Counter(r["max_tile"] for r in rows)
+        summary[name] = {
+            "games": len(rows),
+            "mean_score": sum(r["score"] for r in rows) / len(rows),
+            "mean_moves": sum(r["moves"] for r in rows) / len(rows),
+            "max_tiles": dict(sorted(tiles.items())),
+            "cpu_seconds": sum(r["cpu_seconds"] for r in rows),
+        }
+    summary["total"] = {
+        "games": len(results),
+        "seconds": elapsed,
+        "games_per_second": len(results) / elapsed if elapsed else 0.0,
+    }
+    return summary
+
+
+def write_results(path, results):
+    with open(path, "w", newline="") as f:
+        # A fixed header keeps the file valid when no games were played
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 strategy tournament")
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        default=list(STRATEGIES),
+        choices=list(STRATEGIES),
+    )
+    parser.add_argument("--games", type=int, default=1000, help="games per strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--depth", type=int, default=1, help="expectimax depth")
+    parser.add_argument("--out", default="tournament.csv", help="per-game results")
+    args = parser.parse_args(argv)
+
+    results, elapsed = run_tournament(
+        args.strategies, args.games, args.seed, args.workers, args.depth
+    )
+    write_results(args.out, results)
+    summary = summarize(results, elapsed)
+    total = summary.pop("total")
+    for name, stats in summary.items():
+        tiles = ", ".join(f"{t}: {n}" for t, n in stats["max_tiles"].items())
+        print(
+            f"{name:<11} {stats['games']:>6} games  mean score {stats['mean_score']:>9.1f}"
+            f"  mean moves {stats['mean_moves']:>7.1f}  cpu {stats['cpu_seconds']:.1f}s"
+        )
+        print(f"{'':<11} max tiles  {tiles}")
+    print(
+        f"{total['games']} games in {total['seconds']:.1f}s with "
+        f"{args.workers or os.cpu_count()} workers: {total['games_per_second']:.1f} games/s"
+    )
+    print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from chess_core import START_FEN, position_from_fen, position_to_fen
+from chess_engine import AlphaBeta
+from pgn import read_games, resolve_san
+from uci import format_score, move_name
+
+# Finished chunks waiting to be written, plus chunks still running, are
+# capped at this many per worker so a huge input never sits in memory
+WINDOW_PER_WORKER = 2
+
+
+# ------ input: one {"id", "fen", ...} task per position ------
+def fen_tasks(lines):
+    """A task per FEN line; blank lines and # comments are skipped."""
+    for number, line in enumerate(lines, 1):
+        fen = line.strip()
+        if fen and not fen.startswith("#"):
+            yield {"id": f"line {number}", "fen": fen}
+
+
+def game_tasks(lines):
+    """A task for the position before every move of every PGN game.
+
+    The move played is kept as "played" to compare with the engine's. A
+    game ends early at a move these rules lack (castling, en passant,
+    promotion) or one that doesn't resolve.
+    """
+    for number, (tags, moves) in enumerate(read_games(lines), 1):
+        position = position_from_fen(tags.get("FEN", START_FEN))
+        for ply, san in enumerate(moves, 1):
+            try:
+                move = resolve_san(position, san)
+            except ValueError:
+                break
+            yield {
+                "id": f"game {number} ply {ply}",
+                "fen": position_to_fen(position),
+                "played": move_name(move),
+            }
+            position.make(move)
+
+
+def read_tasks(path):
+    """Tasks from a .pgn file or a file of FEN lines, read lazily."""
+    with open(path) as f:
+        if path.endswith(".pgn"):
+            yield from game_tasks(f)
+        else:
+            yield from fen_tasks(f)
+
+
+def chunks(tasks, size):
+    tasks = iter(tasks)
+    while True:
+        chunk = list(islice(tasks, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ------ work ------
+def analyze_chunk(job):
+    """Search every position of a chunk; job is (tasks, time_limit, depth).
+
+    Each position gets a fresh engine, so a result doesn't depend on
+    which worker ran it or what that worker searched before. time_limit
+    bounds each position's search; depth caps it.
+    """
+    tasks, time_limit, depth = job
+    results = []
+    for task in tasks:
+        result = dict(task)
+        try:
+            position = position_from_fen(task["fen"])
+        except (KeyError, IndexError, ValueError) as error:
+            result["error"] = f"bad FEN: {error!r}"
+            results.append(result)
+            continue
+        engine = AlphaBeta(max_depth=depth)
+        move = engine.best_move(position, time_limit)
+        stats = engine.stats()
+        result.update(
+            best=move_name(move) if move else None,
+            score=format_score(stats["score"]),
+            depth=stats["depth_reached"],
+            nodes=stats["nodes"],
+            seconds=round(engine.elapsed, 4),
+        )
+        results.append(result)
+    return results
+
+
+def analyze(tasks, workers=None, time_limit=1.0, depth=32, chunksize=8):
+    """Yield result dicts as their chunks finish, in completion order.
+
+    Chunks of chunksize positions go to a process pool, with at most
+    WINDOW_PER_WORKER chunks per worker submitted and not yet yielded, so
+    the input is read only as fast as it's analysed.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = ((chunk, time_limit, depth) for chunk in chunks(tasks, chunksize))
+    if workers == 1:
+        for job in jobs:
+            yield from analyze_chunk(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(analyze_chunk, job))
+            if len(pending) < workers * WINDOW_PER_WORKER:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+def throughput(tasks, worker_counts=(1, 2, 4, 8), depth=3, chunksize=4):
+    """Positions per second at each worker count, searching every position
+    to a fixed depth so each run does the same work."""
+    tasks = list(tasks)
+    rates = {}
+    for workers in worker_counts:
+        start = time.perf_counter()
+        count = sum(1 for _ in analyze(tasks, workers, float("inf"), depth, chunksize))
+        rates[workers] = count / (time.perf_counter() - start)
+    return rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="analyse chess positions in parallel")
+    parser.add_argument("input", help="a .pgn file, or a file with a FEN per line")
+    parser.add_argument("--out", help="JSON lines file (default: standard output)")
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per position")
+    parser.add_argument(
+        "--depth", type=int, default=None, help="maximum depth (32; 3 for --throughput)"
+    )
+    parser.add_argument("--chunksize", type=int, default=8, help="positions per task")
+    parser.add_argument(
+        "--throughput",
+        action="store_true",
+        help="time fixed-depth runs at 1, 2, 4 and 8 workers instead",
+    )
+    args = parser.parse_args(argv)
+
+    if args.throughput:
+        rates = throughput(
+            read_tasks(args.input), depth=args.depth or 3, chunksize=args.chunksize
+        )
+        for workers, rate in rates.items():
+            print(
+                f"{workers} workers  {rate:8.1f} positions/s"
+                f"  x{rate / rates[1]:.2f}"
+            )
+        print(f"{os.cpu_count()} cores available")
+        return 0
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    start = time.perf_counter()
+    count = 0
+    try:
+        for result in analyze(
+            read_tasks(args.input),
+            args.workers,
+            args.time,
+            args.depth or 32,
+            args.chunksize,
+        ):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{count} positions in {elapsed:.1f}s: {count / elapsed if elapsed else 0:.1f}/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
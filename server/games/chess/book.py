@@ -0,0 +1,222 @@
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+try:
+    import mmap
+except ImportError:  # Builds of Python without it read the book instead
+    mmap = None
+
+from chess_core import START_FEN, position_from_fen, square_name
+from pgn import read_games, resolve_san
+
+BOOK = "book.bin"
+# One record: Zobrist hash of the position, from << 6 | to, weight.
+# Records are sorted by hash, then move.
+RECORD = struct.Struct("<QHH")
+KEY = struct.Struct("<Q")
+MAX_WEIGHT = 0xFFFF
+
+
+class Book:
+    """An opening book file, memory-mapped and binary searched.
+
+    The file is mapped read-only, so every process with the same book
+    open shares one copy of its pages through the page cache, and a
+    lookup touches only the log2(n) records the search probes plus the
+    position's own. Where mmap isn't available (or the file is empty)
+    the bytes are read instead; lookups work the same.
+
+    Hashes are chess_core's Zobrist keys, so a book has to be rebuilt if
+    those ever change.
+    """
+
+    def __init__(self, path=BOOK):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                self.data = f.read()
+        self.size = len(self.data) // RECORD.size
+
+    def close(self):
+        if mmap is not None and isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __len__(self):
+        return self.size
+
+    def _first(self, key):
+        """Index of the first record with hash >= key."""
+        data = self.data
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(data, mid * RECORD.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, key):
+        """[((from, to), weight), ...] stored for a position hash."""
+        data = self.data
+        result = []
+        for i in range(self._first(key), self.size):
+            found, move, weight = RECORD.unpack_from(data, i * RECORD.size)
+            if found != key:
+                break
+            result.append(((move >> 6, move & 63), weight))
+        return result
+
+    def choose(self, position, rng=random):
+        """A book move for position, picked by weight; None when out of book.
+
+        Only moves that are legal in position are played, so a hash
+        collision can't make the engine move a piece it doesn't have.
+        """
+        entries = self.lookup(position.hash)
+        if not entries:
+            return None
+        legal = set(position.legal_moves())
+        entries = [(move, weight) for move, weight in entries if move in legal]
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return rng.choices(moves, weights)[0]
+
+
+# ------ building ------
+def count_moves(games, plies=16):
+    """{(hash, move): times played} over the first plies of every game.
+
+    games yields SAN move lists, like pgn.read_games. A game stops adding
+    to the book at its first move these rules can't play.
+    """
+    counts = {}
+    for moves in games:
+        position = position_from_fen(START_FEN)
+        for san in moves[:plies]:
+            try:
+                move = resolve_san(position, san)
+            except ValueError:
+                break
+            key = (position.hash, move[0] << 6 | move[1])
+            counts[key] = counts.get(key, 0) + 1
+            position.make(move)
+    return counts
+
+
+def write_book(path, counts):
+    """Write {(hash, packed move): weight} as sorted records."""
+    with open(path, "wb") as f:
+        for key, move in sorted(counts):
+            f.write(RECORD.pack(key, move, min(counts[key, move], MAX_WEIGHT)))
+    return len(counts)
+
+
+def build_book(pgn_path, path=BOOK, plies=16):
+    """Compile a PGN file into a book; returns the number of records."""
+    with open(pgn_path) as f:
+        counts = count_moves((moves for _, moves in read_games(f)), plies)
+    return write_book(path, counts)
+
+
+# ------ benchmark ------
+def write_synthetic(path, entries, samples=1000, seed=0):
+    """A book of about entries random records, written in sorted order.
+
+    Hashes rise by random gaps so nothing has to be sorted or held in
+    memory; each position gets one to three moves. Returns samples
+    hashes spread through the file, for lookups that hit.
+    """
+    rng = random.Random(seed)
+    step = (1 << 64) // (entries + 1)
+    every = max(1, entries // samples)
+    hits = []
+    chunk = bytearray(RECORD.size * 4096)
+    used = 0
+    key = 0
+    written = 0
+    with open(path, "wb") as f:
+        while written < entries:
+            key += rng.randrange(1, step)
+            if written // every >= len(hits):
+                hits.append(key)
+            for move in rng.sample(range(4096), min(rng.randint(1, 3), entries - written)):
+                RECORD.pack_into(chunk, used, key, move, rng.randint(1, 100))
+                used += RECORD.size
+                written += 1
+                if used == len(chunk):
+                    f.write(chunk)
+                    used = 0
+        f.write(chunk[:used])
+    return hits
+
+
+def benchmark(sizes=(10**4, 10**5, 10**6, 10**7), lookups=20000, directory=None):
+    """Microseconds per lookup, for hashes in the book and not, by size."""
+    results = {}
+    rng = random.Random(1)
+    for entries in sizes:
+        fd, path = tempfile.mkstemp(suffix=".bin", dir=directory)
+        os.close(fd)
+        try:
+            hits = write_synthetic(path, entries)
+            book = Book(path)
+            present = [rng.choice(hits) for _ in range(lookups)]
+            absent = [rng.getrandbits(64) for _ in range(lookups)]
+            timings = {}
+            for label, keys in (("hit", present), ("miss", absent)):
+                start = time.perf_counter()
+                for key in keys:
+                    book.lookup(key)
+                timings[label] = (time.perf_counter() - start) / lookups * 1e6
+            results[entries] = (len(book), os.path.getsize(path), timings)
+            book.close()
+        finally:
+            os.remove(path)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="chess opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile a PGN file into a book")
+    build.add_argument("pgn")
+    build.add_argument("book", nargs="?", default=BOOK)
+    build.add_argument("--plies", type=int, default=16)
+    probe = commands.add_parser("probe", help="list the book moves of a position")
+    probe.add_argument("fen", nargs="?", default=START_FEN)
+    probe.add_argument("--book", default=BOOK)
+    bench = commands.add_parser("bench", help="lookup latency by book size")
+    bench.add_argument("--max-power", type=int, default=7)
+    bench.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        records = build_book(args.pgn, args.book, args.plies)
+        seconds = time.perf_counter() - start
+        print(f"{records} records written to {args.book} in {seconds:.2f}s")
+    elif args.command == "probe":
+        book = Book(args.book)
+        for (frm, to), weight in book.lookup(position_from_fen(args.fen).hash):
+            print(f"{square_name(frm)}{square_name(to)} {weight}")
+    else:
+        sizes = [10**power for power in range(4, args.max_power + 1)]
+        for entries, (records, nbytes, timings) in benchmark(sizes, args.lookups).items():
+            print(
+                f"{records:>10,} records  {nbytes / 2**20:8.1f} MiB"
+                f"  hit {timings['hit']:6.2f} us  miss {timings['miss']:6.2f} us"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,969 @@
+import random
+import sys
+import time
+
+# A square is y * 8 + x, with white starting on rows 0 and 1 and moving +y.
+# A piece is its kind ORed with its colour bit; 0 is an empty square.
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+WHITE, BLACK = 0, 8
+EMPTY = 0
+
+KINDS = {
+    "pawn": PAWN,
+    "knight": KNIGHT,
+    "bishop": BISHOP,
+    "rook": ROOK,
+    "queen": QUEEN,
+    "king": KING,
+}
+NAMES = {kind: name for name, kind in KINDS.items()}
+COLOURS = {"white": WHITE, "black": BLACK}
+
+START_PIECES = [
+    "rook",
+    "knight",
+    "bishop",
+    "king",
+    "queen",
+    "bishop",
+    "knight",
+    "rook",
+] + ["pawn"] * 8
+START_WHITE = [(x, 0) for x in range(8)] + [(x, 1) for x in range(8)]
+START_BLACK = [(x, 7) for x in range(8)] + [(x, 6) for x in range(8)]
+
+# (x, y) of every square, shared so generated moves never build new tuples
+XY = [(sq % 8, sq // 8) for sq in range(64)]
+
+
+def square(position):
+    return position[1] * 8 + position[0]
+
+
+def _targets(sq, offsets):
+    x, y = XY[sq]
+    return tuple(
+        (y + dy) * 8 + x + dx
+        for dx, dy in offsets
+        if 0 <= x + dx <= 7 and 0 <= y + dy <= 7
+    )
+
+
+def _rays(sq, directions):
+    x, y = XY[sq]
+    rays = []
+    for dx, dy in directions:
+        ray = []
+        tx, ty = x + dx, y + dy
+        while 0 <= tx <= 7 and 0 <= ty <= 7:
+            ray.append(ty * 8 + tx)
+            tx += dx
+            ty += dy
+        rays.append(tuple(ray))
+    return tuple(rays)
+
+
+# Offsets and directions in the order ChessGame always listed moves in
+KING_OFFSETS = [(1, 0), (1, 1), (1, -1), (-1, 0), (-1, 1), (-1, -1), (0, 1), (0, -1)]
+KNIGHT_OFFSETS = [(1, 2), (1, -2), (2, 1), (2, -1), (-1, 2), (-1, -2), (-2, 1), (-2, -1)]
+BISHOP_DIRECTIONS = [(1, -1), (-1, -1), (1, 1), (-1, 1)]
+ROOK_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+KING_MOVES = [_targets(sq, KING_OFFSETS) for sq in range(64)]
+KNIGHT_MOVES = [_targets(sq, KNIGHT_OFFSETS) for sq in range(64)]
+BISHOP_RAYS = [_rays(sq, BISHOP_DIRECTIONS) for sq in range(64)]
+ROOK_RAYS = [_rays(sq, ROOK_DIRECTIONS) for sq in range(64)]
+QUEEN_RAYS = [BISHOP_RAYS[sq] + ROOK_RAYS[sq] for sq in range(64)]
+SLIDER_RAYS = {BISHOP: BISHOP_RAYS, ROOK: ROOK_RAYS, QUEEN: QUEEN_RAYS}
+
+# Bitmasks of the squares a step piece's targets depend on
+BIT = [1 << sq for sq in range(64)]
+KNIGHT_REACH = [sum(BIT[t] for t in KNIGHT_MOVES[sq]) for sq in range(64)]
+KING_REACH = [sum(BIT[t] for t in KING_MOVES[sq]) for sq in range(64)]
+
+
+def _pawn_reach(sq, colour):
+    x, y = XY[sq]
+    step, home, last = (8, 1, 7) if colour == WHITE else (-8, 6, 0)
+    mask = 0
+    if y != last:
+        mask |= BIT[sq + step]
+        if x < 7:
+            mask |= BIT[sq + step + 1]
+        if x > 0:
+            mask |= BIT[sq + step - 1]
+    if y == home:
+        mask |= BIT[sq + 2 * step]
+    return mask
+
+
+PAWN_REACH = {colour: [_pawn_reach(sq, colour) for sq in range(64)] for colour in (WHITE, BLACK)}
+
+
+def _pawn_attacks(sq, colour):
+    x, y = XY[sq]
+    step, last = (8, 7) if colour == WHITE else (-8, 0)
+    if y == last:
+        return ()
+    return tuple(sq + step + dx for dx in (1, -1) if 0 <= x + dx <= 7)
+
+
+# Squares a pawn on sq attacks, as a mask, and the squares a pawn must
+# stand on to attack sq
+PAWN_ATTACKS = {
+    colour: [sum(BIT[t] for t in _pawn_attacks(sq, colour)) for sq in range(64)]
+    for colour in (WHITE, BLACK)
+}
+PAWN_ATTACKERS = {
+    colour: [
+        tuple(p for p in range(64) if sq in _pawn_attacks(p, colour)) for sq in range(64)
+    ]
+    for colour in (WHITE, BLACK)
+}
+# Every square on a queen line from sq, ignoring blockers
+LINES = [sum(BIT[t] for ray in QUEEN_RAYS[sq] for t in ray) for sq in range(64)]
+
+# Zobrist keys: one per (piece, square), indexed by the piece value, plus
+# one for black to move. Fixed seed, so hashes are stable between runs.
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(64)] for _ in range(16)]
+ZOBRIST_BLACK = _zobrist_rng.getrandbits(64)
+
+
+def zobrist(squares, turn):
+    key = ZOBRIST_BLACK if turn == BLACK else 0
+    for sq, piece in enumerate(squares):
+        if piece:
+            key ^= ZOBRIST[piece][sq]
+    return key
+
+
+# ------ generators: target squares of the piece of colour on sq ------
+def _step_targets(squares, table, colour):
+    return [t for t in table if not squares[t] or squares[t] & 8 != colour]
+
+
+def _ray_targets(squares, rays, colour):
+    moves = []
+    for ray in rays:
+        for t in ray:
+            piece = squares[t]
+            if not piece:
+                moves.append(t)
+            else:
+                if piece & 8 != colour:
+                    moves.append(t)
+                break
+    return moves
+
+
+def pawn_targets(squares, sq, colour):
+    """Pawn pushes and captures as ChessGame.check_pawn had them.
+
+    The double step needs the square it passes over to be empty too (the
+    original only looked at its landing square, so pawns jumped pieces).
+    There is no promotion: a pawn on the last rank has no moves.
+    """
+    x, y = XY[sq]
+    moves = []
+    if colour == WHITE:
+        if y < 7 and not squares[sq + 8]:
+            moves.append(sq + 8)
+            if y == 1 and not squares[sq + 16]:
+                moves.append(sq + 16)
+        if y < 7:
+            if x < 7 and squares[sq + 9] & 8:
+                moves.append(sq + 9)
+            if x > 0 and squares[sq + 7] & 8:
+                moves.append(sq + 7)
+    else:
+        if y > 0 and not squares[sq - 8]:
+            moves.append(sq - 8)
+            if y == 6 and not squares[sq - 16]:
+                moves.append(sq - 16)
+        if y > 0:
+            if x < 7 and squares[sq - 7] and not squares[sq - 7] & 8:
+                moves.append(sq - 7)
+            if x > 0 and squares[sq - 9] and not squares[sq - 9] & 8:
+                moves.append(sq - 9)
+    return moves
+
+
+def knight_targets(squares, sq, colour):
+    return _step_targets(squares, KNIGHT_MOVES[sq], colour)
+
+
+def king_targets(squares, sq, colour):
+    return _step_targets(squares, KING_MOVES[sq], colour)
+
+
+def bishop_targets(squares, sq, colour):
+    return _ray_targets(squares, BISHOP_RAYS[sq], colour)
+
+
+def rook_targets(squares, sq, colour):
+    return _ray_targets(squares, ROOK_RAYS[sq], colour)
+
+
+def queen_targets(squares, sq, colour):
+    return _ray_targets(squares, QUEEN_RAYS[sq], colour)
+
+
+GENERATORS = {
+    PAWN: pawn_targets,
+    KNIGHT: knight_targets,
+    BISHOP: bishop_targets,
+    ROOK: rook_targets,
+    QUEEN: queen_targets,
+    KING: king_targets,
+}
+
+
+def targets(squares, sq):
+    """Target squares of whatever piece stands on sq."""
+    piece = squares[sq]
+    return GENERATORS[piece & 7](squares, sq, piece & 8)
+
+
+def squares_from_lists(white_pieces, white_locations, black_pieces, black_locations):
+    """The 64-square array for ChessGame's parallel piece/location lists."""
+    squares = [EMPTY] * 64
+    for name, loc in zip(white_pieces, white_locations):
+        squares[loc[1] * 8 + loc[0]] = KINDS[name] | WHITE
+    for name, loc in zip(black_pieces, black_locations):
+        squares[loc[1] * 8 + loc[0]] = KINDS[name] | BLACK
+    return squares
+
+
+def options(squares, locations):
+    """ChessGame's option lists: the (x, y) targets per location, in order."""
+    result = []
+    for x, y in locations:
+        sq = y * 8 + x
+        piece = squares[sq]
+        result.append([XY[t] for t in GENERATORS[piece & 7](squares, sq, piece & 8)])
+    return result
+
+
+def reach(squares, sq):
+    """Bitmask of the squares the targets of the piece on sq depend on.
+
+    For pawns, knights and kings that is their fixed pattern; for sliders
+    every ray up to and including its first blocker. Targets only change
+    when one of these squares does.
+    """
+    piece = squares[sq]
+    kind = piece & 7
+    if kind == PAWN:
+        return PAWN_REACH[piece & 8][sq]
+    if kind == KNIGHT:
+        return KNIGHT_REACH[sq]
+    if kind == KING:
+        return KING_REACH[sq]
+    mask = 0
+    for ray in SLIDER_RAYS[kind][sq]:
+        for t in ray:
+            mask |= BIT[t]
+            if squares[t]:
+                break
+    return mask
+
+
+def attack_map(squares, colour, ignore=None):
+    """Bitmask of the squares colour's pieces attack, defended ones included.
+
+    Sliders see through the square ignore: pass the enemy king's square to
+    get the squares it can't step back along a checking line to.
+    """
+    mask = 0
+    for sq in range(64):
+        piece = squares[sq]
+        if not piece or piece & 8 != colour:
+            continue
+        kind = piece & 7
+        if kind == PAWN:
+            mask |= PAWN_ATTACKS[colour][sq]
+        elif kind == KNIGHT:
+            mask |= KNIGHT_REACH[sq]
+        elif kind == KING:
+            mask |= KING_REACH[sq]
+        else:
+            for ray in SLIDER_RAYS[kind][sq]:
+                for t in ray:
+                    mask |= BIT[t]
+                    if squares[t] and t != ignore:
+                        break
+    return mask
+
+
+def attacked(squares, sq, by):
+    """Whether a piece of colour by attacks sq, probing outward from sq."""
+    knight, king, pawn = KNIGHT | by, KING | by, PAWN | by
+    for t in KNIGHT_MOVES[sq]:
+        if squares[t] == knight:
+            return True
+    for t in KING_MOVES[sq]:
+        if squares[t] == king:
+            return True
+    for t in PAWN_ATTACKERS[by][sq]:
+        if squares[t] == pawn:
+            return True
+    for sliders, rays in ((BISHOP, BISHOP_RAYS), (ROOK, ROOK_RAYS)):
+        slider, queen = sliders | by, QUEEN | by
+        for ray in rays[sq]:
+            for t in ray:
+                piece = squares[t]
+                if piece:
+                    if piece == slider or piece == queen:
+                        return True
+                    break
+    return False
+
+
+def legal_options(squares, locations, options_list, colour):
+    """options_list with the moves that leave colour's king attacked removed.
+
+    Only the king and pieces on a line from it can expose it, unless it's
+    already in check; their moves are tried on the board and probed with
+    attacked(). The king's own moves are checked against the enemy attack
+    map drawn through the king. Lists that need no filtering are shared.
+    """
+    enemy = colour ^ 8
+    king = _find(squares, KING | colour)
+    if king is None:
+        return list(options_list)
+    danger = attack_map(squares, enemy, ignore=king)
+    in_check = danger & BIT[king]
+    result = []
+    for (x, y), moves in zip(locations, options_list):
+        sq = y * 8 + x
+        if sq == king:
+            result.append([t for t in moves if not danger & BIT[t[1] * 8 + t[0]]])
+        elif not in_check and not LINES[king] & BIT[sq]:
+            result.append(moves)
+        else:
+            result.append([t for t in moves if _safe(squares, sq, t[1] * 8 + t[0], king, enemy)])
+    return result
+
+
+def _find(squares, piece):
+    return squares.index(piece) if piece in squares else None
+
+
+def _safe(squares, frm, to, king, enemy):
+    piece, captured = squares[frm], squares[to]
+    squares[to] = piece
+    squares[frm] = EMPTY
+    safe = not attacked(squares, king, enemy)
+    squares[frm] = piece
+    squares[to] = captured
+    return safe
+
+
+class IncrementalOptions:
+    """ChessGame's option lists, updated after each move instead of rebuilt.
+
+    Works on the game's own piece and location lists (the same list
+    objects), next to the 64-square array, the list slot standing on each
+    square, and the reach mask each piece's options were generated with.
+    A move only changes its from and to squares, so only the moved piece
+    and the pieces whose reach holds either square are regenerated. A
+    captured piece is swap-removed: its side's last piece takes over its
+    slot, so no other index shifts.
+    """
+
+    def __init__(self, white_pieces, white_locations, black_pieces, black_locations):
+        self.pieces = {WHITE: white_pieces, BLACK: black_pieces}
+        self.locations = {WHITE: white_locations, BLACK: black_locations}
+        self.options = {WHITE: [], BLACK: []}
+        self.reach = {WHITE: [], BLACK: []}
+        self.squares = [EMPTY] * 64
+        self.slot = [None] * 64
+        self.regenerated = 0
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild everything from the lists, keeping every list object."""
+        self.squares[:] = squares_from_lists(
+            self.pieces[WHITE],
+            self.locations[WHITE],
+            self.pieces[BLACK],
+            self.locations[BLACK],
+        )
+        self.slot[:] = [None] * 64
+        for colour in (WHITE, BLACK):
+            locations = self.locations[colour]
+            self.options[colour][:] = options(self.squares, locations)
+            self.reach[colour][:] = [reach(self.squares, square(loc)) for loc in locations]
+            for i, loc in enumerate(locations):
+                self.slot[square(loc)] = i
+
+    def _regenerate(self, colour, index):
+        sq = square(self.locations[colour][index])
+        self.options[colour][index] = [XY[t] for t in targets(self.squares, sq)]
+        self.reach[colour][index] = reach(self.squares, sq)
+        self.regenerated += 1
+
+    def _remove(self, colour, index):
+        lists = (
+            self.pieces[colour],
+            self.locations[colour],
+            self.options[colour],
+            self.reach[colour],
+        )
+        for items in lists:
+            last = items.pop()
+            if index < len(items):
+                items[index] = last
+        if index < len(self.locations[colour]):
+            self.slot[square(self.locations[colour][index])] = index
+
+    def move(self, colour, index, target):
+        """Move piece index of colour to target.
+
+        Returns the name of the captured piece, or None.
+        """
+        squares = self.squares
+        frm = square(self.locations[colour][index])
+        to = square(target)
+        captured = None
+        if squares[to]:
+            other = squares[to] & 8
+            captured = self.pieces[other][self.slot[to]]
+            self._remove(other, self.slot[to])
+        squares[to] = squares[frm]
+        squares[frm] = EMPTY
+        self.locations[colour][index] = target
+        self.slot[to] = index
+        self.slot[frm] = None
+
+        changed = BIT[frm] | BIT[to]
+        for side in (WHITE, BLACK):
+            reaches = self.reach[side]
+            for i in range(len(reaches)):
+                if reaches[i] & changed or (side == colour and i == index):
+                    self._regenerate(side, i)
+        return captured
+
+
+class Position:
+    """A position for search and perft: squares, side to move, piece sets.
+
+    Moves are (from, to) square pairs. make() returns what it captured so
+    unmake() can put it back. The game ends when a king is captured, so
+    a side without a king has no moves; legal_moves() leaves out moves
+    that would expose it. hash is the Zobrist key, kept up to date by
+    make() and unmake().
+    """
+
+    def __init__(self, squares=None, turn=WHITE):
+        if squares is None:
+            squares = squares_from_lists(
+                START_PIECES, START_WHITE, START_PIECES, START_BLACK
+            )
+        self.squares = list(squares)
+        self.turn = turn
+        self.pieces = {WHITE: set(), BLACK: set()}
+        self.kings = {WHITE: None, BLACK: None}
+        for sq, piece in enumerate(self.squares):
+            if piece:
+                self.pieces[piece & 8].add(sq)
+                if piece & 7 == KING:
+                    self.kings[piece & 8] = sq
+        self.hash = zobrist(self.squares, turn)
+
+    def moves(self):
+        if self.kings[self.turn] is None:
+            return []
+        squares = self.squares
+        colour = self.turn
+        result = []
+        for sq in self.pieces[colour]:
+            for t in GENERATORS[squares[sq] & 7](squares, sq, colour):
+                result.append((sq, t))
+        return result
+
+    def in_check(self):
+        king = self.kings[self.turn]
+        return king is not None and attacked(self.squares, king, self.turn ^ 8)
+
+    def legal_moves(self):
+        """moves() without those that leave the mover's king attacked."""
+        result = []
+        for move in self.moves():
+            captured = self.make(move)
+            if not attacked(self.squares, self.kings[self.turn ^ 8], self.turn):
+                result.append(move)
+            self.unmake(move, captured)
+        return result
+
+    def make(self, move):
+        frm, to = move
+        squares = self.squares
+        piece = squares[frm]
+        captured = squares[to]
+        colour = self.turn
+        if captured:
+            self.pieces[captured & 8].discard(to)
+            if captured & 7 == KING:
+                self.kings[captured & 8] = None
+        mine = self.pieces[colour]
+        mine.discard(frm)
+        mine.add(to)
+        if piece & 7 == KING:
+            self.kings[colour] = to
+        squares[to] = piece
+        squares[frm] = EMPTY
+        self.turn = colour ^ 8
+        key = self.hash ^ ZOBRIST_BLACK ^ ZOBRIST[piece][frm] ^ ZOBRIST[piece][to]
+        if captured:
+            key ^= ZOBRIST[captured][to]
+        self.hash = key
+        return captured
+
+    def unmake(self, move, captured):
+        frm, to = move
+        squares = self.squares
+        colour = self.turn ^ 8
+        piece = squares[to]
+        squares[frm] = piece
+        squares[to] = captured
+        mine = self.pieces[colour]
+        mine.discard(to)
+        mine.add(frm)
+        if piece & 7 == KING:
+            self.kings[colour] = frm
+        if captured:
+            self.pieces[captured & 8].add(to)
+            if captured & 7 == KING:
+                self.kings[captured & 8] = to
+        self.turn = colour
+        key = self.hash ^ ZOBRIST_BLACK ^ ZOBRIST[piece][frm] ^ ZOBRIST[piece][to]
+        if captured:
+            key ^= ZOBRIST[captured][to]
+        self.hash = key
+
+
+# FEN files run a..h; white's king starts on x=3, so file a is x=7
+FILES = "hgfedcba"
+FEN_KINDS = {"p": PAWN, "n": KNIGHT, "b": BISHOP, "r": ROOK, "q": QUEEN, "k": KING}
+FEN_LETTERS = {kind: letter for letter, kind in FEN_KINDS.items()}
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+
+def square_name(sq):
+    x, y = XY[sq]
+    return f"{FILES[x]}{y + 1}"
+
+
+def parse_square(name):
+    return (int(name[1]) - 1) * 8 + FILES.index(name[0])
+
+
+def position_from_fen(fen):
+    """A Position from FEN placement and side to move.
+
+    Castling, en passant and the clocks are ignored: these rules have
+    none of them.
+    """
+    fields = fen.split()
+    squares = [EMPTY] * 64
+    for row, rank in enumerate(fields[0].split("/")):
+        y = 7 - row
+        file = 0
+        for char in rank:
+            if char.isdigit():
+                file += int(char)
+                continue
+            colour = WHITE if char.isupper() else BLACK
+            squares[y * 8 + 7 - file] = FEN_KINDS[char.lower()] | colour
+            file += 1
+    turn = BLACK if len(fields) > 1 and fields[1] == "b" else WHITE
+    return Position(squares, turn)
+
+
+def position_to_fen(position):
+    ranks = []
+    for y in range(7, -1, -1):
+        rank = ""
+        empty = 0
+        for x in range(7, -1, -1):
+            piece = position.squares[y * 8 + x]
+            if not piece:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            letter = FEN_LETTERS[piece & 7]
+            rank += letter if piece & 8 else letter.upper()
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+    side = "b" if position.turn == BLACK else "w"
+    return f"{'/'.join(ranks)} {side} - - 0 1"
+
+
+def perft(position, depth):
+    """Count the leaf nodes of the move tree depth plies deep."""
+    if depth == 0:
+        return 1
+    moves = position.moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        captured = position.make(move)
+        nodes += perft(position, depth - 1)
+        position.unmake(move, captured)
+    return nodes
+
+
+class ListRules:
+    """The original list-based generator from ChessGame, kept as reference.
+
+    Every probe is a membership test against the location lists; the
+    square tables above are checked and benchmarked against it.
+    """
+
+    def __init__(self, white_pieces, white_locations, black_pieces, black_locations):
+        self.white_pieces = list(white_pieces)
+        self.white_locations = list(white_locations)
+        self.black_pieces = list(black_pieces)
+        self.black_locations = list(black_locations)
+
+    def check_options(self, pieces, locations, turn_color):
+        all_moves = []
+        for i, piece in enumerate(pieces):
+            loc = locations[i]
+            if piece == "pawn":
+                moves = self.check_pawn(loc, turn_color)
+            elif piece == "rook":
+                moves = self.check_rook(loc, turn_color)
+            elif piece == "knight":
+                moves = self.check_knight(loc, turn_color)
+            elif piece == "bishop":
+                moves = self.check_bishop(loc, turn_color)
+            elif piece == "queen":
+                moves = self.check_queen(loc, turn_color)
+            elif piece == "king":
+                moves = self.check_king(loc, turn_color)
+            else:
+                moves = []
+            all_moves.append(moves)
+        return all_moves
+
+    def _sides(self, color):
+        if color == "white":
+            return self.black_locations, self.white_locations
+        return self.white_locations, self.black_locations
+
+    def check_king(self, position, color):
+        moves_list = []
+        enemies_list, friends_list = self._sides(color)
+        for dx, dy in KING_OFFSETS:
+            tx, ty = position[0] + dx, position[1] + dy
+            if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
+                moves_list.append((tx, ty))
+        return moves_list
+
+    def check_queen(self, pos, color):
+        return self.check_bishop(pos, color) + self.check_rook(pos, color)
+
+    def _check_rays(self, position, color, directions):
+        moves_list = []
+        enemies_list, friends_list = self._sides(color)
+        for dx, dy in directions:
+            chain = 1
+            path_open = True
+            while path_open:
+                tx = position[0] + chain * dx
+                ty = position[1] + chain * dy
+                if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
+                    moves_list.append((tx, ty))
+                    if (tx, ty) in enemies_list:
+                        path_open = False
+                    chain += 1
+                else:
+                    path_open = False
+        return moves_list
+
+    def check_bishop(self, position, color):
+        return self._check_rays(position, color, BISHOP_DIRECTIONS)
+
+    def check_rook(self, position, color):
+        return self._check_rays(position, color, ROOK_DIRECTIONS)
+
+    def check_pawn(self, position, color):
+        moves_list = []
+        x, y = position
+        occupied = self.white_locations + self.black_locations
+        # Unlike the original, the double step also needs the square it
+        # passes over to be empty
+        if color == "white":
+            if (x, y + 1) not in occupied and y < 7:
+                moves_list.append((x, y + 1))
+                if (x, y + 2) not in occupied and y == 1:
+                    moves_list.append((x, y + 2))
+            if (x + 1, y + 1) in self.black_locations:
+                moves_list.append((x + 1, y + 1))
+            if (x - 1, y + 1) in self.black_locations:
+                moves_list.append((x - 1, y + 1))
+        else:
+            if (x, y - 1) not in occupied and y > 0:
+                moves_list.append((x, y - 1))
+                if (x, y - 2) not in occupied and y == 6:
+                    moves_list.append((x, y - 2))
+            if (x + 1, y - 1) in self.white_locations:
+                moves_list.append((x + 1, y - 1))
+            if (x - 1, y - 1) in self.white_locations:
+                moves_list.append((x - 1, y - 1))
+        return moves_list
+
+    def check_knight(self, position, color):
+        moves_list = []
+        enemies_list, friends_list = self._sides(color)
+        for dx, dy in KNIGHT_OFFSETS:
+            tx = position[0] + dx
+            ty = position[1] + dy
+            if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
+                moves_list.append((tx, ty))
+        return moves_list
+
+    def play(self, color, index, target):
+        """Move piece index of color to target, capturing as ChessGame did."""
+        if color == "white":
+            mine, theirs = self.white_locations, self.black_locations
+            their_pieces = self.black_pieces
+        else:
+            mine, theirs = self.black_locations, self.white_locations
+            their_pieces = self.white_pieces
+        mine[index] = target
+        if target in theirs:
+            victim = theirs.index(target)
+            their_pieces.pop(victim)
+            theirs.pop(victim)
+
+
+def list_perft(rules, color, depth):
+    """perft over ListRules, copying the lists at every node."""
+    if depth == 0:
+        return 1
+    pieces = rules.white_pieces if color == "white" else rules.black_pieces
+    if "king" not in pieces:
+        return 0
+    locations = rules.white_locations if color == "white" else rules.black_locations
+    all_moves = rules.check_options(pieces, locations, color)
+    if depth == 1:
+        return sum(len(moves) for moves in all_moves)
+    other = "black" if color == "white" else "white"
+    nodes = 0
+    for index, moves in enumerate(all_moves):
+        for target in moves:
+            child = ListRules(
+                rules.white_pieces,
+                rules.white_locations,
+                rules.black_pieces,
+                rules.black_locations,
+            )
+            child.play(color, index, target)
+            nodes += list_perft(child, other, depth - 1)
+    return nodes
+
+
+def random_playout_positions(games=50, plies=80, seed=0):
+    """Yield (white_pieces, white_locations, black_pieces, black_locations)
+    along random games played with ListRules."""
+    rng = random.Random(seed)
+    for _ in range(games):
+        rules = ListRules(START_PIECES, START_WHITE, START_PIECES, START_BLACK)
+        color = "white"
+        for _ in range(plies):
+            yield (
+                list(rules.white_pieces),
+                list(rules.white_locations),
+                list(rules.black_pieces),
+                list(rules.black_locations),
+            )
+            pieces = rules.white_pieces if color == "white" else rules.black_pieces
+            if "king" not in pieces:
+                break
+            locations = (
+                rules.white_locations if color == "white" else rules.black_locations
+            )
+            all_moves = rules.check_options(pieces, locations, color)
+            choices = [(i, t) for i, moves in enumerate(all_moves) for t in moves]
+            if not choices:
+                break
+            rules.play(color, *rng.choice(choices))
+            color = "black" if color == "white" else "white"
+
+
+def check_parity(games=200, perft_depth=3, seed=0):
+    """Compare the square generator with ListRules.
+
+    Every position along random playouts must give identical option
+    lists for both colours, and perft from the start must agree.
+    Returns the number of positions checked; raises AssertionError.
+    """
+    checked = 0
+    for wp, wl, bp, bl in random_playout_positions(games, seed=seed):
+        rules = ListRules(wp, wl, bp, bl)
+        squares = squares_from_lists(wp, wl, bp, bl)
+        assert options(squares, wl) == rules.check_options(wp, wl, "white"), wl
+        assert options(squares, bl) == rules.check_options(bp, bl, "black"), bl
+        checked += 1
+    rules = ListRules(START_PIECES, START_WHITE, START_PIECES, START_BLACK)
+    for depth in range(1, perft_depth + 1):
+        assert perft(Position(), depth) == list_perft(rules, "white", depth), depth
+    return checked
+
+
+def benchmark(games=40, seed=0):
+    """Option lists per second (both colours) for ListRules and the tables,
+    plus perft nodes per second for Position."""
+    positions = list(random_playout_positions(games, seed=seed))
+
+    start = time.perf_counter()
+    for wp, wl, bp, bl in positions:
+        rules = ListRules(wp, wl, bp, bl)
+        rules.check_options(wp, wl, "white")
+        rules.check_options(bp, bl, "black")
+    list_rate = len(positions) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for wp, wl, bp, bl in positions:
+        squares = squares_from_lists(wp, wl, bp, bl)
+        options(squares, wl)
+        options(squares, bl)
+    table_rate = len(positions) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    nodes = perft(Position(), 4)
+    perft_rate = nodes / (time.perf_counter() - start)
+    return list_rate, table_rate, perft_rate
+
+
+def check_incremental(games=200, plies=80, seed=0):
+    """Play random games on IncrementalOptions and compare the lists, the
+    squares and the slots with a full rebuild after every move.
+
+    Returns (moves, pieces regenerated per move); raises AssertionError.
+    """
+    rng = random.Random(seed)
+    moves = 0
+    regenerated = 0
+    for _ in range(games):
+        tracker = IncrementalOptions(
+            list(START_PIECES), list(START_WHITE), list(START_PIECES), list(START_BLACK)
+        )
+        colour = WHITE
+        for _ in range(plies):
+            if "king" not in tracker.pieces[colour]:
+                break
+            choices = [(i, t) for i, ts in enumerate(tracker.options[colour]) for t in ts]
+            if not choices:
+                break
+            before = tracker.regenerated
+            tracker.move(colour, *rng.choice(choices))
+            regenerated += tracker.regenerated - before
+            moves += 1
+
+            wp, wl = tracker.pieces[WHITE], tracker.locations[WHITE]
+            bp, bl = tracker.pieces[BLACK], tracker.locations[BLACK]
+            squares = squares_from_lists(wp, wl, bp, bl)
+            assert tracker.squares == squares
+            assert tracker.options[WHITE] == options(squares, wl), wl
+            assert tracker.options[BLACK] == options(squares, bl), bl
+            for locations in (wl, bl):
+                for i, loc in enumerate(locations):
+                    assert tracker.slot[square(loc)] == i, loc
+            colour ^= 8
+    return moves, regenerated / moves
+
+
+def check_legal(games=200, seed=0):
+    """Compare attack_map with attacked() on every square, and
+    legal_options with Position.legal_moves, for both colours along
+    random playouts. Returns the number of positions; raises
+    AssertionError.
+    """
+    checked = 0
+    for wp, wl, bp, bl in random_playout_positions(games, seed=seed):
+        squares = squares_from_lists(wp, wl, bp, bl)
+        for colour, locations in ((WHITE, wl), (BLACK, bl)):
+            mask = attack_map(squares, colour)
+            for sq in range(64):
+                assert bool(mask & BIT[sq]) == attacked(squares, sq, colour), sq
+            position = Position(squares, colour)
+            if position.kings[colour] is None:
+                continue
+            legal = legal_options(squares, locations, options(squares, locations), colour)
+            fast = sorted((square(loc), square(t)) for loc, ts in zip(locations, legal) for t in ts)
+            assert fast == sorted(position.legal_moves()), locations
+        checked += 1
+    return checked
+
+
+def benchmark_incremental(games=40, plies=80, seed=0):
+    """Microseconds per move to bring both sides' options up to date:
+    IncrementalOptions.move against rebuilding them as ChessGame did."""
+    rng = random.Random(seed)
+    games_moves = []
+    snapshots = []
+    for _ in range(games):
+        tracker = IncrementalOptions(
+            list(START_PIECES), list(START_WHITE), list(START_PIECES), list(START_BLACK)
+        )
+        colour = WHITE
+        played = []
+        for _ in range(plies):
+            if "king" not in tracker.pieces[colour]:
+                break
+            choices = [(i, t) for i, ts in enumerate(tracker.options[colour]) for t in ts]
+            if not choices:
+                break
+            move = rng.choice(choices)
+            played.append((colour, *move))
+            tracker.move(colour, *move)
+            snapshots.append(
+                tuple(list(tracker.pieces[c]) for c in (WHITE, BLACK))
+                + tuple(list(tracker.locations[c]) for c in (WHITE, BLACK))
+            )
+            colour ^= 8
+        games_moves.append(played)
+
+    start = time.perf_counter()
+    for played in games_moves:
+        tracker = IncrementalOptions(
+            list(START_PIECES), list(START_WHITE), list(START_PIECES), list(START_BLACK)
+        )
+        for colour, index, target in played:
+            tracker.move(colour, index, target)
+    incremental_us = (time.perf_counter() - start) / len(snapshots) * 1e6
+
+    start = time.perf_counter()
+    for wp, bp, wl, bl in snapshots:
+        squares = squares_from_lists(wp, wl, bp, bl)
+        options(squares, wl)
+        options(squares, bl)
+    full_us = (time.perf_counter() - start) / len(snapshots) * 1e6
+    return incremental_us, full_us
+
+
+if __name__ == "__main__":
+    if "--parity" in sys.argv:
+        print(f"parity ok over {check_parity()} positions")
+    elif "--legal" in sys.argv:
+        print(f"attack maps and legal moves ok over {check_legal()} positions")
+    elif "--incremental" in sys.argv:
+        moves, per_move = check_incremental()
+        print(f"incremental ok over {moves} moves, {per_move:.1f} pieces regenerated per move")
+        incremental_us, full_us = benchmark_incremental()
+        print(f"full rebuild: {full_us:7.1f} us/move")
+        print(f"incremental:  {incremental_us:7.1f} us/move")
+    else:
+        list_rate, table_rate, perft_rate = benchmark()
+        print(f"list scans:    {list_rate:10,.0f} positions/s (both sides' options)")
+        print(f"square tables: {table_rate:10,.0f} positions/s")
+        print(f"perft(4):      {perft_rate:10,.0f} nodes/s")
@@ -0,0 +1,359 @@
+import sys
+import time
+from collections import OrderedDict
+
+from chess_core import (
+    BISHOP,
+    KING,
+    KNIGHT,
+    PAWN,
+    QUEEN,
+    ROOK,
+    WHITE,
+    XY,
+    Position,
+    attacked,
+)
+
+VALUES = {PAWN: 100, KNIGHT: 320, BISHOP: 330, ROOK: 500, QUEEN: 900, KING: 20000}
+
+# A score within MATE_BOUND of MATE is a mate that many plies away
+MATE = 100000
+MATE_BOUND = MATE - 1000
+INFINITY = MATE + 1
+MAX_PLY = 64
+# Nodes between clock checks; chess nodes are slow enough that checking
+# every 256 overshot a frame's budget by a few milliseconds
+CLOCK_MASK = 63
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def _centre(sq):
+    """0 on the rim up to 3 on the four middle squares."""
+    x, y = XY[sq]
+    return 3 - int(max(abs(x - 3.5), abs(y - 3.5)))
+
+
+def _bonus(kind, sq, colour):
+    x, y = XY[sq]
+    advance = y if colour == WHITE else 7 - y
+    centre = _centre(sq)
+    if kind == PAWN:
+        return 5 * (advance - 1) + 3 * centre
+    if kind == KNIGHT:
+        return 10 * centre
+    if kind == BISHOP:
+        return 5 * centre
+    if kind == QUEEN:
+        return 2 * centre
+    if kind == KING:
+        return -10 * advance
+    return 0
+
+
+# Material plus square bonus for every piece value on every square, from
+# white's point of view
+PIECE_SQUARE = [[0] * 64 for _ in range(16)]
+for _kind, _value in VALUES.items():
+    for _colour, _sign in ((WHITE, 1), (8, -1)):
+        for _sq in range(64):
+            PIECE_SQUARE[_kind | _colour][_sq] = _sign * (_value + _bonus(_kind, _sq, _colour))
+
+
+def evaluate(position):
+    """Static score for the side to move."""
+    squares = position.squares
+    score = 0
+    for colour in (WHITE, 8):
+        for sq in position.pieces[colour]:
+            score += PIECE_SQUARE[squares[sq]][sq]
+    return score if position.turn == WHITE else -score
+
+
+def _to_tt(value, ply):
+    # King captures are stored relative to the node, not the root
+    if value >= MATE_BOUND:
+        return value + ply
+    if value <= -MATE_BOUND:
+        return value - ply
+    return value
+
+
+def _from_tt(value, ply):
+    if value >= MATE_BOUND:
+        return value - ply
+    if value <= -MATE_BOUND:
+        return value + ply
+    return value
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class AlphaBeta:
+    """Iterative-deepening alpha-beta for chess_core positions.
+
+    Moves are tried hash move first, then captures by MVV-LVA (most
+    valuable victim, least valuable attacker), then the two killer moves
+    of the ply, then the rest. Leaves go through a captures-only
+    quiescence search. Results are cached in a transposition table keyed
+    by Zobrist hash, holding at most tt_size entries with
+    least-recently-used eviction; an entry's bound only answers searches
+    that need no more depth than it was stored with, but its move still
+    orders the next search.
+
+    Inside the tree moves stay pseudo-legal: a node whose last move left
+    the king attacked is scored as lost for that mover, and a node with
+    only such moves is mate or stalemate. The root plays legal moves only.
+
+    search() is a generator so the game loop can run it a slice at a
+    time, like the 2048 Expectimax: run_slice() advances it until its
+    frame budget is spent and returns control to the render loop.
+    """
+
+    def __init__(self, tt_size=200000, max_depth=32):
+        self.tt = OrderedDict()
+        self.tt_size = tt_size
+        self.max_depth = max_depth
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self._slice_end = float("inf")
+        self._deadline = float("inf")
+        # Called as on_depth(depth, score, move) after each finished depth
+        self.on_depth = None
+        # Metrics for the last search
+        self.nodes = 0
+        self.tt_lookups = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.depth_reached = 0
+        self.score = 0
+        self.elapsed = 0.0
+
+    # ------ move ordering ------
+    def _ordered(self, position, moves, tt_move, ply):
+        squares = position.squares
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+
+        def priority(move):
+            if move == tt_move:
+                return 1000000
+            victim = squares[move[1]]
+            if victim:
+                return 100000 + 10 * (victim & 7) - (squares[move[0]] & 7)
+            if move == killers[0]:
+                return 90000
+            if move == killers[1]:
+                return 80000
+            return 0
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _add_killer(self, move, ply):
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+    # ------ tree ------
+    def _tick(self):
+        now = time.perf_counter()
+        if now >= self._deadline:
+            raise _OutOfTime
+        return now >= self._slice_end
+
+    def _exposed(self, position):
+        """Whether the last move left its own king attacked (so was illegal)."""
+        king = position.kings[position.turn ^ 8]
+        return king is None or attacked(position.squares, king, position.turn)
+
+    def _negamax(self, position, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & CLOCK_MASK and self._tick():
+            yield
+        if self._exposed(position):
+            return MATE - ply
+        if depth <= 0:
+            return (yield from self._quiesce(position, alpha, beta, ply))
+
+        key = position.hash
+        self.tt_lookups += 1
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            self.tt_hits += 1
+            self.tt.move_to_end(key)
+            entry_depth, flag, value, tt_move = entry
+            if entry_depth >= depth:
+                value = _from_tt(value, ply)
+                if (
+                    flag == EXACT
+                    or (flag == LOWER and value >= beta)
+                    or (flag == UPPER and value <= alpha)
+                ):
+                    self.tt_cutoffs += 1
+                    return value
+
+        moves = self._ordered(position, position.moves(), tt_move, ply)
+        alpha_start = alpha
+        best = -INFINITY
+        best_move = None
+        for move in moves:
+            captured = position.make(move)
+            value = -(yield from self._negamax(position, depth - 1, -beta, -alpha, ply + 1))
+            position.unmake(move, captured)
+            if value > best:
+                best = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        if not captured:
+                            self._add_killer(move, ply)
+                        break
+        # Every move was illegal: checkmate, or stalemate out of check
+        if best <= -MATE + ply + 1:
+            best = -MATE + ply if position.in_check() else 0
+
+        if best <= alpha_start:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[key] = (depth, flag, _to_tt(best, ply), best_move)
+        self.tt.move_to_end(key)
+        if len(self.tt) > self.tt_size:
+            self.tt.popitem(last=False)
+        return best
+
+    def _quiesce(self, position, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & CLOCK_MASK and self._tick():
+            yield
+        if self._exposed(position):
+            return MATE - ply
+        stand = evaluate(position)
+        if stand >= beta:
+            return stand
+        if stand > alpha:
+            alpha = stand
+        squares = position.squares
+        captures = [move for move in position.moves() if squares[move[1]]]
+        for move in self._ordered(position, captures, None, MAX_PLY):
+            captured = position.make(move)
+            value = -(yield from self._quiesce(position, -beta, -alpha, ply + 1))
+            position.unmake(move, captured)
+            if value >= beta:
+                return value
+            if value > alpha:
+                alpha = value
+        return alpha
+
+    # ------ driving ------
+    def search(self, position, time_limit=1.0):
+        """Generator: iterative deepening; returns the best (from, to) move.
+
+        Searches a copy, so position is left alone. Returns None when the
+        side to move has no moves. The deepest fully searched depth wins;
+        a depth cut off by time_limit is discarded.
+        """
+        start = time.perf_counter()
+        self._deadline = start + time_limit
+        self.nodes = 0
+        self.tt_lookups = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.depth_reached = 0
+        self.score = 0
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        position = Position(position.squares, position.turn)
+        moves = position.legal_moves()
+        if not moves:
+            self.elapsed = time.perf_counter() - start
+            return None
+        best = self._ordered(position, moves, None, 0)[0]
+        try:
+            for depth in range(1, self.max_depth + 1):
+                alpha = -INFINITY
+                depth_best = None
+                for move in self._ordered(position, moves, best, 0):
+                    captured = position.make(move)
+                    value = -(
+                        yield from self._negamax(position, depth - 1, -INFINITY, -alpha, 1)
+                    )
+                    position.unmake(move, captured)
+                    if value > alpha:
+                        alpha = value
+                        depth_best = move
+                if depth_best is not None:
+                    best = depth_best
+                    self.score = alpha
+                self.depth_reached = depth
+                if self.on_depth is not None:
+                    self.on_depth(depth, self.score, best)
+                # A forced mate won't get any closer
+                if abs(alpha) >= MATE_BOUND:
+                    break
+        except _OutOfTime:
+            pass
+        self.elapsed = time.perf_counter() - start
+        return best
+
+    def run_slice(self, search, budget):
+        """Advance a search() for about budget seconds.
+
+        Returns (done, move); move is only meaningful once done.
+        """
+        self._slice_end = time.perf_counter() + budget
+        try:
+            next(search)
+        except StopIteration as finished:
+            return True, finished.value
+        return False, None
+
+    def stop(self):
+        """End the running search at its next clock check (any thread)."""
+        self._deadline = 0.0
+
+    def best_move(self, position, time_limit=1.0):
+        """Run a whole search without yielding (for headless tools)."""
+        search = self.search(position, time_limit)
+        while True:
+            done, move = self.run_slice(search, float("inf"))
+            if done:
+                return move
+
+    def stats(self):
+        return {
+            "depth_reached": self.depth_reached,
+            "score": self.score,
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes / self.elapsed if self.elapsed else 0.0,
+            "tt_hit_rate": self.tt_hits / self.tt_lookups if self.tt_lookups else 0.0,
+            "tt_cutoffs": self.tt_cutoffs,
+            "tt_entries": len(self.tt),
+        }
+
+
+if __name__ == "__main__":
+    # Self-play from the start, printing the search stats of every move
+    plies = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    time_limit = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    engine = AlphaBeta()
+    position = Position()
+    for ply in range(plies):
+        move = engine.best_move(position, time_limit)
+        if move is None:
+            break
+        stats = engine.stats()
+        print(
+            f"{ply + 1:3d} {XY[move[0]]}->{XY[move[1]]}  depth {stats['depth_reached']}"
+            f"  score {stats['score']:6d}  {stats['nodes_per_second']:8,.0f} nodes/s"
+            f"  tt hits {stats['tt_hit_rate']:.0%} ({stats['tt_entries']} entries)"
+        )
+        position.make(move)
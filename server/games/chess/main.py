@@ -1,6 +1,12 @@
 import pygame
 import asyncio
 
+import chess_core
+from chess_core import COLOURS, XY, square
+from book import Book
+from chess_engine import AlphaBeta
+from sprites import SpriteAtlas
+
 
 class ChessGame:
     def __init__(self):
@@ -125,111 +131,101 @@ class ChessGame:
         self.winner = ""
         self.game_over = False
 
+        # Single-player mode (E toggles it): the engine plays black, a
+        # slice of its search per frame. It's built on first use, and
+        # plays from the opening book while the position is in it.
+        self.engine = None
+        self.book = None
+        self.engine_plays = False
+        self.search = None
+        self.think_time = 1.0
+        self.engine_info = ""
+
         # Load images
         self.load_images()
 
-        # Pre-compute piece move options
-        self.black_options = self.check_options(
-            self.black_pieces, self.black_locations, "black"
-        )
-        self.white_options = self.check_options(
-            self.white_pieces, self.white_locations, "white"
-        )
-
-    def load_images(self):
-        """Load and scale piece images for both sides."""
-        # Use the same filenames as your original code, but scale them.
-        # We'll define a helper to load & scale each piece:
-
-        def load_and_scale(path, w, h):
-            img = pygame.image.load(path).convert_alpha()
-            # Scale w×h by self.SCALE
-            scaled_w = int(w * self.SCALE)
-            scaled_h = int(h * self.SCALE)
-            return pygame.transform.scale(img, (scaled_w, scaled_h))
-
-        # black queen: originally (80, 80)
-        self.black_queen = load_and_scale("assets/images/black queen.png", 80, 80)
-        self.black_queen_small = load_and_scale("assets/images/black queen.png", 45, 45)
-
-        self.black_king = load_and_scale("assets/images/black king.png", 80, 80)
-        self.black_king_small = load_and_scale("assets/images/black king.png", 45, 45)
-
-        self.black_rook = load_and_scale("assets/images/black rook.png", 80, 80)
-        self.black_rook_small = load_and_scale("assets/images/black rook.png", 45, 45)
-
-        self.black_bishop = load_and_scale("assets/images/black bishop.png", 80, 80)
-        self.black_bishop_small = load_and_scale(
-            "assets/images/black bishop.png", 45, 45
+        # Pre-rendered layers. The empty board is drawn once per SCALE;
+        # self.layer is a copy with the pieces and captured icons on it,
+        # redrawn only on the squares a move touches and after captures.
+        # The status line is rendered again only when turn_step changes.
+        self.board_layers = {}
+        self.layer = None
+        self.layer_scale = None
+        self.dirty = set(XY)
+        self.captured_counts = None
+        self.status_step = None
+        self.status_surface = None
+        self.engine_text = ("", None)
+
+        # Pre-compute piece move options; moves keep them up to date
+        self.track_options()
+
+    def track_options(self):
+        """Build the options once; IncrementalOptions updates them per move.
+
+        white_options, black_options and squares are the tracker's own
+        lists, so they stay current without being reassigned.
+        """
+        self.tracker = chess_core.IncrementalOptions(
+            self.white_pieces,
+            self.white_locations,
+            self.black_pieces,
+            self.black_locations,
         )
-
-        self.black_knight = load_and_scale("assets/images/black knight.png", 80, 80)
-        self.black_knight_small = load_and_scale(
-            "assets/images/black knight.png", 45, 45
+        self.squares = self.tracker.squares
+        self.white_options = self.tracker.options[chess_core.WHITE]
+        self.black_options = self.tracker.options[chess_core.BLACK]
+        self.update_status()
+
+    def update_status(self):
+        """Attack maps, legal moves and check for the side to move.
+
+        Runs once per move; drawing each frame only reads what it caches.
+        A side left without a legal move is checkmated, or stalemated if
+        its king isn't attacked.
+        """
+        white, black = chess_core.WHITE, chess_core.BLACK
+        colour = white if self.turn_step < 2 else black
+        self.attack_maps = {
+            white: chess_core.attack_map(self.squares, white),
+            black: chess_core.attack_map(self.squares, black),
+        }
+        if colour == white:
+            locations, options = self.white_locations, self.white_options
+        else:
+            locations, options = self.black_locations, self.black_options
+        self.legal_options = chess_core.legal_options(
+            self.squares, locations, options, colour
         )
 
-        self.black_pawn = load_and_scale("assets/images/black pawn.png", 65, 65)
-        self.black_pawn_small = load_and_scale("assets/images/black pawn.png", 45, 45)
-
-        # white versions
-        self.white_queen = load_and_scale("assets/images/white queen.png", 80, 80)
-        self.white_queen_small = load_and_scale("assets/images/white queen.png", 45, 45)
-
-        self.white_king = load_and_scale("assets/images/white king.png", 80, 80)
-        self.white_king_small = load_and_scale("assets/images/white king.png", 45, 45)
-
-        self.white_rook = load_and_scale("assets/images/white rook.png", 80, 80)
-        self.white_rook_small = load_and_scale("assets/images/white rook.png", 45, 45)
-
-        self.white_bishop = load_and_scale("assets/images/white bishop.png", 80, 80)
-        self.white_bishop_small = load_and_scale(
-            "assets/images/white bishop.png", 45, 45
-        )
+        self.check_square = None
+        king = chess_core.KING | colour
+        if king not in self.squares:
+            return
+        king_square = self.squares.index(king)
+        if self.attack_maps[colour ^ 8] & chess_core.BIT[king_square]:
+            self.check_square = XY[king_square]
+        if not any(self.legal_options):
+            if self.check_square is None:
+                self.winner = "draw"
+            else:
+                self.winner = "black" if colour == white else "white"
 
-        self.white_knight = load_and_scale("assets/images/white knight.png", 80, 80)
-        self.white_knight_small = load_and_scale(
-            "assets/images/white knight.png", 45, 45
+    def load_images(self):
+        """Decode each piece image once; sizes are scaled from the atlas.
+
+        piece_images and small_images are indexed by chess_core piece value
+        (kind | colour): pawns are drawn at 65, other pieces at 80 and
+        captured pieces at 45, all scaled by self.SCALE.
+        """
+        self.atlas = SpriteAtlas(master_size=int(80 * self.SCALE))
+        board_sizes = {kind: int(80 * self.SCALE) for kind in chess_core.NAMES}
+        board_sizes[chess_core.PAWN] = int(65 * self.SCALE)
+        self.piece_images = self.atlas.table(board_sizes)
+        self.small_images = self.atlas.table(
+            {kind: int(45 * self.SCALE) for kind in chess_core.NAMES}
         )
 
-        self.white_pawn = load_and_scale("assets/images/white pawn.png", 65, 65)
-        self.white_pawn_small = load_and_scale("assets/images/white pawn.png", 45, 45)
-
-        self.white_images = [
-            self.white_pawn,
-            self.white_queen,
-            self.white_king,
-            self.white_knight,
-            self.white_rook,
-            self.white_bishop,
-        ]
-        self.small_white_images = [
-            self.white_pawn_small,
-            self.white_queen_small,
-            self.white_king_small,
-            self.white_knight_small,
-            self.white_rook_small,
-            self.white_bishop_small,
-        ]
-        self.black_images = [
-            self.black_pawn,
-            self.black_queen,
-            self.black_king,
-            self.black_knight,
-            self.black_rook,
-            self.black_bishop,
-        ]
-        self.small_black_images = [
-            self.black_pawn_small,
-            self.black_queen_small,
-            self.black_king_small,
-            self.black_knight_small,
-            self.black_rook_small,
-            self.black_bishop_small,
-        ]
-
-        # Must match this order in piece_list:
-        self.piece_list = ["pawn", "queen", "king", "knight", "rook", "bishop"]
-
     def new_game(self):
         """Reset everything for a new game."""
         self.game_over = False
@@ -311,16 +307,17 @@ class ChessGame:
         self.turn_step = 0
         self.selection = 100
         self.valid_moves = []
+        self.search = None
+        self.engine_info = ""
+        self.dirty = set(XY)
+        self.captured_counts = None
 
-        self.black_options = self.check_options(
-            self.black_pieces, self.black_locations, "black"
-        )
-        self.white_options = self.check_options(
-            self.white_pieces, self.white_locations, "white"
-        )
+        self.track_options()
 
-    def draw_board(self):
-        """Draw scaled board & lines."""
+    def render_board(self):
+        """The static board: squares, bars, grid lines and FORFEIT."""
+        layer = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT)).convert()
+        layer.fill("dark gray")
         # We have 8 rows of squares (0..7). But your code drew 32 squares in a pattern.
         # We'll replicate that logic, but scaled by self.SQUARE_SIZE.
 
@@ -336,14 +333,14 @@ class ChessGame:
             top_y = row * self.SQUARE_SIZE
 
             pygame.draw.rect(
-                self.screen,
+                layer,
                 "light gray",
                 [left_x, top_y, self.SQUARE_SIZE, self.SQUARE_SIZE],
             )
 
         # Bottom bar
         pygame.draw.rect(
-            self.screen,
+            layer,
             "gray",
             [
                 0,
@@ -353,7 +350,7 @@ class ChessGame:
             ],
         )
         pygame.draw.rect(
-            self.screen,
+            layer,
             "gold",
             [
                 0,
@@ -366,7 +363,7 @@ class ChessGame:
 
         # Right bar
         pygame.draw.rect(
-            self.screen,
+            layer,
             "gold",
             [
                 int(8 * self.SQUARE_SIZE),
@@ -377,22 +374,11 @@ class ChessGame:
             5,
         )
 
-        status_text = [
-            "White: Select a Piece to Move!",
-            "White: Select a Destination!",
-            "Black: Select a Piece to Move!",
-            "Black: Select a Destination!",
-        ]
-        self.screen.blit(
-            self.big_font.render(status_text[self.turn_step], True, "black"),
-            (int(20 * self.SCALE), int(820 * self.SCALE)),
-        )
-
         # Lines across the board
         for i in range(9):
             # horizontal lines
             pygame.draw.line(
-                self.screen,
+                layer,
                 "black",
                 (0, i * self.SQUARE_SIZE),
                 (8 * self.SQUARE_SIZE, i * self.SQUARE_SIZE),
@@ -400,7 +386,7 @@ class ChessGame:
             )
             # vertical lines
             pygame.draw.line(
-                self.screen,
+                layer,
                 "black",
                 (i * self.SQUARE_SIZE, 0),
                 (i * self.SQUARE_SIZE, 8 * self.SQUARE_SIZE),
@@ -408,150 +394,144 @@ class ChessGame:
             )
 
         # "FORFEIT" text (like button) at scaled location
-        self.screen.blit(
+        layer.blit(
             self.medium_font.render("FORFEIT", True, "black"),
             (int(810 * self.SCALE), int(830 * self.SCALE)),
         )
+        return layer
+
+    def prepare_layer(self):
+        """Start self.layer from the board for this SCALE when it changes."""
+        if self.layer_scale == self.SCALE:
+            return
+        board = self.board_layers.get(self.SCALE)
+        if board is None:
+            board = self.board_layers[self.SCALE] = self.render_board()
+        self.layer = board.copy()
+        self.layer_scale = self.SCALE
+        self.dirty = set(XY)
+        self.captured_counts = None
+
+    def draw_board(self):
+        """Blit the layer (board, pieces, captures) and the status line."""
+        self.screen.blit(self.layer, (0, 0))
+
+        if self.status_step != self.turn_step:
+            status_text = [
+                "White: Select a Piece to Move!",
+                "White: Select a Destination!",
+                "Black: Select a Piece to Move!",
+                "Black: Select a Destination!",
+            ]
+            self.status_surface = self.big_font.render(
+                status_text[self.turn_step], True, "black"
+            )
+            self.status_step = self.turn_step
+        self.screen.blit(
+            self.status_surface, (int(20 * self.SCALE), int(820 * self.SCALE))
+        )
+
+    def draw_piece(self, surface, piece, loc):
+        """Draw one piece (a chess_core piece value) on its square."""
+        # If it's a pawn, offset is different
+        if piece & 7 == chess_core.PAWN:
+            # e.g. was loc[0]*100 + 22 => loc[0]*self.SQUARE_SIZE + int(22*self.SCALE)
+            x_offset = int(22 * self.SCALE)
+            y_offset = int(30 * self.SCALE)
+        else:
+            x_offset = int(10 * self.SCALE)
+            y_offset = int(10 * self.SCALE)
+        surface.blit(
+            self.piece_images[piece],
+            (
+                loc[0] * self.SQUARE_SIZE + x_offset,
+                loc[1] * self.SQUARE_SIZE + y_offset,
+            ),
+        )
 
     def draw_pieces(self):
-        """Draw all white & black pieces with scaled positions."""
-        for i, piece_type in enumerate(self.white_pieces):
-            loc = self.white_locations[i]
-            index = self.piece_list.index(piece_type)
-
-            # If it's a pawn, offset is different
-            if piece_type == "pawn":
-                # e.g. was loc[0]*100 + 22 => loc[0]*self.SQUARE_SIZE + int(22*self.SCALE)
-                x_offset = int(22 * self.SCALE)
-                y_offset = int(30 * self.SCALE)
-                self.screen.blit(
-                    self.white_pawn,
-                    (
-                        loc[0] * self.SQUARE_SIZE + x_offset,
-                        loc[1] * self.SQUARE_SIZE + y_offset,
-                    ),
-                )
-            else:
-                x_offset = int(10 * self.SCALE)
-                y_offset = int(10 * self.SCALE)
-                self.screen.blit(
-                    self.white_images[index],
-                    (
-                        loc[0] * self.SQUARE_SIZE + x_offset,
-                        loc[1] * self.SQUARE_SIZE + y_offset,
-                    ),
-                )
-
-            # highlight
-            if self.turn_step < 2 and self.selection == i:
-                pygame.draw.rect(
-                    self.screen,
-                    "red",
-                    [
-                        loc[0] * self.SQUARE_SIZE + 1,
-                        loc[1] * self.SQUARE_SIZE + 1,
-                        self.SQUARE_SIZE,
-                        self.SQUARE_SIZE,
-                    ],
-                    2,
-                )
-
-        for i, piece_type in enumerate(self.black_pieces):
-            loc = self.black_locations[i]
-            index = self.piece_list.index(piece_type)
-
-            if piece_type == "pawn":
-                x_offset = int(22 * self.SCALE)
-                y_offset = int(30 * self.SCALE)
-                self.screen.blit(
-                    self.black_pawn,
-                    (
-                        loc[0] * self.SQUARE_SIZE + x_offset,
-                        loc[1] * self.SQUARE_SIZE + y_offset,
-                    ),
-                )
-            else:
-                x_offset = int(10 * self.SCALE)
-                y_offset = int(10 * self.SCALE)
-                self.screen.blit(
-                    self.black_images[index],
-                    (
-                        loc[0] * self.SQUARE_SIZE + x_offset,
-                        loc[1] * self.SQUARE_SIZE + y_offset,
-                    ),
-                )
-
-            # highlight
-            if self.turn_step >= 2 and self.selection == i:
-                pygame.draw.rect(
-                    self.screen,
-                    "blue",
-                    [
-                        loc[0] * self.SQUARE_SIZE + 1,
-                        loc[1] * self.SQUARE_SIZE + 1,
-                        self.SQUARE_SIZE,
-                        self.SQUARE_SIZE,
-                    ],
-                    2,
-                )
+        """Redraw the dirty squares on the layer: board first, then piece."""
+        board = self.board_layers[self.SCALE]
+        for loc in self.dirty:
+            rect = pygame.Rect(
+                loc[0] * self.SQUARE_SIZE,
+                loc[1] * self.SQUARE_SIZE,
+                self.SQUARE_SIZE,
+                self.SQUARE_SIZE,
+            )
+            self.layer.blit(board, rect, rect)
+            piece = self.squares[square(loc)]
+            if piece:
+                self.draw_piece(self.layer, piece, loc)
+        self.dirty.clear()
+
+    def draw_selection(self):
+        """Outline the selected piece."""
+        if self.selection == 100:
+            return
+        if self.turn_step < 2:
+            loc, color = self.white_locations[self.selection], "red"
+        else:
+            loc, color = self.black_locations[self.selection], "blue"
+        pygame.draw.rect(
+            self.screen,
+            color,
+            [
+                loc[0] * self.SQUARE_SIZE + 1,
+                loc[1] * self.SQUARE_SIZE + 1,
+                self.SQUARE_SIZE,
+                self.SQUARE_SIZE,
+            ],
+            2,
+        )
 
     def draw_captured(self):
-        """Draw small icons for captured pieces at the right side."""
-        # White’s captures (i.e. black pieces captured by white)
-        for i, captured_piece in enumerate(self.captured_pieces_white):
-            index = self.piece_list.index(captured_piece)
-            # e.g. (825, 5 + 50*i) => scale them
-            x = int(825 * self.SCALE)
-            y = int(5 * self.SCALE) + int(50 * self.SCALE) * i
-            self.screen.blit(self.small_black_images[index], (x, y))
-
-        # Black’s captures (i.e. white pieces captured by black)
-        for i, captured_piece in enumerate(self.captured_pieces_black):
-            index = self.piece_list.index(captured_piece)
-            x = int(925 * self.SCALE)
-            y = int(5 * self.SCALE) + int(50 * self.SCALE) * i
-            self.screen.blit(self.small_white_images[index], (x, y))
+        """Draw small icons for captured pieces at the right side.
+
+        They go on the layer, which is only redone after a capture.
+        """
+        counts = (len(self.captured_pieces_white), len(self.captured_pieces_black))
+        if counts != self.captured_counts:
+            board = self.board_layers[self.SCALE]
+            panel = pygame.Rect(
+                int(8 * self.SQUARE_SIZE),
+                0,
+                self.SCREEN_WIDTH - int(8 * self.SQUARE_SIZE),
+                self.SCREEN_HEIGHT,
+            )
+            self.layer.blit(board, panel, panel)
+            # White’s captures (i.e. black pieces captured by white)
+            for i, captured_piece in enumerate(self.captured_pieces_white):
+                piece = chess_core.KINDS[captured_piece] | chess_core.BLACK
+                # e.g. (825, 5 + 50*i) => scale them
+                x = int(825 * self.SCALE)
+                y = int(5 * self.SCALE) + int(50 * self.SCALE) * i
+                self.layer.blit(self.small_images[piece], (x, y))
+
+            # Black’s captures (i.e. white pieces captured by black)
+            for i, captured_piece in enumerate(self.captured_pieces_black):
+                piece = chess_core.KINDS[captured_piece] | chess_core.WHITE
+                x = int(925 * self.SCALE)
+                y = int(5 * self.SCALE) + int(50 * self.SCALE) * i
+                self.layer.blit(self.small_images[piece], (x, y))
+            self.captured_counts = counts
 
     def draw_check(self):
         """Flash the king's square if in check."""
-        if self.turn_step < 2:
-            # white's turn
-            if "king" in self.white_pieces:
-                king_idx = self.white_pieces.index("king")
-                king_loc = self.white_locations[king_idx]
-                for moves in self.black_options:
-                    if king_loc in moves:
-                        if self.counter < 15:  # flash half the time
-                            pygame.draw.rect(
-                                self.screen,
-                                "dark red",
-                                [
-                                    king_loc[0] * self.SQUARE_SIZE + 1,
-                                    king_loc[1] * self.SQUARE_SIZE + 1,
-                                    self.SQUARE_SIZE,
-                                    self.SQUARE_SIZE,
-                                ],
-                                5,
-                            )
-        else:
-            # black's turn
-            if "king" in self.black_pieces:
-                king_idx = self.black_pieces.index("king")
-                king_loc = self.black_locations[king_idx]
-                for moves in self.white_options:
-                    if king_loc in moves:
-                        if self.counter < 15:
-                            pygame.draw.rect(
-                                self.screen,
-                                "dark blue",
-                                [
-                                    king_loc[0] * self.SQUARE_SIZE + 1,
-                                    king_loc[1] * self.SQUARE_SIZE + 1,
-                                    self.SQUARE_SIZE,
-                                    self.SQUARE_SIZE,
-                                ],
-                                5,
-                            )
+        if self.check_square is None or self.counter >= 15:  # flash half the time
+            return
+        color = "dark red" if self.turn_step < 2 else "dark blue"
+        pygame.draw.rect(
+            self.screen,
+            color,
+            [
+                self.check_square[0] * self.SQUARE_SIZE + 1,
+                self.check_square[1] * self.SQUARE_SIZE + 1,
+                self.SQUARE_SIZE,
+                self.SQUARE_SIZE,
+            ],
+            5,
+        )
 
     def draw_valid(self, moves):
         """Draw small circles for valid moves."""
@@ -569,8 +549,12 @@ class ChessGame:
         rect_h = int(70 * self.SCALE)
 
         pygame.draw.rect(self.screen, "black", [rect_x, rect_y, rect_w, rect_h])
+        if self.winner == "draw":
+            message = "Stalemate: the game is drawn!"
+        else:
+            message = f"{self.winner} won the game!"
         self.screen.blit(
-            self.font.render(f"{self.winner} won the game!", True, "white"),
+            self.font.render(message, True, "white"),
             (rect_x + int(10 * self.SCALE), rect_y + int(10 * self.SCALE)),
         )
         self.screen.blit(
@@ -578,171 +562,88 @@ class ChessGame:
             (rect_x + int(10 * self.SCALE), rect_y + int(40 * self.SCALE)),
         )
 
+    def draw_engine_info(self):
+        if not self.engine_plays:
+            return
+        text = self.engine_info or "Engine plays black"
+        if self.engine_text[0] != text:
+            self.engine_text = (text, self.font.render(text, True, "black"))
+        self.screen.blit(
+            self.engine_text[1], (int(20 * self.SCALE), int(875 * self.SCALE))
+        )
+
+    def start_search(self):
+        if self.engine is None:
+            self.engine = AlphaBeta()
+            try:
+                self.book = Book()
+            except OSError:
+                self.book = None
+        position = chess_core.Position(self.squares, chess_core.BLACK)
+        move = self.book.choose(position) if self.book is not None else None
+        if move is not None:
+            self.engine_info = "Engine: book move"
+            frm, to = move
+            self.play_move(chess_core.BLACK, self.tracker.slot[frm], XY[to])
+            return
+        self.search = self.engine.search(position, self.think_time)
+        self.engine_info = "Engine thinking..."
+
+    def step_search(self):
+        """Give the engine half a frame, then get back to drawing."""
+        done, move = self.engine.run_slice(self.search, 0.5 / self.speed)
+        if not done:
+            return
+        self.search = None
+        stats = self.engine.stats()
+        self.engine_info = (
+            f"Engine: depth {stats['depth_reached']}, "
+            f"{stats['nodes_per_second'] / 1000:.0f}k nodes/s, "
+            f"TT hits {stats['tt_hit_rate']:.0%} of {stats['tt_entries']} entries"
+        )
+        if move is None:
+            return
+        frm, to = move
+        self.play_move(chess_core.BLACK, self.tracker.slot[frm], XY[to])
+
     def check_valid_moves(self):
-        """Check valid moves for the currently selected piece only."""
-        if self.turn_step < 2:
-            return self.white_options[self.selection]
-        else:
-            return self.black_options[self.selection]
+        """Legal moves for the currently selected piece only."""
+        return self.legal_options[self.selection]
 
     # ------ Piece-based logic ------
+    # Moves come from chess_core's square tables. self.squares is the
+    # tracker's 64-square board; check_options rebuilds a side's options
+    # from scratch, which play itself no longer needs.
     def check_options(self, pieces, locations, turn_color):
-        all_moves = []
-        for i, piece in enumerate(pieces):
-            loc = locations[i]
-            if piece == "pawn":
-                moves = self.check_pawn(loc, turn_color)
-            elif piece == "rook":
-                moves = self.check_rook(loc, turn_color)
-            elif piece == "knight":
-                moves = self.check_knight(loc, turn_color)
-            elif piece == "bishop":
-                moves = self.check_bishop(loc, turn_color)
-            elif piece == "queen":
-                moves = self.check_queen(loc, turn_color)
-            elif piece == "king":
-                moves = self.check_king(loc, turn_color)
-            else:
-                moves = []
-            all_moves.append(moves)
-        return all_moves
+        squares = chess_core.squares_from_lists(
+            self.white_pieces,
+            self.white_locations,
+            self.black_pieces,
+            self.black_locations,
+        )
+        return chess_core.options(squares, locations)
 
-    def check_king(self, position, color):
-        moves_list = []
-        if color == "white":
-            enemies_list = self.black_locations
-            friends_list = self.white_locations
-        else:
-            enemies_list = self.white_locations
-            friends_list = self.black_locations
+    def _check_piece(self, generator, position, color):
+        targets = generator(self.squares, square(position), COLOURS[color])
+        return [XY[t] for t in targets]
 
-        offsets = [(1, 0), (1, 1), (1, -1), (-1, 0), (-1, 1), (-1, -1), (0, 1), (0, -1)]
-        for dx, dy in offsets:
-            tx, ty = position[0] + dx, position[1] + dy
-            if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
-                moves_list.append((tx, ty))
-        return moves_list
+    def check_king(self, position, color):
+        return self._check_piece(chess_core.king_targets, position, color)
 
     def check_queen(self, pos, color):
-        return self.check_bishop(pos, color) + self.check_rook(pos, color)
+        return self._check_piece(chess_core.queen_targets, pos, color)
 
     def check_bishop(self, position, color):
-        moves_list = []
-        if color == "white":
-            enemies_list = self.black_locations
-            friends_list = self.white_locations
-        else:
-            enemies_list = self.white_locations
-            friends_list = self.black_locations
-
-        directions = [(1, -1), (-1, -1), (1, 1), (-1, 1)]
-        for dx, dy in directions:
-            chain = 1
-            path_open = True
-            while path_open:
-                tx = position[0] + chain * dx
-                ty = position[1] + chain * dy
-                if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
-                    moves_list.append((tx, ty))
-                    if (tx, ty) in enemies_list:
-                        path_open = False
-                    chain += 1
-                else:
-                    path_open = False
-        return moves_list
+        return self._check_piece(chess_core.bishop_targets, position, color)
 
     def check_rook(self, position, color):
-        moves_list = []
-        if color == "white":
-            enemies_list = self.black_locations
-            friends_list = self.white_locations
-        else:
-            enemies_list = self.white_locations
-            friends_list = self.black_locations
-
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        for dx, dy in directions:
-            chain = 1
-            path_open = True
-            while path_open:
-                tx = position[0] + chain * dx
-                ty = position[1] + chain * dy
-                if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
-                    moves_list.append((tx, ty))
-                    if (tx, ty) in enemies_list:
-                        path_open = False
-                    chain += 1
-                else:
-                    path_open = False
-        return moves_list
+        return self._check_piece(chess_core.rook_targets, position, color)
 
     def check_pawn(self, position, color):
-        moves_list = []
-        if color == "white":
-            # forward
-            if (
-                (position[0], position[1] + 1) not in self.white_locations
-                and (position[0], position[1] + 1) not in self.black_locations
-                and position[1] < 7
-            ):
-                moves_list.append((position[0], position[1] + 1))
-            if (
-                (position[0], position[1] + 2) not in self.white_locations
-                and (position[0], position[1] + 2) not in self.black_locations
-                and position[1] == 1
-            ):
-                moves_list.append((position[0], position[1] + 2))
-            # captures
-            if (position[0] + 1, position[1] + 1) in self.black_locations:
-                moves_list.append((position[0] + 1, position[1] + 1))
-            if (position[0] - 1, position[1] + 1) in self.black_locations:
-                moves_list.append((position[0] - 1, position[1] + 1))
-        else:
-            # forward
-            if (
-                (position[0], position[1] - 1) not in self.white_locations
-                and (position[0], position[1] - 1) not in self.black_locations
-                and position[1] > 0
-            ):
-                moves_list.append((position[0], position[1] - 1))
-            if (
-                (position[0], position[1] - 2) not in self.white_locations
-                and (position[0], position[1] - 2) not in self.black_locations
-                and position[1] == 6
-            ):
-                moves_list.append((position[0], position[1] - 2))
-            # captures
-            if (position[0] + 1, position[1] - 1) in self.white_locations:
-                moves_list.append((position[0] + 1, position[1] - 1))
-            if (position[0] - 1, position[1] - 1) in self.white_locations:
-                moves_list.append((position[0] - 1, position[1] - 1))
-        return moves_list
+        return self._check_piece(chess_core.pawn_targets, position, color)
 
     def check_knight(self, position, color):
-        moves_list = []
-        if color == "white":
-            enemies_list = self.black_locations
-            friends_list = self.white_locations
-        else:
-            enemies_list = self.white_locations
-            friends_list = self.black_locations
-
-        offsets = [
-            (1, 2),
-            (1, -2),
-            (2, 1),
-            (2, -1),
-            (-1, 2),
-            (-1, -2),
-            (-2, 1),
-            (-2, -1),
-        ]
-        for dx, dy in offsets:
-            tx = position[0] + dx
-            ty = position[1] + dy
-            if (tx, ty) not in friends_list and 0 <= tx <= 7 and 0 <= ty <= 7:
-                moves_list.append((tx, ty))
-        return moves_list
+        return self._check_piece(chess_core.knight_targets, position, color)
 
     # ---------- MAIN LOOP ----------
     async def run(self):
@@ -753,11 +654,13 @@ class ChessGame:
             # Flash logic
             self.counter = (self.counter + 1) % 30
 
-            self.screen.fill("dark gray")
-            self.draw_board()
+            self.prepare_layer()
             self.draw_pieces()
             self.draw_captured()
+            self.draw_board()
+            self.draw_selection()
             self.draw_check()
+            self.draw_engine_info()
 
             if self.selection != 100:
                 self.valid_moves = self.check_valid_moves()
@@ -773,6 +676,18 @@ class ChessGame:
                     and not self.game_over
                 ):
                     self.handle_mouse_click(event)
+                elif event.type == pygame.KEYUP and event.key == pygame.K_e:
+                    self.engine_plays = not self.engine_plays
+                    self.search = None
+                    self.engine_info = ""
+
+            # Let the engine think within this frame's budget
+            if self.engine_plays and self.turn_step >= 2 and self.winner == "":
+                if self.search is None:
+                    self.start_search()
+                # A book move is played without a search
+                if self.search is not None:
+                    self.step_search()
 
             # If we have a winner
             if self.winner != "":
@@ -784,6 +699,16 @@ class ChessGame:
 
         pygame.quit()
 
+    def clicked_piece(self, coords):
+        """Colour of the piece on coords, or None for an empty/off-board click."""
+        x, y = coords
+        if not (0 <= x <= 7 and 0 <= y <= 7):
+            return None
+        piece = self.squares[square(coords)]
+        if not piece:
+            return None
+        return piece & 8
+
     def handle_mouse_click(self, event):
         x_coord = event.pos[0] // self.SQUARE_SIZE
         y_coord = event.pos[1] // self.SQUARE_SIZE
@@ -797,61 +722,51 @@ class ChessGame:
                 self.winner = "black"
                 return
 
-            if click_coords in self.white_locations:
-                self.selection = self.white_locations.index(click_coords)
+            clicked = self.clicked_piece(click_coords)
+            if clicked == chess_core.WHITE:
+                self.selection = self.tracker.slot[square(click_coords)]
                 if self.turn_step == 0:
                     self.turn_step = 1
 
             if click_coords in self.valid_moves and self.selection != 100:
-                self.white_locations[self.selection] = click_coords
-                if click_coords in self.black_locations:
-                    black_idx = self.black_locations.index(click_coords)
-                    self.captured_pieces_white.append(self.black_pieces[black_idx])
-                    if self.black_pieces[black_idx] == "king":
-                        self.winner = "white"
-                    self.black_pieces.pop(black_idx)
-                    self.black_locations.pop(black_idx)
-
-                self.black_options = self.check_options(
-                    self.black_pieces, self.black_locations, "black"
-                )
-                self.white_options = self.check_options(
-                    self.white_pieces, self.white_locations, "white"
-                )
-                self.turn_step = 2
-                self.selection = 100
-                self.valid_moves = []
-
-        # Black's turn
-        else:
+                self.play_move(chess_core.WHITE, self.selection, click_coords)
+
+        # Black's turn; the engine doesn't take clicks
+        elif not self.engine_plays:
             if click_coords in [(8, 8), (9, 8)]:
                 self.winner = "white"
                 return
 
-            if click_coords in self.black_locations:
-                self.selection = self.black_locations.index(click_coords)
+            clicked = self.clicked_piece(click_coords)
+            if clicked == chess_core.BLACK:
+                self.selection = self.tracker.slot[square(click_coords)]
                 if self.turn_step == 2:
                     self.turn_step = 3
 
             if click_coords in self.valid_moves and self.selection != 100:
-                self.black_locations[self.selection] = click_coords
-                if click_coords in self.white_locations:
-                    white_idx = self.white_locations.index(click_coords)
-                    self.captured_pieces_black.append(self.white_pieces[white_idx])
-                    if self.white_pieces[white_idx] == "king":
-                        self.winner = "black"
-                    self.white_pieces.pop(white_idx)
-                    self.white_locations.pop(white_idx)
-
-                self.black_options = self.check_options(
-                    self.black_pieces, self.black_locations, "black"
-                )
-                self.white_options = self.check_options(
-                    self.white_pieces, self.white_locations, "white"
-                )
-                self.turn_step = 0
-                self.selection = 100
-                self.valid_moves = []
+                self.play_move(chess_core.BLACK, self.selection, click_coords)
+
+    def play_move(self, colour, index, target):
+        """Move piece index of colour to target, from a click or the engine.
+
+        The tracker updates squares and both sides' options and swap-removes
+        a captured piece; then the other side's status is worked out.
+        """
+        white = colour == chess_core.WHITE
+        locations = self.white_locations if white else self.black_locations
+        self.dirty.update((locations[index], target))
+        captured = self.tracker.move(colour, index, target)
+        if captured is not None:
+            if white:
+                self.captured_pieces_white.append(captured)
+            else:
+                self.captured_pieces_black.append(captured)
+            if captured == "king":
+                self.winner = "white" if white else "black"
+        self.turn_step = 2 if white else 0
+        self.selection = 100
+        self.valid_moves = []
+        self.update_status()
 
 
 # ------------------ ASYNC MAIN FUNCTION ------------------
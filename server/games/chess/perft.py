@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from chess_core import (
+    BLACK,
+    NAMES,
+    START_FEN,
+    WHITE,
+    XY,
+    ListRules,
+    list_perft,
+    perft,
+    position_from_fen,
+)
+
+# Well-known perft positions. Castling rights and en passant squares in
+# them are ignored (these rules have neither) and moves may leave the king
+# attacked, so the counts are this game's own, not the published ones.
+POSITIONS = {
+    "start": (START_FEN, 5),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -", 4),
+    "endgame": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -", 5),
+    "promotions": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 4),
+    "middlegame": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 4),
+    "symmetric": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P3/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", 4),
+}
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_baseline.json")
+
+
+def run_suite(max_depth=5, names=None):
+    """perft at every depth up to each position's limit (and max_depth).
+
+    Returns {name: {depth: {"nodes": n, "seconds": s, "nodes_per_second": r}}}
+    with depths as strings, the way they come back from JSON.
+    """
+    results = {}
+    for name, (fen, limit) in POSITIONS.items():
+        if names and name not in names:
+            continue
+        results[name] = {}
+        for depth in range(1, min(limit, max_depth) + 1):
+            position = position_from_fen(fen)
+            start = time.perf_counter()
+            nodes = perft(position, depth)
+            seconds = time.perf_counter() - start
+            results[name][str(depth)] = {
+                "nodes": nodes,
+                "seconds": round(seconds, 4),
+                "nodes_per_second": round(nodes / seconds) if seconds else 0,
+            }
+    return results
+
+
+def check_reference(max_depth=3, names=None):
+    """perft through ListRules, the generator ChessGame started with, must
+    give the same counts. Returns the number of counts compared."""
+    compared = 0
+    for name, (fen, limit) in POSITIONS.items():
+        if names and name not in names:
+            continue
+        position = position_from_fen(fen)
+        lists = {WHITE: ([], []), BLACK: ([], [])}
+        for sq, piece in enumerate(position.squares):
+            if piece:
+                lists[piece & 8][0].append(NAMES[piece & 7])
+                lists[piece & 8][1].append(XY[sq])
+        colour = "white" if position.turn == WHITE else "black"
+        for depth in range(1, min(limit, max_depth) + 1):
+            rules = ListRules(*lists[WHITE], *lists[BLACK])
+            expected = list_perft(rules, colour, depth)
+            assert perft(position, depth) == expected, (name, depth)
+            compared += 1
+    return compared
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05):
+    """Differences from the baseline, as (name, depth, problem) tuples.
+
+    A node count that differs is a move generator bug. A speed more than
+    tolerance below the baseline's is a slowdown; runs shorter than
+    min_seconds are too noisy to judge and only get their counts checked.
+    """
+    problems = []
+    for name, depths in results.items():
+        for depth, result in depths.items():
+            expected = baseline.get(name, {}).get(depth)
+            if expected is None:
+                continue
+            if result["nodes"] != expected["nodes"]:
+                problems.append(
+                    (name, depth, f"nodes {result['nodes']} != {expected['nodes']}")
+                )
+            elif (
+                expected["seconds"] >= min_seconds
+                and result["nodes_per_second"] < expected["nodes_per_second"] * (1 - tolerance)
+            ):
+                problems.append(
+                    (
+                        name,
+                        depth,
+                        f"{result['nodes_per_second']:,} nodes/s is more than "
+                        f"{tolerance:.0%} below {expected['nodes_per_second']:,}",
+                    )
+                )
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="chess perft suite")
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--positions", nargs="+", choices=list(POSITIONS))
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="write the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown")
+    parser.add_argument(
+        "--reference", action="store_true", help="also check counts against ListRules"
+    )
+    args = parser.parse_args(argv)
+
+    if args.reference:
+        print(f"{check_reference(names=args.positions)} counts match ListRules")
+
+    results = run_suite(args.max_depth, args.positions)
+    for name, depths in results.items():
+        for depth, result in depths.items():
+            print(
+                f"{name:<11} depth {depth}  {result['nodes']:>10,} nodes"
+                f"  {result['seconds']:8.3f}s  {result['nodes_per_second']:>10,} nodes/s"
+            )
+
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update to make one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    problems = compare(results, baseline, args.tolerance)
+    for name, depth, problem in problems:
+        print(f"REGRESSION {name} depth {depth}: {problem}")
+    if not problems:
+        print("no regressions against the baseline")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import argparse
+import re
+import sys
+import time
+
+from chess_core import (
+    BISHOP,
+    BLACK,
+    FILES,
+    KING,
+    KNIGHT,
+    NAMES,
+    PAWN,
+    QUEEN,
+    ROOK,
+    START_FEN,
+    WHITE,
+    XY,
+    IncrementalOptions,
+    Position,
+    attacked,
+    legal_options,
+    parse_square,
+    position_from_fen,
+    position_to_fen,
+    square,
+    square_name,
+)
+
+SAN_KINDS = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(=[NBRQ])?$")
+TAG = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+# Comments, variations' brackets, NAGs, move numbers and results are
+# split off as their own tokens
+TOKEN = re.compile(r"\{[^}]*\}?|;.*|\(|\)|\$\d+|\d+\.+|[^\s(){};]+")
+MOVE_NUMBER = re.compile(r"^\d+\.+$")
+
+
+class UnsupportedMove(ValueError):
+    """A move these rules don't have: castling, en passant, promotion."""
+
+
+def read_games(lines):
+    """Yield (tags, moves) for each game in an iterable of PGN lines.
+
+    moves holds the main line's SAN tokens; comments, variations, NAGs,
+    move numbers and the result are dropped. Only the game being read is
+    held in memory.
+    """
+    tags = {}
+    moves = []
+    depth = 0
+    comment = False
+    for line in lines:
+        if comment:
+            if "}" not in line:
+                continue
+            line = line[line.index("}") + 1 :]
+            comment = False
+        stripped = line.strip()
+        if not stripped or stripped.startswith("%"):
+            continue
+        match = TAG.match(stripped) if depth == 0 else None
+        if match:
+            if moves:
+                yield tags, moves
+                tags, moves = {}, []
+            tags[match.group(1)] = match.group(2)
+            continue
+        for token in TOKEN.findall(stripped):
+            if token.startswith("{"):
+                comment = not token.endswith("}")
+            elif token == "(":
+                depth += 1
+            elif token == ")":
+                depth = max(0, depth - 1)
+            elif depth or token.startswith(("$", ";")) or MOVE_NUMBER.match(token):
+                continue
+            elif token in RESULTS:
+                yield tags, moves
+                tags, moves = {}, []
+            else:
+                moves.append(token)
+    if moves:
+        yield tags, moves
+
+
+def parse_san(san, squares):
+    """(kind, file x or None, rank y or None, target square) of a SAN move.
+
+    Raises UnsupportedMove for castling, promotion and en passant (a pawn
+    capturing onto an empty square), and ValueError if san isn't SAN.
+    """
+    text = san.rstrip("+#!?")
+    if text.startswith(("O-O", "0-0")):
+        raise UnsupportedMove(san)
+    match = SAN.match(text)
+    if match is None:
+        raise ValueError(f"unreadable move {san}")
+    letter, file, rank, capture, target, promotion = match.groups()
+    if promotion:
+        raise UnsupportedMove(san)
+    kind = SAN_KINDS[letter] if letter else PAWN
+    to = parse_square(target)
+    if kind == PAWN and capture and not squares[to]:
+        raise UnsupportedMove(san)
+    x = FILES.index(file) if file else None
+    y = int(rank) - 1 if rank else None
+    return kind, x, y, to
+
+
+def _pick(san, to, candidates):
+    """The one candidate from square.
+
+    SAN names a single move, so several candidates mean the generator
+    offers a move the game can't have, such as a pawn jumping a piece.
+    That is raised like no candidate at all, never settled by guessing.
+    """
+    if not candidates:
+        raise ValueError(f"{san} matches no move")
+    if len(candidates) > 1:
+        moves = ", ".join(square_name(frm) + square_name(to) for frm in candidates)
+        raise ValueError(f"{san} matches {len(candidates)} moves ({moves})")
+    return candidates[0]
+
+
+def resolve_san(position, san):
+    """The (from, to) legal move of position that san names.
+
+    Raises UnsupportedMove for castling, promotion and en passant, and
+    ValueError when san matches no legal move (or more than one).
+    """
+    squares = position.squares
+    kind, x, y, to = parse_san(san, squares)
+    candidates = [
+        frm
+        for frm, target in position.legal_moves()
+        if target == to
+        and squares[frm] & 7 == kind
+        and (x is None or XY[frm][0] == x)
+        and (y is None or XY[frm][1] == y)
+    ]
+    return _pick(san, to, candidates), to
+
+
+# ------ replay validation ------
+OK, UNSUPPORTED, MISMATCH = "ok", "unsupported", "mismatch"
+
+
+def _lists(squares):
+    """ChessGame's piece name and location lists for a 64-square array."""
+    lists = {WHITE: ([], []), BLACK: ([], [])}
+    for sq, piece in enumerate(squares):
+        if piece:
+            lists[piece & 8][0].append(NAMES[piece & 7])
+            lists[piece & 8][1].append(XY[sq])
+    return lists
+
+
+def replay(tags, moves, check_marks=True):
+    """Play a game through ChessGame's option lists, checking every move.
+
+    Each SAN move has to be in the mover's options (IncrementalOptions,
+    the same lists check_options builds) and must not leave the mover's
+    king attacked. With check_marks, "+" and "#" have to agree with
+    whether the move gives check or mate, which tests attack detection
+    as well. legal_options only runs where it decides something: to
+    settle between several pieces that reach the target, and to look
+    for a reply to a check.
+
+    Returns (status, plies, detail): OK when every move replayed,
+    UNSUPPORTED at the first castling, en passant or promotion, which
+    these rules lack, and MISMATCH where the generator and the game
+    disagree, including a SAN move the generator offers more than one
+    way; plies is how many moves were played before stopping.
+    """
+    position = position_from_fen(tags.get("FEN", START_FEN))
+    lists = _lists(position.squares)
+    tracker = IncrementalOptions(*lists[WHITE], *lists[BLACK])
+    squares = tracker.squares
+    pieces = tracker.pieces
+    colour = position.turn
+    for ply, san in enumerate(moves):
+        try:
+            kind, x, y, to = parse_san(san, squares)
+        except UnsupportedMove:
+            return UNSUPPORTED, ply, san
+        except ValueError as error:
+            return MISMATCH, ply, str(error)
+        target = XY[to]
+        locations = tracker.locations[colour]
+        options = tracker.options[colour]
+        candidates = [
+            i
+            for i, loc in enumerate(locations)
+            if target in options[i]
+            and squares[square(loc)] & 7 == kind
+            and (x is None or loc[0] == x)
+            and (y is None or loc[1] == y)
+        ]
+        if len(candidates) > 1:
+            legal = legal_options(squares, locations, options, colour)
+            candidates = [i for i in candidates if target in legal[i]]
+        try:
+            frm = _pick(san, to, [square(locations[i]) for i in candidates])
+        except ValueError as error:
+            return MISMATCH, ply, f"{error} in {_fen(squares, colour)}"
+        tracker.move(colour, tracker.slot[frm], target)
+        enemy = colour ^ 8
+        if "king" in pieces[colour]:
+            king = locations[pieces[colour].index("king")]
+            if attacked(squares, square(king), enemy):
+                return MISMATCH, ply, f"{san} leaves its king attacked"
+        if check_marks and "king" in pieces[enemy]:
+            king = tracker.locations[enemy][pieces[enemy].index("king")]
+            check = attacked(squares, square(king), colour)
+            mate = check and not any(
+                legal_options(
+                    squares, tracker.locations[enemy], tracker.options[enemy], enemy
+                )
+            )
+            marked = san.rstrip("!?")[-1:]
+            if check != (marked in ("+", "#")) or mate != (marked == "#"):
+                found = "mate" if mate else "check" if check else "no check"
+                return MISMATCH, ply, f"{san} gives {found} in {_fen(squares, enemy)}"
+        colour = enemy
+    return OK, len(moves), ""
+
+
+def _fen(squares, turn):
+    return position_to_fen(Position(squares, turn))
+
+
+def validate(lines, check_marks=True):
+    """Yield (number, tags, status, plies, detail) for every game, streaming."""
+    for number, (tags, moves) in enumerate(read_games(lines), 1):
+        yield (number, tags, *replay(tags, moves, check_marks))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="replay PGN games through the chess move generator"
+    )
+    parser.add_argument("paths", nargs="+", help="PGN files ('-' for standard input)")
+    parser.add_argument(
+        "--no-check-marks", action="store_true", help="don't check + and # suffixes"
+    )
+    parser.add_argument("--show", type=int, default=10, help="mismatches to print")
+    parser.add_argument("--every", type=int, default=0, help="progress every N games")
+    args = parser.parse_args(argv)
+
+    counts = {OK: 0, UNSUPPORTED: 0, MISMATCH: 0}
+    plies = 0
+    start = time.perf_counter()
+    for path in args.paths:
+        f = sys.stdin if path == "-" else open(path, errors="replace")
+        try:
+            for number, tags, status, played, detail in validate(f, not args.no_check_marks):
+                counts[status] += 1
+                plies += played
+                if status == MISMATCH and counts[MISMATCH] <= args.show:
+                    print(f"{path} game {number} move {played + 1}: {detail}")
+                if args.every and number % args.every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{number:,} games, {plies / elapsed:,.0f} moves/s", file=sys.stderr)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    elapsed = time.perf_counter() - start
+    games = sum(counts.values())
+    print(
+        f"{games:,} games ({counts[OK]:,} whole, {counts[UNSUPPORTED]:,} stopped at an"
+        f" unsupported move, {counts[MISMATCH]:,} mismatches), {plies:,} moves replayed"
+    )
+    print(
+        f"{elapsed:.1f}s: {games / elapsed if elapsed else 0:,.0f} games/s,"
+        f" {plies / elapsed if elapsed else 0:,.0f} moves/s"
+    )
+    return 1 if counts[MISMATCH] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+
+import pygame
+
+from chess_core import BLACK, KINDS, NAMES, WHITE
+
+IMAGES = "assets/images"
+COLOUR_NAMES = {WHITE: "white", BLACK: "black"}
+
+
+def image_path(directory, kind, colour):
+    return os.path.join(directory, f"{COLOUR_NAMES[colour]} {NAMES[kind]}.png")
+
+
+class SpriteAtlas:
+    """Every piece image decoded once, on one sheet, scaled on demand.
+
+    Each PNG is decoded a single time and shrunk to master_size, its cell
+    on the sheet; the full-size decode is dropped straight away, so
+    master_size should be the biggest size drawn. A sprite of any size is
+    smooth-scaled from its cell the first time it's asked for and cached
+    by (kind, colour, size); at master_size it is the cell itself. table()
+    lays sprites out as a list indexed by piece value (kind | colour) for
+    the draw code.
+
+    Surfaces need a display mode set first (they're converted to it).
+    """
+
+    def __init__(self, directory=IMAGES, master_size=160):
+        self.master_size = master_size
+        kinds = sorted(NAMES)
+        self.sheet = pygame.Surface(
+            (len(kinds) * master_size, 2 * master_size), pygame.SRCALPHA
+        ).convert_alpha()
+        self.cells = {}
+        for row, colour in enumerate((WHITE, BLACK)):
+            for column, kind in enumerate(kinds):
+                image = pygame.image.load(image_path(directory, kind, colour))
+                image = image.convert_alpha()
+                cell = pygame.Rect(
+                    column * master_size, row * master_size, master_size, master_size
+                )
+                self.sheet.blit(
+                    pygame.transform.smoothscale(image, cell.size), cell.topleft
+                )
+                self.cells[kind | colour] = cell
+        self.variants = {}
+
+    def sprite(self, kind, colour, size):
+        key = (kind, colour, size)
+        surface = self.variants.get(key)
+        if surface is None:
+            surface = self.sheet.subsurface(self.cells[kind | colour])
+            if size != self.master_size:
+                surface = pygame.transform.smoothscale(surface, (size, size))
+            self.variants[key] = surface
+        return surface
+
+    def table(self, sizes):
+        """Sprites indexed by piece value; sizes maps kind -> pixel size."""
+        images = [None] * 16
+        for piece in self.cells:
+            images[piece] = self.sprite(piece & 7, piece & 8, sizes[piece & 7])
+        return images
+
+    def nbytes(self):
+        """Pixel bytes held: the sheet plus every scaled variant."""
+        return surface_bytes(self.sheet) + sum(
+            surface_bytes(surface)
+            for surface in self.variants.values()
+            if surface.get_parent() is None
+        )
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def load_per_size(directory, scale):
+    """ChessGame's old loading: every image decoded again for each size."""
+    images = []
+    for name in KINDS:
+        for colour in (WHITE, BLACK):
+            path = image_path(directory, KINDS[name], colour)
+            for size in (65 if name == "pawn" else 80, 45):
+                image = pygame.image.load(path).convert_alpha()
+                images.append(
+                    pygame.transform.scale(image, (int(size * scale), int(size * scale)))
+                )
+    return images
+
+
+def benchmark(directory=IMAGES, scale=0.8):
+    """Startup seconds, decodes and resident pixel bytes: the old per-size
+    loading against the atlas with the two sizes ChessGame draws."""
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    start = time.perf_counter()
+    images = load_per_size(directory, scale)
+    before_seconds = time.perf_counter() - start
+    before_bytes = sum(surface_bytes(image) for image in images)
+
+    start = time.perf_counter()
+    atlas = SpriteAtlas(directory, master_size=int(80 * scale))
+    decode_seconds = time.perf_counter() - start
+    board = {kind: int((65 if kind == KINDS["pawn"] else 80) * scale) for kind in NAMES}
+    atlas.table(board)
+    atlas.table({kind: int(45 * scale) for kind in NAMES})
+    after_seconds = time.perf_counter() - start
+    return {
+        "before": (len(images), before_seconds, before_bytes),
+        "after": (len(atlas.cells), after_seconds, atlas.nbytes()),
+        "atlas_decode_seconds": decode_seconds,
+    }
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 0.8
+    result = benchmark(scale=scale)
+    for label, key in (("per-size loads", "before"), ("sprite atlas", "after")):
+        decodes, seconds, nbytes = result[key]
+        print(
+            f"{label:<15} {decodes:3d} decodes  {seconds * 1e3:7.1f} ms"
+            f"  {nbytes / 1024:8.1f} KiB of surfaces"
+        )
+    print(f"atlas decode alone {result['atlas_decode_seconds'] * 1e3:.1f} ms")
@@ -0,0 +1,229 @@
+import sys
+import threading
+import time
+
+from chess_core import (
+    START_FEN,
+    WHITE,
+    parse_square,
+    perft,
+    position_from_fen,
+    square_name,
+)
+from chess_engine import MATE, MATE_BOUND, AlphaBeta
+
+# Searches with no depth or time given ("go" or "go infinite") run until
+# "stop", but never past this
+INFINITE_SECONDS = 24 * 3600
+
+# What a malformed command can raise: a missing argument, a number that
+# isn't one, or a FEN with unknown pieces
+COMMAND_ERRORS = (IndexError, KeyError, ValueError)
+
+
+def move_name(move):
+    return square_name(move[0]) + square_name(move[1])
+
+
+def format_score(score):
+    """UCI score: centipawns, or mate in moves (negative when being mated)."""
+    if abs(score) >= MATE_BOUND:
+        plies = MATE - abs(score)
+        moves = (plies + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {score}"
+
+
+class UCI:
+    """The UCI protocol over the chess_core rules and the AlphaBeta engine.
+
+    No pygame and no pyodide: positions are chess_core Positions and
+    moves are plain from/to squares like e2e4. These rules have no
+    castling, en passant or promotion, so moves using them are refused.
+    "go" searches on a worker thread so "stop" and "isready" are answered
+    while it thinks; "perft" (or "go perft") counts on the main thread.
+    A command that can't be read is answered with an info string.
+    """
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.engine = AlphaBeta()
+        self.position = position_from_fen(START_FEN)
+        self.worker = None
+        # Set when the search may report its bestmove: at once for a
+        # limited search, on "stop" for "go infinite" or a bare "go"
+        self.release = None
+
+    def send(self, line):
+        self.out.write(line + "\n")
+        self.out.flush()
+
+    # ------ commands ------
+    def handle(self, line):
+        """Handle one command line; returns False on "quit"."""
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        try:
+            return self.dispatch(command, args)
+        except COMMAND_ERRORS as error:
+            self.send(f"info string bad {command} command: {error!r}")
+            return True
+
+    def dispatch(self, command, args):
+        if command == "uci":
+            self.send("id name pygame-chess")
+            self.send("id author pygame-chess")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.wait()
+            self.engine = AlphaBeta()
+        elif command == "position":
+            self.wait()
+            self.set_position(args)
+        elif command == "go":
+            self.wait()
+            if args[:1] == ["perft"]:
+                self.perft(int(args[1]))
+            else:
+                self.go(args)
+        elif command == "perft":
+            self.wait()
+            self.perft(int(args[0]))
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def set_position(self, args):
+        if args[:1] == ["startpos"]:
+            fen, rest = START_FEN, args[1:]
+        elif args[:1] == ["fen"]:
+            end = args.index("moves") if "moves" in args else len(args)
+            fen, rest = " ".join(args[1:end]), args[end:]
+        else:
+            self.send("info string position needs startpos or fen")
+            return
+        position = position_from_fen(fen)
+        for name in rest[1:] if rest[:1] == ["moves"] else []:
+            move = self.parse_move(position, name)
+            if move is None:
+                self.send(f"info string illegal or unsupported move {name}")
+                break
+            position.make(move)
+        self.position = position
+
+    def parse_move(self, position, name):
+        if len(name) != 4:
+            return None
+        try:
+            move = (parse_square(name[:2]), parse_square(name[2:]))
+        except ValueError:
+            return None
+        return move if move in position.legal_moves() else None
+
+    def go(self, args):
+        options = {}
+        for key, value in zip(args, args[1:]):
+            if value.lstrip("-").isdigit():
+                options[key] = int(value)
+        white = self.position.turn == WHITE
+        if "movetime" in options:
+            time_limit = options["movetime"] / 1000
+        elif ("wtime" if white else "btime") in options:
+            remaining = options["wtime" if white else "btime"]
+            increment = options.get("winc" if white else "binc", 0)
+            time_limit = (remaining / options.get("movestogo", 30) + increment) / 1000
+        else:
+            time_limit = INFINITE_SECONDS
+        self.engine.max_depth = options.get("depth", 32)
+        # UCI forbids bestmove before "stop" here, even if the search ends
+        # early on a forced mate
+        held = "infinite" in args or (
+            time_limit == INFINITE_SECONDS and "depth" not in options
+        )
+        release = self.release = threading.Event()
+        if not held:
+            release.set()
+
+        start = time.perf_counter()
+
+        def info(depth, score, move):
+            elapsed = time.perf_counter() - start
+            nodes = self.engine.nodes
+            nps = int(nodes / elapsed) if elapsed else 0
+            self.send(
+                f"info depth {depth} score {format_score(score)} nodes {nodes}"
+                f" nps {nps} time {int(elapsed * 1000)} pv {move_name(move)}"
+            )
+
+        def search():
+            move = self.engine.best_move(self.position, time_limit)
+            release.wait()
+            self.send(f"bestmove {move_name(move) if move else '0000'}")
+
+        self.engine.on_depth = info
+        self.worker = threading.Thread(target=search, daemon=True)
+        self.worker.start()
+
+    def perft(self, depth):
+        """Divide: the node count under every move, then the total.
+
+        Counts this game's pseudo-legal moves, the same as perft.py.
+        """
+        if depth < 1:
+            raise ValueError(f"perft depth {depth} is below 1")
+        position = self.position
+        start = time.perf_counter()
+        total = 0
+        for move in position.moves():
+            captured = position.make(move)
+            nodes = perft(position, depth - 1)
+            position.unmake(move, captured)
+            self.send(f"{move_name(move)}: {nodes}")
+            total += nodes
+        elapsed = time.perf_counter() - start
+        nps = int(total / elapsed) if elapsed else 0
+        self.send(f"info nodes {total} nps {nps} time {int(elapsed * 1000)}")
+        self.send(f"Nodes searched: {total}")
+
+    def stop(self):
+        if self.release is not None:
+            self.release.set()
+        # Until the worker has started its search, stop() is overwritten
+        # by the search's own deadline, so keep asking
+        while self.worker is not None and self.worker.is_alive():
+            self.engine.stop()
+            self.worker.join(0.05)
+        self.wait()
+
+    def wait(self):
+        """Let the search finish before the position or engine changes.
+
+        A held search ("go infinite") would only end on "stop", so it is
+        stopped instead.
+        """
+        if self.release is not None and not self.release.is_set():
+            self.stop()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+
+def main():
+    uci = UCI()
+    for line in sys.stdin:
+        if not uci.handle(line):
+            break
+    uci.wait()
+
+
+if __name__ == "__main__":
+    main()
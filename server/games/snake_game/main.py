@@ -1,9 +1,18 @@
-import sys, random
 import asyncio
-from pygame.math import Vector2
 import pygame
 
-import asyncio
+from snake_core import (
+    SnakeState,
+    WorldSnakeState,
+    FixedTimestep,
+    InputQueue,
+    ATE,
+    UP,
+    DOWN,
+    LEFT,
+    RIGHT,
+)
+from snake_autopilot import Autopilot
 
 pygame.init()
 
@@ -26,15 +35,45 @@ cell_size = min_val // 30
 number_of_cells = (min_val // cell_size) - 4
 OFFSET = min_val // 15
 
+# Cells per side of a large scrolling world (e.g. 4096), or None for the
+# classic board. The visible window stays number_of_cells wide and the
+# camera follows the head.
+WORLD_SIZE = None
 
-class Food:
-    def __init__(self, snake_body):
-        self.position = self.generate_random_pos(snake_body)
+# Simulation ticks per second, independent of the render FPS (speed)
+TICK_RATE = 5
+# Most ticks to run in one frame before dropping the backlog
+MAX_CATCH_UP = 5
 
-    def draw(self):
+KEY_DIRECTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
+
+# Redraw only the cells a tick touched instead of the whole frame
+INCREMENTAL_RENDER = True
+
+# Kinds of cell change recorded by Game.update
+CLEAR, SEGMENT, FOOD = 0, 1, 2
+
+
+class Food:
+    def __init__(self, board):
+        self.board = board
+
+    def draw(self, camera=(0, 0)):
+        if self.board.food is None:
+            return
+        x, y = self.board.food_xy()
+        x -= camera[0]
+        y -= camera[1]
+        if not (0 <= x < number_of_cells and 0 <= y < number_of_cells):
+            return
         # Calculate the center position of the circle
-        center_x = OFFSET + self.position.x * cell_size + cell_size // 2
-        center_y = OFFSET + self.position.y * cell_size + cell_size // 2
+        center_x = OFFSET + x * cell_size + cell_size // 2
+        center_y = OFFSET + y * cell_size + cell_size // 2
 
         # Set the radius of the circle
         radius = cell_size // 2
@@ -47,58 +86,77 @@ class Food:
             radius,  # Radius of the circle
         )
 
-    def generate_random_cell(self):
-        x = random.randint(0, number_of_cells - 1)
-        y = random.randint(0, number_of_cells - 1)
-        return Vector2(x, y)
-
-    def generate_random_pos(self, snake_body):
-        position = self.generate_random_cell()
-        while position in snake_body:
-            position = self.generate_random_cell()
-        return position
-
 
 # Class for Snake
 class Snake:
-    def __init__(self):
-        self.body = [Vector2(6, 9), Vector2(5, 9), Vector2(4, 9)]
-        self.direction = Vector2(1, 0)
-        self.add_segment = False
+    def __init__(self, board):
+        self.board = board
 
-    def draw(self):
-        for segment in self.body:
+    @property
+    def body(self):
+        return self.board.body
+
+    @property
+    def direction(self):
+        return self.board.direction
+
+    @direction.setter
+    def direction(self, value):
+        self.board.direction = value
+
+    def draw(self, camera=(0, 0)):
+        cx, cy = camera
+        visible = self.board.segments_in(
+            cx, cy, cx + number_of_cells, cy + number_of_cells
+        )
+        for x, y in visible:
             segment_rect = (
-                OFFSET + segment.x * cell_size,
-                OFFSET + segment.y * cell_size,
+                OFFSET + (x - cx) * cell_size,
+                OFFSET + (y - cy) * cell_size,
                 cell_size,
                 cell_size,
             )
             pygame.draw.rect(screen, DARK_GREEN, segment_rect, 0, round(cell_size / 4))
 
-    def update(self):
-        self.body.insert(0, self.body[0] + self.direction)
-        if self.add_segment:
-            self.add_segment = False
-        else:
-            self.body = self.body[:-1]
-
     def reset(self):
-        self.body = [Vector2(6, 9), Vector2(5, 9), Vector2(4, 9)]
-        self.direction = Vector2(1, 0)
+        self.board.reset()
 
 
 class Game:
     def __init__(self):
-        self.snake = Snake()
-        self.food = Food(self.snake.body)
+        if WORLD_SIZE:
+            self.board = WorldSnakeState(WORLD_SIZE)
+        else:
+            self.board = SnakeState(number_of_cells)
+        self.snake = Snake(self.board)
+        self.food = Food(self.board)
         self.state = "RUNNING"
-        self.score = 0
+        self.changes = []
+        self.inputs = InputQueue()
+        # Set by toggle_autopilot(); plays instead of the input queue
+        self.autopilot = None
+
+    @property
+    def score(self):
+        return self.board.score
+
+    def camera(self):
+        """Top-left world cell of the visible window, following the head."""
+        if not WORLD_SIZE:
+            return (0, 0)
+        limit = WORLD_SIZE - number_of_cells
+        hx, hy = self.board.head
+        half = number_of_cells // 2
+        return (
+            min(max(hx - half, 0), limit),
+            min(max(hy - half, 0), limit),
+        )
 
     def draw(self):
         if self.state == "RUNNING":
-            self.food.draw()
-            self.snake.draw()
+            camera = self.camera()
+            self.food.draw(camera)
+            self.snake.draw(camera)
         elif self.state == "STOPPED":
             game_over_text = title_font.render("Game Over", True, DARK_GREEN)
             refresh_text = score_font.render("Refresh to play again", True, DARK_GREEN)
@@ -117,76 +175,85 @@ class Game:
                     (height - refresh_text.get_height()) // 2 + 20,
                 ),
             )
+            # How well the clock and the input queue kept up this game
+            ticks = clock.stats()
+            keys = self.inputs.stats()
+            lines = (
+                f"Tick lag {ticks['mean_lag_ms']:.1f} ms, {ticks['dropped_ticks']} dropped",
+                f"Key latency {keys['mean_latency_ms']:.0f} ms, {keys['dropped']} dropped",
+            )
+            for row, line in enumerate(lines):
+                stats_text = score_font.render(line, True, DARK_GREEN)
+                screen.blit(
+                    stats_text,
+                    (
+                        (width - stats_text.get_width()) // 2,
+                        height // 2 + 60 + row * (score_size + 6),
+                    ),
+                )
 
     def update(self):
         if self.state == "RUNNING":
-            self.snake.update()
-            self.check_collision_with_food()
-            self.check_collision_with_edges()
-            self.check_collision_with_tail()
-
-    def check_collision_with_food(self):
-        if self.snake.body[0] == self.food.position:
-            self.food.position = self.food.generate_random_pos(self.snake.body)
-            self.snake.add_segment = True
-            self.score += 1
-            pyodide.globals.get("setScore")(self.score)
-
-    def check_collision_with_edges(self):
-        if self.snake.body[0].x == number_of_cells or self.snake.body[0].x == -1:
-            self.game_over()
-        if self.snake.body[0].y == number_of_cells or self.snake.body[0].y == -1:
-            self.game_over()
+            if self.autopilot is not None:
+                direction = self.autopilot.choose(self.board)
+            else:
+                direction = self.inputs.next_direction(self.board.direction)
+            result = self.board.step(direction)
+            # Record the cells this tick touched, in order, for the renderer
+            if self.board.last_tail is not None:
+                self.changes.append((CLEAR, self.board.last_tail))
+            if self.board.last_head is not None:
+                self.changes.append((SEGMENT, self.board.last_head))
+            if result == ATE:
+                if self.board.food is not None:
+                    self.changes.append((FOOD, self.board.food))
+                pyodide.globals.get("setScore")(self.score)
+            if not self.board.alive:
+                self.game_over()
+
+    def toggle_autopilot(self):
+        if WORLD_SIZE:
+            # Its search buffers are sized to the whole board
+            return
+        if self.autopilot is None:
+            self.autopilot = Autopilot(number_of_cells)
+        else:
+            self.autopilot = None
+        self.inputs.clear()
 
     def game_over(self):
         self.state = "STOPPED"
+        self.inputs.clear()
         pyodide.globals.get("setIsGameEnded")(True)
 
-    def check_collision_with_tail(self):
-        headless_body = self.snake.body[1:]
-        if self.snake.body[0] in headless_body:
-            self.game_over()
-        headless_body = self.snake.body[1:]
-        if self.snake.body[0] in headless_body:
-            self.game_over()
-
-
-# Set up the screen
-screen = pygame.display.set_mode((min_val, min_val))
-pygame.display.set_caption("Retro Snake")
-
-# Initialize game
-game = Game()
 
+class Renderer:
+    """Incremental renderer: a cached static layer plus per-cell stamps.
+
+    The background, border and title are drawn once into static_layer.
+    Each tick only the vacated tail, the new head and the new food cell
+    are re-blitted, and display.update() is given just those rects.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.static_layer = self.make_static_layer()
+        self.segment_stamp = self.make_segment_stamp()
+        self.food_stamp = self.make_food_stamp()
+        self.score_rect = pygame.Rect(
+            OFFSET - 5,
+            OFFSET + cell_size * number_of_cells + 5,
+            min_val - (OFFSET - 5),
+            score_font.get_height(),
+        )
+        self.shown_state = None
+        self.shown_score = None
 
-async def game_update_task():
-    while True:
-        game.update()
-        await asyncio.sleep(0.2)
-
-
-async def main():
-    task = asyncio.create_task(game_update_task())
-
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN and game.state == "RUNNING":
-                if event.key == pygame.K_UP and game.snake.direction != Vector2(0, 1):
-                    game.snake.direction = Vector2(0, -1)
-                if event.key == pygame.K_DOWN and game.snake.direction != Vector2(
-                    0, -1
-                ):
-                    game.snake.direction = Vector2(0, 1)
-                if event.key == pygame.K_LEFT and game.snake.direction != Vector2(1, 0):
-                    game.snake.direction = Vector2(-1, 0)
-                if event.key == pygame.K_RIGHT and game.snake.direction != Vector2(
-                    -1, 0
-                ):
-                    game.snake.direction = Vector2(1, 0)
-
-        screen.fill(GREEN)
+    def make_static_layer(self):
+        layer = pygame.Surface((min_val, min_val))
+        layer.fill(GREEN)
         pygame.draw.rect(
-            screen,
+            layer,
             DARK_GREEN,
             (
                 OFFSET - 5,
@@ -196,15 +263,128 @@ async def main():
             ),
             5,
         )
-        game.draw()
         title_surface = title_font.render("Retro Snake New", True, DARK_GREEN)
-        score_surface = score_font.render(str(game.score), True, DARK_GREEN)
-        screen.blit(title_surface, (OFFSET - 5, OFFSET - title_size - 2))
-        screen.blit(
-            score_surface, (OFFSET - 5, OFFSET + cell_size * number_of_cells + 5)
+        layer.blit(title_surface, (OFFSET - 5, OFFSET - title_size - 2))
+        return layer
+
+    def make_segment_stamp(self):
+        stamp = pygame.Surface((cell_size, cell_size))
+        stamp.fill(GREEN)
+        pygame.draw.rect(
+            stamp, DARK_GREEN, (0, 0, cell_size, cell_size), 0, round(cell_size / 4)
+        )
+        return stamp
+
+    def make_food_stamp(self):
+        stamp = pygame.Surface((cell_size, cell_size))
+        stamp.fill(GREEN)
+        pygame.draw.circle(
+            stamp, DARK_GREEN, (cell_size // 2, cell_size // 2), cell_size // 2
+        )
+        return stamp
+
+    def cell_rect(self, cell):
+        x, y = self.game.board.to_xy(cell)
+        return pygame.Rect(
+            OFFSET + x * cell_size, OFFSET + y * cell_size, cell_size, cell_size
         )
 
+    def draw_score(self):
+        screen.blit(self.static_layer, self.score_rect, self.score_rect)
+        score_surface = score_font.render(str(self.game.score), True, DARK_GREEN)
+        screen.blit(score_surface, self.score_rect.topleft)
+        self.shown_score = self.game.score
+        return self.score_rect
+
+    def draw_full(self):
+        screen.blit(self.static_layer, (0, 0))
+        board = self.game.board
+        if self.game.state == "RUNNING":
+            if board.food is not None:
+                screen.blit(self.food_stamp, self.cell_rect(board.food))
+            for cell in board.body:
+                screen.blit(self.segment_stamp, self.cell_rect(cell))
+        else:
+            self.game.draw()
+        self.draw_score()
+        self.game.changes.clear()
+        self.shown_state = self.game.state
         pygame.display.update()
+
+    def draw_changes(self):
+        if self.game.state != self.shown_state:
+            self.draw_full()
+            return
+        dirty = []
+        for kind, cell in self.game.changes:
+            rect = self.cell_rect(cell)
+            if kind == CLEAR:
+                screen.blit(self.static_layer, rect, rect)
+            elif kind == SEGMENT:
+                screen.blit(self.segment_stamp, rect)
+            else:
+                screen.blit(self.food_stamp, rect)
+            dirty.append(rect)
+        self.game.changes.clear()
+        if self.game.score != self.shown_score:
+            dirty.append(self.draw_score())
+        if dirty:
+            pygame.display.update(dirty)
+
+
+def draw_full_frame():
+    screen.fill(GREEN)
+    pygame.draw.rect(
+        screen,
+        DARK_GREEN,
+        (
+            OFFSET - 5,
+            OFFSET - 5,
+            cell_size * number_of_cells + 10,
+            cell_size * number_of_cells + 10,
+        ),
+        5,
+    )
+    game.draw()
+    title_surface = title_font.render("Retro Snake New", True, DARK_GREEN)
+    score_surface = score_font.render(str(game.score), True, DARK_GREEN)
+    screen.blit(title_surface, (OFFSET - 5, OFFSET - title_size - 2))
+    screen.blit(score_surface, (OFFSET - 5, OFFSET + cell_size * number_of_cells + 5))
+    # Everything was just redrawn, so the recorded cells are spent
+    game.changes.clear()
+
+    pygame.display.update()
+
+
+# Set up the screen
+screen = pygame.display.set_mode((min_val, min_val))
+pygame.display.set_caption("Retro Snake")
+
+# Initialize game
+game = Game()
+renderer = Renderer(game)
+clock = FixedTimestep(TICK_RATE, MAX_CATCH_UP)
+
+
+async def main():
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.KEYDOWN and game.state == "RUNNING":
+                if event.key == pygame.K_a:
+                    game.toggle_autopilot()
+                # The autopilot steers alone; arrows pressed meanwhile
+                # aren't queued for later
+                elif event.key in KEY_DIRECTIONS and game.autopilot is None:
+                    game.inputs.push(KEY_DIRECTIONS[event.key])
+
+        for _ in range(clock.advance()):
+            game.update()
+
+        # The camera scrolls every tick in a large world, so redraw it all
+        if INCREMENTAL_RENDER and not WORLD_SIZE:
+            renderer.draw_changes()
+        else:
+            draw_full_frame()
         await asyncio.sleep(1 / speed)
 
 
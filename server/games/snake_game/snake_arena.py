@@ -0,0 +1,433 @@
+import asyncio
+import random
+import struct
+import sys
+import time
+from collections import deque
+
+from snake_core import InputQueue, UP, DOWN, LEFT, RIGHT
+
+# Cell contents in Arena.grid
+EMPTY = 0
+BODY = 1
+FOOD = 2
+
+# Direction codes clients send, one byte each
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# Frame kinds sent by the server: u32 length, u8 kind, payload
+HELLO = 0
+SNAPSHOT = 1
+DELTA = 2
+
+FRAME = struct.Struct("<IB")
+# tick, joined, heads, tails, deaths, new food
+DELTA_HEADER = struct.Struct("<IHHHHH")
+JOIN = struct.Struct("<HH")
+
+
+class ArenaSnake:
+    __slots__ = ("id", "body", "direction", "add_segment", "alive", "score", "inputs")
+
+    def __init__(self, snake_id, body, direction):
+        self.id = snake_id
+        self.body = deque(body)
+        self.direction = direction
+        self.add_segment = False
+        self.alive = True
+        self.score = 0
+        self.inputs = InputQueue()
+
+
+class Arena:
+    """Authoritative many-snake board using the single-game rules.
+
+    Every tick all tails leave first, then all heads move. A head dies on a
+    wall, on any body cell, or when two heads land on the same cell. Food
+    grows the snake on the next tick. Dead snakes are removed from the board.
+
+    step() returns a compact binary delta with the snakes that joined, the
+    new heads, the snakes whose tail moved, the snakes that died and the new
+    food cells. A client can rebuild the board from one snapshot() followed
+    by every delta (see ArenaView).
+    """
+
+    def __init__(self, number_of_cells, food_count=64, rng=None):
+        n = number_of_cells
+        self.number_of_cells = n
+        self.rng = rng if rng is not None else random.Random()
+        self.grid = bytearray(n * n)
+        self.free_cells = list(range(n * n))
+        self.free_index = list(range(n * n))
+        self.snakes = {}
+        self.foods = set()
+        self.tick = 0
+        self.next_id = 0
+        self._joined = []
+        self._left = []
+        self._new_food = []
+        for _ in range(food_count):
+            self._add_food()
+        # Clients get the starting food from snapshot(), not from a delta
+        self._new_food = []
+
+    # ------ free-cell index (cells that are EMPTY) ------
+    def _set(self, cell, value):
+        old = self.grid[cell]
+        self.grid[cell] = value
+        if old == EMPTY and value != EMPTY:
+            idx = self.free_index[cell]
+            last = self.free_cells.pop()
+            if last != cell:
+                self.free_cells[idx] = last
+                self.free_index[last] = idx
+            self.free_index[cell] = -1
+        elif old != EMPTY and value == EMPTY:
+            self.free_index[cell] = len(self.free_cells)
+            self.free_cells.append(cell)
+
+    def _add_food(self):
+        if not self.free_cells:
+            return
+        cell = self.free_cells[self.rng.randrange(len(self.free_cells))]
+        self._set(cell, FOOD)
+        self.foods.add(cell)
+        self._new_food.append(cell)
+
+    # ------ players ------
+    def spawn(self, attempts=32):
+        """Add a 3-cell snake heading right on free cells; returns its id."""
+        n = self.number_of_cells
+        grid = self.grid
+        for _ in range(attempts):
+            x = self.rng.randrange(2, n - 1)
+            y = self.rng.randrange(n)
+            cells = [y * n + x, y * n + x - 1, y * n + x - 2]
+            if all(grid[c] == EMPTY for c in cells):
+                break
+        else:
+            return None
+        snake_id = self.next_id
+        while snake_id in self.snakes:
+            snake_id = (snake_id + 1) & 0xFFFF
+        self.next_id = (snake_id + 1) & 0xFFFF
+        for cell in cells:
+            self._set(cell, BODY)
+        self.snakes[snake_id] = ArenaSnake(snake_id, cells, RIGHT)
+        self._joined.append(JOIN.pack(snake_id, 3) + struct.pack("<3I", *cells))
+        return snake_id
+
+    def remove(self, snake_id):
+        snake = self.snakes.pop(snake_id, None)
+        if snake is None:
+            return
+        for cell in snake.body:
+            self._set(cell, EMPTY)
+        self._left.append(snake_id)
+
+    def steer(self, snake_id, direction):
+        snake = self.snakes.get(snake_id)
+        if snake is not None:
+            snake.inputs.push(direction)
+
+    # ------ simulation ------
+    def step(self):
+        """Advance every snake one tick and return the encoded delta."""
+        self.tick += 1
+        n = self.number_of_cells
+        grid = self.grid
+        live = list(self.snakes.values())
+
+        tails = []
+        for snake in live:
+            direction = snake.inputs.next_direction(snake.direction)
+            if direction is not None:
+                snake.direction = direction
+            if snake.add_segment:
+                snake.add_segment = False
+            else:
+                self._set(snake.body.pop(), EMPTY)
+                tails.append(snake.id)
+
+        dead = []
+        targets = {}
+        for snake in live:
+            hy, hx = divmod(snake.body[0], n)
+            x = hx + snake.direction[0]
+            y = hy + snake.direction[1]
+            if not (0 <= x < n and 0 <= y < n):
+                dead.append(snake)
+                continue
+            cell = y * n + x
+            if grid[cell] == BODY:
+                dead.append(snake)
+                continue
+            if cell in targets:
+                targets[cell].append(snake)
+            else:
+                targets[cell] = [snake]
+
+        head_ids = []
+        head_cells = []
+        eaten = 0
+        for cell, group in targets.items():
+            if len(group) > 1:
+                # Head-on collision: everyone arriving here dies
+                dead.extend(group)
+                continue
+            snake = group[0]
+            if grid[cell] == FOOD:
+                self.foods.discard(cell)
+                snake.add_segment = True
+                snake.score += 1
+                eaten += 1
+            snake.body.appendleft(cell)
+            self._set(cell, BODY)
+            head_ids.append(snake.id)
+            head_cells.append(cell)
+
+        for snake in dead:
+            snake.alive = False
+            del self.snakes[snake.id]
+            for cell in snake.body:
+                self._set(cell, EMPTY)
+        for _ in range(eaten):
+            self._add_food()
+
+        deaths = self._left + [snake.id for snake in dead]
+        delta = self._encode(head_ids, head_cells, tails, deaths)
+        self._left = []
+        return delta
+
+    def _encode(self, head_ids, head_cells, tails, deaths):
+        joined = self._joined
+        food = self._new_food
+        k = len(head_ids)
+        parts = [
+            DELTA_HEADER.pack(
+                self.tick, len(joined), k, len(tails), len(deaths), len(food)
+            ),
+            *joined,
+            struct.pack(f"<{k}H", *head_ids),
+            struct.pack(f"<{k}I", *head_cells),
+            struct.pack(f"<{len(tails)}H", *tails),
+            struct.pack(f"<{len(deaths)}H", *deaths),
+            struct.pack(f"<{len(food)}I", *food),
+        ]
+        self._joined = []
+        self._new_food = []
+        return b"".join(parts)
+
+    def snapshot(self):
+        """Whole board in the delta format: every snake joins, all food is new."""
+        parts = [
+            DELTA_HEADER.pack(self.tick, len(self.snakes), 0, 0, 0, len(self.foods))
+        ]
+        for snake in self.snakes.values():
+            parts.append(JOIN.pack(snake.id, len(snake.body)))
+            parts.append(struct.pack(f"<{len(snake.body)}I", *snake.body))
+        parts.append(struct.pack(f"<{len(self.foods)}I", *self.foods))
+        return b"".join(parts)
+
+
+class ArenaView:
+    """Client-side mirror of an Arena, rebuilt from snapshot and deltas."""
+
+    def __init__(self):
+        self.tick = 0
+        self.snakes = {}
+        self.foods = set()
+
+    def apply(self, data):
+        tick, joined, heads, tails, deaths, food = DELTA_HEADER.unpack_from(data)
+        self.tick = tick
+        pos = DELTA_HEADER.size
+        for _ in range(joined):
+            snake_id, length = JOIN.unpack_from(data, pos)
+            pos += JOIN.size
+            self.snakes[snake_id] = deque(struct.unpack_from(f"<{length}I", data, pos))
+            pos += 4 * length
+        head_ids = struct.unpack_from(f"<{heads}H", data, pos)
+        pos += 2 * heads
+        head_cells = struct.unpack_from(f"<{heads}I", data, pos)
+        pos += 4 * heads
+        for snake_id in struct.unpack_from(f"<{tails}H", data, pos):
+            self.snakes[snake_id].pop()
+        pos += 2 * tails
+        for snake_id, cell in zip(head_ids, head_cells):
+            self.snakes[snake_id].appendleft(cell)
+            self.foods.discard(cell)
+        for snake_id in struct.unpack_from(f"<{deaths}H", data, pos):
+            self.snakes.pop(snake_id, None)
+        pos += 2 * deaths
+        self.foods.update(struct.unpack_from(f"<{food}I", data, pos))
+
+
+class ArenaServer:
+    """Runs an Arena on a fixed tick and broadcasts deltas over TCP.
+
+    Each connection gets a snake (HELLO carries its id), then a SNAPSHOT,
+    then one DELTA frame per tick. Clients send single direction-code bytes.
+    A client whose snake dies gets a new one and a new HELLO.
+    """
+
+    def __init__(self, arena, tick_rate=10, max_buffer=1 << 20):
+        self.arena = arena
+        self.dt = 1.0 / tick_rate
+        self.max_buffer = max_buffer
+        self.clients = {}
+        self.server = None
+        # Metrics
+        self.ticks = 0
+        self.total_step = 0.0
+        self.max_step = 0.0
+        self.total_bytes = 0
+        self.max_bytes = 0
+
+    async def start(self, host="127.0.0.1", port=0, backlog=1024):
+        # A large backlog so hundreds of clients can connect at once
+        self.server = await asyncio.start_server(
+            self._handle, host, port, backlog=backlog
+        )
+        return self.server.sockets[0].getsockname()[1]
+
+    def _send(self, writer, kind, payload):
+        writer.write(FRAME.pack(len(payload) + 1, kind) + payload)
+
+    async def _handle(self, reader, writer):
+        snake_id = self.arena.spawn()
+        if snake_id is None:
+            writer.close()
+            return
+        self.clients[writer] = snake_id
+        self._send(writer, HELLO, struct.pack("<H", snake_id))
+        self._send(writer, SNAPSHOT, self.arena.snapshot())
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                # tick() may have dropped this client while it was reading
+                snake_id = self.clients.get(writer)
+                if snake_id is None:
+                    break
+                # Every press is queued, so a quick two-key turn sent
+                # within one tick plays out over the next two
+                for code in data:
+                    if code < len(DIRECTIONS):
+                        self.arena.steer(snake_id, DIRECTIONS[code])
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._drop(writer)
+
+    def _drop(self, writer):
+        snake_id = self.clients.pop(writer, None)
+        if snake_id is not None:
+            self.arena.remove(snake_id)
+        writer.close()
+
+    def tick(self):
+        # Clients whose snake died last tick get a fresh one first, so it
+        # joins in this tick's delta
+        for writer, snake_id in list(self.clients.items()):
+            if snake_id not in self.arena.snakes:
+                new_id = self.arena.spawn()
+                if new_id is None:
+                    self._drop(writer)
+                    continue
+                self.clients[writer] = new_id
+                self._send(writer, HELLO, struct.pack("<H", new_id))
+
+        start = time.perf_counter()
+        delta = self.arena.step()
+        elapsed = time.perf_counter() - start
+        self.ticks += 1
+        self.total_step += elapsed
+        self.max_step = max(self.max_step, elapsed)
+        self.total_bytes += len(delta)
+        self.max_bytes = max(self.max_bytes, len(delta))
+
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                # Too slow to keep up with the broadcast
+                self._drop(writer)
+                continue
+            self._send(writer, DELTA, delta)
+
+    async def run(self, ticks=None):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        done = 0
+        while ticks is None or done < ticks:
+            self.tick()
+            done += 1
+            deadline += self.dt
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+    async def close(self):
+        for writer in list(self.clients):
+            self._drop(writer)
+        self.server.close()
+        await self.server.wait_closed()
+
+    def stats(self):
+        ticks = self.ticks or 1
+        return {
+            "ticks": self.ticks,
+            "mean_step_ms": 1000 * self.total_step / ticks,
+            "max_step_ms": 1000 * self.max_step,
+            "mean_bytes_per_tick": self.total_bytes / ticks,
+            "max_bytes_per_tick": self.max_bytes,
+        }
+
+
+async def _bot(port, view, rng, turn_chance=0.1):
+    """Simulated client: mirrors the board and turns at random."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while True:
+            header = await reader.readexactly(FRAME.size)
+            length, kind = FRAME.unpack(header)
+            payload = await reader.readexactly(length - 1)
+            if kind != HELLO:
+                view.apply(payload)
+                if rng.random() < turn_chance:
+                    writer.write(bytes([rng.randrange(len(DIRECTIONS))]))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run_harness(clients=200, ticks=200, number_of_cells=256, tick_rate=50):
+    """Connect simulated clients, run the server and check their mirrors."""
+    arena = Arena(number_of_cells, food_count=clients, rng=random.Random(0))
+    server = ArenaServer(arena, tick_rate=tick_rate)
+    port = await server.start()
+    views = [ArenaView() for _ in range(clients)]
+    rng = random.Random(1)
+    bots = [asyncio.create_task(_bot(port, view, rng)) for view in views]
+    while len(server.clients) < clients:
+        await asyncio.sleep(0.01)
+    await server.run(ticks)
+    # Let the last deltas arrive, then compare with the authoritative board
+    await asyncio.sleep(0.2)
+    expected = {sid: list(s.body) for sid, s in arena.snakes.items()}
+    mismatched = sum(
+        1
+        for view in views
+        if {sid: list(b) for sid, b in view.snakes.items()} != expected
+        or view.foods != arena.foods
+    )
+    await server.close()
+    await asyncio.gather(*bots)
+    return server.stats(), mismatched
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    stats, mismatched = asyncio.run(run_harness(clients=clients))
+    for key, value in stats.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+    print(f"clients out of sync: {mismatched}")
@@ -0,0 +1,312 @@
+import random
+import sys
+import time
+from itertools import islice
+
+from snake_core import (
+    SnakeState,
+    hamiltonian_cycle,
+    near_hamiltonian_cycle,
+    MOVED,
+    ATE,
+    START_BODY,
+)
+
+# Board sizes --soak plays: the default in-game board (27, from a 500px
+# canvas) and small odd and even ones
+SOAK_SIZES = (11, 12, 27)
+
+# Cycle cells a shortcut must leave free between the new head and the
+# tail, on top of any segment still to grow
+SHORTCUT_MARGIN = 2
+
+
+class Autopilot:
+    """Plays a SnakeState by itself.
+
+    The snake follows a cycle through the board, so it keeps eating until
+    the board is full: the body always lies in cycle order behind the
+    head, and a move only cuts across the cycle if it lands between the
+    head and the tail in that order, no further than the food. Otherwise
+    the snake stays on the cycle, which can't run into the body, until a
+    safe shortcut turns up; past half the board it only follows the
+    cycle. Even sizes use the Hamiltonian cycle. Odd sizes have none, so
+    their cycle leaves out the bottom-left corner, and the snake takes the
+    corner as a detour when the food is there; being a cell short, it
+    usually misses the last food. Following the cycle needs no search.
+
+    Until the body lies in cycle order (after taking over a game midway),
+    it plays any move that keeps the tail reachable, checked by BFS. All
+    search buffers are allocated once per board size. The visited set uses
+    a generation counter, so starting a new search never clears them.
+    """
+
+    def __init__(self, number_of_cells):
+        n = number_of_cells
+        cells = n * n
+        self.number_of_cells = n
+        self.neighbours = []
+        for cell in range(cells):
+            y, x = divmod(cell, n)
+            around = []
+            if x > 0:
+                around.append(cell - 1)
+            if x < n - 1:
+                around.append(cell + 1)
+            if y > 0:
+                around.append(cell - n)
+            if y < n - 1:
+                around.append(cell + n)
+            self.neighbours.append(tuple(around))
+
+        self.seen = [0] * cells
+        self.parent = [0] * cells
+        self.queue = [0] * cells
+        self.scratch = bytearray(cells)
+        self.generation = 0
+
+        cycle = _lay_path(n)
+        self.cycle_length = len(cycle)
+        self.cycle_next = [0] * cells
+        self.cycle_index = [0] * cells
+        for i, cell in enumerate(cycle):
+            self.cycle_next[cell] = cycle[(i + 1) % len(cycle)]
+            self.cycle_index[cell] = i
+        # The corner an odd cycle leaves out: entered from branch instead
+        # of the cell after it, with the same place in the cycle
+        self.detour = self.branch = None
+        if n % 2:
+            self.detour = (n - 1) * n
+            self.branch = self.detour + 1
+            skipped = self.cycle_next[self.branch]
+            self.cycle_next[self.detour] = self.cycle_next[skipped]
+            self.cycle_index[self.detour] = self.cycle_index[skipped]
+        # Consecutive moves made along the cycle order; once it covers the
+        # body, the body is known to be in cycle order
+        self.ordered_moves = 0
+        self.last_target = None
+
+        # Metrics
+        self.calls = 0
+        self.searches = 0
+
+    # ------ search ------
+    def _bfs(self, occupied, start, goal):
+        """Breadth-first search over free cells; goal may be occupied.
+
+        The goal is never taken as the very first step, so a path to the
+        tail always leaves room for the tail to stay put for a tick.
+        """
+        self.searches += 1
+        self.generation += 1
+        gen = self.generation
+        seen = self.seen
+        parent = self.parent
+        queue = self.queue
+        neighbours = self.neighbours
+        seen[start] = gen
+        queue[0] = start
+        read, write = 0, 1
+        while read < write:
+            cell = queue[read]
+            read += 1
+            for nb in neighbours[cell]:
+                if seen[nb] == gen:
+                    continue
+                if nb == goal:
+                    if cell == start and start != goal:
+                        continue
+                    parent[nb] = cell
+                    return True
+                if occupied[nb]:
+                    continue
+                seen[nb] = gen
+                parent[nb] = cell
+                queue[write] = nb
+                write += 1
+        return False
+
+    def _tail_reachable_after(self, state, path):
+        """Is the tail reachable once the snake has walked path?"""
+        body = state.body
+        length = len(body) + (1 if state.add_segment else 0)
+        steps = len(path)
+        scratch = self.scratch
+        scratch[:] = state.occupied
+        keep = max(length - steps, 0)
+        for i, cell in enumerate(body):
+            if i >= keep:
+                scratch[cell] = 0
+        for cell in path[:length]:
+            scratch[cell] = 1
+        tail = path[length - 1] if steps >= length else body[length - steps - 1]
+        return self._bfs(scratch, path[0], tail)
+
+    # ------ decisions ------
+    def _fallback(self, state):
+        head = state.body[0]
+        tail = state.body[-1]
+        occupied = state.occupied
+        growing = state.add_segment
+        moves = [
+            nb
+            for nb in self.neighbours[head]
+            if not occupied[nb] or (nb == tail and not growing)
+        ]
+        if not moves:
+            return None
+        for cell in moves:
+            if self._tail_reachable_after(state, [cell]):
+                return cell
+        return moves[0]
+
+    def _cycle_distance(self, start, cell):
+        index = self.cycle_index
+        return (index[cell] - index[start]) % self.cycle_length
+
+    def _cycle_room(self, state):
+        """Cycle steps from the head before the nearest body cell."""
+        body = state.body
+        head = body[0]
+        if self.ordered_moves >= len(body):
+            return self._cycle_distance(head, body[-1])
+        distances = [self._cycle_distance(head, cell) for cell in islice(body, 1, None)]
+        if all(a > b for a, b in zip(distances, distances[1:])):
+            # Already in cycle order (a snake laid along the cycle)
+            self.ordered_moves = len(body)
+        return min(distances)
+
+    def _cycle_target(self, state):
+        """The best safe shortcut, else the next cell of the cycle.
+
+        Shortcuts are only taken while the snake is under half the board
+        and the food lies ahead of it on the cycle: the free neighbour
+        furthest along the cycle that doesn't pass the food. None when the
+        body isn't in cycle order yet and the cycle's next cell is taken.
+        """
+        head = state.body[0]
+        room = self._cycle_room(state)
+        growing = 1 if state.add_segment else 0
+        food = state.food
+        following = self.cycle_next[head]
+        if head == self.branch and food == self.detour:
+            following = food
+        if food is not None and len(state.body) < self.cycle_length // 2:
+            ahead = self._cycle_distance(head, food)
+            if ahead < room - growing - SHORTCUT_MARGIN:
+                best, furthest = following, 1
+                occupied = state.occupied
+                for cell in self.neighbours[head]:
+                    distance = self._cycle_distance(head, cell)
+                    # The detour shares its place with the cell it skips
+                    if (
+                        furthest < distance
+                        and (distance < ahead or cell == food)
+                        and not occupied[cell]
+                    ):
+                        best, furthest = cell, distance
+                if best != following:
+                    return best
+        if room - growing > 1 or (room == 1 and not growing and following == state.body[-1]):
+            return following
+        if following == food and len(state.free_cells) <= 2:
+            # The board is all but full: eating scores, and any other move
+            # only puts off the end. An odd board's cycle is a cell short,
+            # so its last food is often out of reach anyway
+            return following
+        return None
+
+    def choose(self, state):
+        """Direction for the next tick, as a (dx, dy) tuple."""
+        self.calls += 1
+        head = state.body[0]
+        if head != self.last_target:
+            self.ordered_moves = 0
+        target = self._cycle_target(state)
+        if target is None:
+            self.ordered_moves = -1
+            target = self._fallback(state)
+        self.ordered_moves += 1
+        self.last_target = target
+        if target is None:
+            return state.direction
+        n = self.number_of_cells
+        hy, hx = divmod(head, n)
+        ty, tx = divmod(target, n)
+        return (tx - hx, ty - hy)
+
+
+def _lay_path(n):
+    """The cycle the autopilot follows: Hamiltonian on even sizes, missing
+    the bottom-left corner on odd ones."""
+    if n % 2 == 0:
+        return hamiltonian_cycle(n)
+    return near_hamiltonian_cycle(n)
+
+
+def benchmark(sizes=(25, 26, 63, 64, 127, 128), ticks=200, seed=0):
+    """Solver microseconds per tick against board size and snake length.
+
+    The body starts laid along the cycle, odd sizes' included.
+    """
+    results = []
+    for n in sizes:
+        cycle = _lay_path(n)
+        for length in (3, n, n * n // 4):
+            state = SnakeState(n, random.Random(seed))
+            body = [cycle[length - 1 - i] for i in range(length)]
+            state.reset(body=[state.to_xy(c) for c in body])
+            pilot = Autopilot(n)
+            spent = 0.0
+            done = 0
+            for _ in range(ticks):
+                start = time.perf_counter()
+                direction = pilot.choose(state)
+                spent += time.perf_counter() - start
+                done += 1
+                if state.step(direction) not in (MOVED, ATE):
+                    break
+            results.append((n, length, spent / done * 1e6, state.alive))
+    return results
+
+
+def soak(number_of_cells=12, games=20, max_ticks=None, seed=0):
+    """Play whole games and report (score, ticks, filled board, BFS
+    searches) per game. max_ticks defaults to number_of_cells ** 4, far
+    more than filling the board takes."""
+    if max_ticks is None:
+        max_ticks = number_of_cells**4
+    results = []
+    for g in range(games):
+        state = SnakeState(number_of_cells, random.Random(seed + g))
+        pilot = Autopilot(number_of_cells)
+        ticks = 0
+        while state.alive and ticks < max_ticks:
+            state.step(pilot.choose(state))
+            ticks += 1
+        results.append((state.score, ticks, state.food is None, pilot.searches))
+    return results
+
+
+if __name__ == "__main__":
+    if "--soak" in sys.argv:
+        for n in SOAK_SIZES:
+            results = soak(n)
+            scores = [score for score, _, _, _ in results]
+            filled = sum(1 for _, _, full, _ in results if full)
+            print(
+                f"{n:>3}x{n:<3} {len(results)} games, {filled} filled,"
+                f" scores {min(scores)}-{max(scores)},"
+                f" at most {max(ticks for _, ticks, _, _ in results)} ticks and"
+                f" {max(searches for _, _, _, searches in results)} searches"
+            )
+            # Even boards must be filled (the last food's segment never
+            # grows). Odd ones may miss only the last food, which is out of
+            # the cycle's reach unless the final two land side by side
+            least = n * n - len(START_BODY) + 1 - (n % 2)
+            lost = [i for i, score in enumerate(scores) if score < least]
+            assert not lost, f"{n}x{n}: games {lost} ended below a score of {least}"
+    else:
+        for n, length, us, alive in benchmark():
+            status = "" if alive else " (died)"
+            print(f"{n:>3}x{n:<3} length {length:>5}: {us:8.1f} us/tick{status}")
@@ -0,0 +1,213 @@
+import sys
+import time
+
+import numpy as np
+
+from snake_core import (
+    SnakeState,
+    START_BODY,
+    START_DIRECTION,
+    UP,
+    DOWN,
+    LEFT,
+    RIGHT,
+    ATE,
+)
+
+# Direction codes used by the batch arrays; index into DX / DY
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DX = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+DY = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+KEEP = -1
+
+
+class SnakeBatch:
+    """Step many independent snake boards at once with NumPy.
+
+    Same rules as SnakeState.step: the tail leaves before the head arrives,
+    eating grows the snake on the following tick, and hitting a wall or the
+    body kills the board. Every board keeps its body in a ring buffer of
+    board size, so no array is ever resized while stepping.
+    """
+
+    def __init__(self, boards, number_of_cells, seed=None):
+        self.boards = boards
+        self.number_of_cells = number_of_cells
+        self.cells = number_of_cells * number_of_cells
+        self.rng = np.random.default_rng(seed)
+        self._rows = np.arange(boards, dtype=np.int64)
+        self._base = self._rows * self.cells
+
+        self.occupied = np.zeros(boards * self.cells, dtype=np.bool_)
+        self.ring = np.zeros((boards, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(boards, dtype=np.int64)
+        self.length = np.zeros(boards, dtype=np.int64)
+        self.head = np.zeros(boards, dtype=np.int64)
+        self.direction = np.zeros(boards, dtype=np.int8)
+        self.food = np.zeros(boards, dtype=np.int64)
+        self.add_segment = np.zeros(boards, dtype=np.bool_)
+        self.alive = np.zeros(boards, dtype=np.bool_)
+        self.score = np.zeros(boards, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Put the selected boards (all by default) back to the start state."""
+        rows = self._rows if mask is None else np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        n = self.number_of_cells
+        occ = self.occupied.reshape(self.boards, self.cells)
+        occ[rows] = False
+        body = [y * n + x for x, y in START_BODY]
+        # Ring order is tail ... head
+        for i, cell in enumerate(reversed(body)):
+            self.ring[rows, i] = cell
+            occ[rows, cell] = True
+        self.head_ptr[rows] = len(body) - 1
+        self.length[rows] = len(body)
+        self.head[rows] = body[0]
+        self.direction[rows] = DIRECTIONS.index(START_DIRECTION)
+        self.add_segment[rows] = False
+        self.alive[rows] = True
+        self.score[rows] = 0
+        self._place_food(rows)
+
+    def _place_food(self, rows):
+        """Pick a random free cell for each board in rows.
+
+        A few vectorised rejection rounds settle almost every board; the
+        stragglers (very full boards) fall back to an exact draw over their
+        free cells. Boards with no free cell left are marked dead.
+        """
+        pending = rows
+        for _ in range(8):
+            if pending.size == 0:
+                return
+            guess = self.rng.integers(0, self.cells, size=pending.size)
+            hit = self.occupied[self._base[pending] + guess]
+            self.food[pending[~hit]] = guess[~hit]
+            pending = pending[hit]
+        occ = self.occupied.reshape(self.boards, self.cells)
+        for row in pending:
+            free = np.flatnonzero(~occ[row])
+            if free.size == 0:
+                self.food[row] = -1
+                self.alive[row] = False
+            else:
+                self.food[row] = free[self.rng.integers(free.size)]
+
+    def step(self, actions=None):
+        """Advance every live board by one tick.
+
+        actions is an optional int array of direction codes (index into
+        DIRECTIONS, or KEEP). Returns a bool array of boards that ate.
+        """
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = actions != KEEP
+            self.direction[turn] = actions[turn]
+
+        n = self.number_of_cells
+        cap = self.cells
+        alive = self.alive
+        rows = self._rows
+
+        # Tail leaves first unless the snake is growing this tick
+        shrink = alive & ~self.add_segment
+        self.add_segment &= ~alive
+        tail_ptr = (self.head_ptr - self.length + 1) % cap
+        tail = self.ring[rows, tail_ptr]
+        self.occupied[self._base[shrink] + tail[shrink]] = False
+        self.length -= shrink
+
+        d = self.direction
+        x = self.head % n + DX[d]
+        y = self.head // n + DY[d]
+        inside = (x >= 0) & (x < n) & (y >= 0) & (y < n)
+        cell = np.where(inside, y * n + x, 0)
+        hit = self.occupied[self._base + cell]
+        died = alive & (~inside | hit)
+        alive &= ~died
+
+        live = np.flatnonzero(alive)
+        cell_live = cell[live]
+        ptr = (self.head_ptr[live] + 1) % cap
+        self.head_ptr[live] = ptr
+        self.ring[live, ptr] = cell_live
+        self.occupied[self._base[live] + cell_live] = True
+        self.length[live] += 1
+        self.head[live] = cell_live
+
+        ate = np.zeros(self.boards, dtype=np.bool_)
+        ate[live] = cell_live == self.food[live]
+        if ate.any():
+            self.add_segment |= ate
+            self.score += ate
+            self._place_food(np.flatnonzero(ate))
+        return ate
+
+    def body(self, board):
+        """Body cells of one board, head first (matches SnakeState.body)."""
+        ptr = self.head_ptr[board]
+        idx = (ptr - np.arange(self.length[board])) % self.cells
+        return self.ring[board, idx].tolist()
+
+
+def check_parity(boards=64, number_of_cells=12, ticks=400, seed=0):
+    """Replay random inputs through SnakeBatch and SnakeState side by side.
+
+    Food placement is random in both, so after every tick the batch's food
+    cell is copied into the single-game state; everything else has to agree.
+    Raises AssertionError on the first mismatch.
+    """
+    rng = np.random.default_rng(seed)
+    batch = SnakeBatch(boards, number_of_cells, seed=seed)
+    singles = [SnakeState(number_of_cells) for _ in range(boards)]
+    for b, state in enumerate(singles):
+        state.food = int(batch.food[b])
+
+    for _ in range(ticks):
+        actions = rng.integers(-1, 4, size=boards)
+        ate = batch.step(actions)
+        for b, state in enumerate(singles):
+            a = int(actions[b])
+            result = state.step(None if a == KEEP else DIRECTIONS[a])
+            assert state.alive == bool(batch.alive[b]), (b, "alive")
+            assert (result == ATE) == bool(ate[b]), (b, "ate")
+            assert state.score == int(batch.score[b]), (b, "score")
+            if state.alive:
+                assert list(state.body) == batch.body(b), (b, "body")
+                state.food = int(batch.food[b])
+        dead = ~batch.alive
+        if dead.any():
+            batch.reset(dead)
+            for b in np.flatnonzero(dead):
+                singles[b].reset()
+                singles[b].food = int(batch.food[b])
+    return True
+
+
+def benchmark(boards=4096, number_of_cells=26, ticks=500, seed=0):
+    """Board-steps per second with random turning and auto-reset."""
+    batch = SnakeBatch(boards, number_of_cells, seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(-1, 4, size=(ticks, boards))
+    # Mostly keep going straight, like a real player
+    actions[rng.random(actions.shape) < 0.8] = KEEP
+    start = time.perf_counter()
+    for t in range(ticks):
+        batch.step(actions[t])
+        if t % 16 == 0:
+            batch.reset(~batch.alive)
+    elapsed = time.perf_counter() - start
+    return boards * ticks / elapsed
+
+
+if __name__ == "__main__":
+    if "--parity" in sys.argv:
+        check_parity()
+        print("parity ok")
+    else:
+        for boards in (1024, 4096, 16384):
+            rate = benchmark(boards=boards)
+            print(f"{boards:>6} boards: {rate / 1e6:.2f}M board-steps/s")
@@ -0,0 +1,458 @@
+import random
+import time
+from collections import deque
+
+# Directions as (dx, dy) tuples, matching the Vector2 values the game used
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+# Results of SnakeState.step()
+MOVED = 0
+ATE = 1
+DIED = 2
+
+START_BODY = ((6, 9), (5, 9), (4, 9))
+START_DIRECTION = RIGHT
+
+
+class SnakeState:
+    """Grid-backed snake rules, independent of pygame and pyodide.
+
+    Cells are stored as ints (y * number_of_cells + x). The body is a deque
+    (head at index 0), collisions are answered by a bytearray occupancy map,
+    and the cells not covered by the snake live in a swap-remove array so
+    food placement is a single randrange no matter how full the board is.
+    """
+
+    def __init__(self, number_of_cells, rng=None):
+        self.number_of_cells = number_of_cells
+        self.rng = rng if rng is not None else random.Random()
+        self.reset()
+
+    def reset(self, body=START_BODY, direction=START_DIRECTION):
+        n = self.number_of_cells
+        self._clear_grid()
+        self.body = deque()
+        for x, y in body:
+            cell = y * n + x
+            self.body.append(cell)
+            self._occupy(cell)
+        self.direction = direction
+        self.add_segment = False
+        self.alive = True
+        self.score = 0
+        # Cells touched by the last step, for incremental redraws
+        self.last_head = None
+        self.last_tail = None
+        self.last_food = None
+        self.food = self.place_food()
+
+    # ------ free-cell index ------
+    def _clear_grid(self):
+        n = self.number_of_cells
+        self.occupied = bytearray(n * n)
+        self.free_cells = list(range(n * n))
+        self.free_index = list(range(n * n))
+
+    def _occupy(self, cell):
+        self.occupied[cell] = 1
+        idx = self.free_index[cell]
+        last = self.free_cells.pop()
+        if last != cell:
+            self.free_cells[idx] = last
+            self.free_index[last] = idx
+        self.free_index[cell] = -1
+
+    def _release(self, cell):
+        self.occupied[cell] = 0
+        self.free_index[cell] = len(self.free_cells)
+        self.free_cells.append(cell)
+
+    def place_food(self):
+        """Pick a uniformly random cell not covered by the snake, or None."""
+        if not self.free_cells:
+            return None
+        return self.free_cells[self.rng.randrange(len(self.free_cells))]
+
+    # ------ coordinates ------
+    def to_cell(self, x, y):
+        return y * self.number_of_cells + x
+
+    def to_xy(self, cell):
+        y, x = divmod(cell, self.number_of_cells)
+        return x, y
+
+    @property
+    def head(self):
+        return self.to_xy(self.body[0])
+
+    def segments(self):
+        n = self.number_of_cells
+        for cell in self.body:
+            y, x = divmod(cell, n)
+            yield x, y
+
+    def segments_in(self, x0, y0, x1, y1):
+        """Body cells inside [x0, x1) x [y0, y1), for viewport culling."""
+        for x, y in self.segments():
+            if x0 <= x < x1 and y0 <= y < y1:
+                yield x, y
+
+    def food_xy(self):
+        return None if self.food is None else self.to_xy(self.food)
+
+    # ------ rules ------
+    def step(self, direction=None):
+        """Advance one tick with the same rules as the original Game.update.
+
+        The tail moves out before the head moves in, so following your own
+        tail is allowed. Eating sets add_segment, which keeps the tail in
+        place on the next tick.
+        """
+        if not self.alive:
+            return DIED
+        if direction is not None:
+            self.direction = direction
+        n = self.number_of_cells
+        hx, hy = divmod(self.body[0], n)[::-1]
+        x = hx + self.direction[0]
+        y = hy + self.direction[1]
+
+        self.last_tail = None
+        self.last_food = None
+        if self.add_segment:
+            self.add_segment = False
+        else:
+            tail = self.body.pop()
+            self._release(tail)
+            self.last_tail = tail
+
+        if not (0 <= x < n and 0 <= y < n):
+            self.alive = False
+            self.last_head = None
+            return DIED
+        cell = y * n + x
+        if self.occupied[cell]:
+            self.alive = False
+            self.last_head = None
+            return DIED
+
+        self.body.appendleft(cell)
+        self._occupy(cell)
+        self.last_head = cell
+
+        if cell == self.food:
+            self.add_segment = True
+            self.score += 1
+            self.last_food = cell
+            self.food = self.place_food()
+            if self.food is None:
+                # Board is full: nothing left to eat
+                self.alive = False
+            return ATE
+        return MOVED
+
+
+class ChunkedGrid:
+    """Sparse occupancy map for boards too big to allocate densely.
+
+    The board is split into square chunks of 2**chunk_bits cells a side.
+    A chunk's bytearray only exists while something occupies it, so memory
+    follows the snake's length, not the board's area. Indexing by cell int
+    works like the bytearray SnakeState uses.
+    """
+
+    def __init__(self, number_of_cells, chunk_bits=6):
+        self.number_of_cells = number_of_cells
+        self.chunk_bits = chunk_bits
+        self.chunk_size = 1 << chunk_bits
+        self.chunks_per_row = (number_of_cells + self.chunk_size - 1) >> chunk_bits
+        # chunk key -> [bytearray, occupied count]
+        self.chunks = {}
+
+    def _locate(self, cell):
+        y, x = divmod(cell, self.number_of_cells)
+        bits = self.chunk_bits
+        mask = self.chunk_size - 1
+        key = (y >> bits) * self.chunks_per_row + (x >> bits)
+        return key, ((y & mask) << bits) | (x & mask)
+
+    def __getitem__(self, cell):
+        key, offset = self._locate(cell)
+        chunk = self.chunks.get(key)
+        return chunk[0][offset] if chunk is not None else 0
+
+    def __setitem__(self, cell, value):
+        key, offset = self._locate(cell)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if not value:
+                return
+            chunk = self.chunks[key] = [bytearray(self.chunk_size**2), 0]
+        old = chunk[0][offset]
+        value = 1 if value else 0
+        if old == value:
+            return
+        chunk[0][offset] = value
+        chunk[1] += 1 if value else -1
+        if chunk[1] == 0:
+            del self.chunks[key]
+
+    def cells_in(self, x0, y0, x1, y1):
+        """Occupied (x, y) cells inside [x0, x1) x [y0, y1).
+
+        Only the chunks overlapping the rectangle are visited, so the cost
+        follows the size of the rectangle, not the board.
+        """
+        bits = self.chunk_bits
+        size = self.chunk_size
+        for cy in range(y0 >> bits, ((y1 - 1) >> bits) + 1):
+            for cx in range(x0 >> bits, ((x1 - 1) >> bits) + 1):
+                chunk = self.chunks.get(cy * self.chunks_per_row + cx)
+                if chunk is None:
+                    continue
+                data = chunk[0]
+                base_x = cx << bits
+                base_y = cy << bits
+                for ly in range(max(y0 - base_y, 0), min(y1 - base_y, size)):
+                    row = ly << bits
+                    lo = max(x0 - base_x, 0)
+                    hi = min(x1 - base_x, size)
+                    offset = data.find(1, row + lo, row + hi)
+                    while offset != -1:
+                        yield base_x + (offset - row), base_y + ly
+                        offset = data.find(1, offset + 1, row + hi)
+
+
+class WorldSnakeState(SnakeState):
+    """SnakeState for very large boards (e.g. 4096x4096).
+
+    Occupancy lives in a ChunkedGrid and there is no free-cell index: with
+    the snake covering a tiny fraction of the world, rejection sampling
+    finds a free food cell in about one try.
+    """
+
+    def reset(self, body=None, direction=START_DIRECTION):
+        if body is None:
+            # Start in the middle of the world instead of the top-left corner
+            mid = self.number_of_cells // 2
+            body = [(mid - i, mid) for i in range(len(START_BODY))]
+        super().reset(body, direction)
+
+    def _clear_grid(self):
+        self.occupied = ChunkedGrid(self.number_of_cells)
+
+    def _occupy(self, cell):
+        self.occupied[cell] = 1
+
+    def _release(self, cell):
+        self.occupied[cell] = 0
+
+    def segments_in(self, x0, y0, x1, y1):
+        return self.occupied.cells_in(x0, y0, x1, y1)
+
+    def place_food(self):
+        cells = self.number_of_cells * self.number_of_cells
+        if len(self.body) >= cells:
+            return None
+        while True:
+            cell = self.rng.randrange(cells)
+            if not self.occupied[cell]:
+                return cell
+
+
+class FixedTimestep:
+    """Fixed-rate simulation clock with an accumulator.
+
+    Call advance() once per rendered frame; it returns how many simulation
+    ticks are due. At most max_catch_up ticks run per frame, the rest are
+    dropped and counted so a throttled tab doesn't fast-forward the game.
+    """
+
+    def __init__(self, tick_rate, max_catch_up=5, clock=time.perf_counter):
+        self.dt = 1.0 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.accumulator = 0.0
+        self.last = None
+        # Metrics
+        self.frames = 0
+        self.ticks = 0
+        self.dropped_ticks = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def advance(self):
+        now = self.clock()
+        if self.last is None:
+            self.last = now
+            return 0
+        self.accumulator += now - self.last
+        self.last = now
+        self.frames += 1
+
+        due = int(self.accumulator / self.dt)
+        if due > self.max_catch_up:
+            self.dropped_ticks += due - self.max_catch_up
+            self.accumulator -= (due - self.max_catch_up) * self.dt
+            due = self.max_catch_up
+        if due:
+            # Tick i (1-based) was due (accumulator - i * dt) seconds ago
+            acc = self.accumulator
+            self.total_lag += due * acc - self.dt * due * (due + 1) / 2
+            self.max_lag = max(self.max_lag, acc - self.dt)
+            self.accumulator -= due * self.dt
+            self.ticks += due
+        return due
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "ticks": self.ticks,
+            "dropped_ticks": self.dropped_ticks,
+            "mean_lag_ms": 1000 * self.total_lag / self.ticks if self.ticks else 0.0,
+            "max_lag_ms": 1000 * self.max_lag,
+        }
+
+
+class InputQueue:
+    """Bounded queue of timestamped direction presses.
+
+    The game takes at most one command per tick, so a quick two-key turn
+    lands on two consecutive ticks instead of the second press overwriting
+    the first. Reversals and repeats are checked against the direction that
+    was actually applied last, not against presses still waiting.
+    """
+
+    def __init__(self, capacity=3, clock=time.perf_counter):
+        self.commands = deque()
+        self.capacity = capacity
+        self.clock = clock
+        # Metrics
+        self.applied = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def push(self, direction):
+        if len(self.commands) >= self.capacity:
+            self.dropped += 1
+            return False
+        self.commands.append((direction, self.clock()))
+        return True
+
+    def next_direction(self, current):
+        """Pop the first usable command for this tick, or None."""
+        while self.commands:
+            direction, pressed = self.commands.popleft()
+            if direction == current or (
+                direction[0] == -current[0] and direction[1] == -current[1]
+            ):
+                self.rejected += 1
+                continue
+            latency = self.clock() - pressed
+            self.applied += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            return direction
+        return None
+
+    def clear(self):
+        self.commands.clear()
+
+    def stats(self):
+        return {
+            "applied": self.applied,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "mean_latency_ms": (
+                1000 * self.total_latency / self.applied if self.applied else 0.0
+            ),
+            "max_latency_ms": 1000 * self.max_latency,
+        }
+
+
+def hamiltonian_cycle(number_of_cells):
+    """Cells of a closed path visiting every cell once (even board sizes).
+
+    Column 0 is kept as the return lane; the rest is walked boustrophedon.
+    """
+    n = number_of_cells
+    if n % 2:
+        raise ValueError("a Hamiltonian cycle needs an even number_of_cells")
+    path = []
+    for y in range(n):
+        xs = range(1, n) if y % 2 == 0 else range(n - 1, 0, -1)
+        path.extend(y * n + x for x in xs)
+    path.extend(y * n for y in range(n - 1, -1, -1))
+    return path
+
+
+def near_hamiltonian_cycle(number_of_cells):
+    """Cells of a closed path visiting every cell but one (odd board sizes).
+
+    An odd board has no Hamiltonian cycle, so the bottom-left corner is left
+    out. Its two neighbours come either side of the cell above its right
+    neighbour, so a detour through the corner can stand in for that cell.
+    Rows are walked boustrophedon down to the last two, which are zigzagged
+    back column by column, and column 0 is the return lane.
+    """
+    n = number_of_cells
+    if n % 2 == 0 or n < 3:
+        raise ValueError("a near-Hamiltonian cycle needs an odd number_of_cells >= 3")
+    path = []
+    for y in range(n - 2):
+        xs = range(1, n) if y % 2 == 0 else range(n - 1, 0, -1)
+        path.extend(y * n + x for x in xs)
+    for x in range(n - 1, 0, -1):
+        ys = (n - 2, n - 1) if (n - 1 - x) % 2 == 0 else (n - 1, n - 2)
+        path.extend(y * n + x for y in ys)
+    path.extend(y * n for y in range(n - 2, -1, -1))
+    return path
+
+
+def benchmark(number_of_cells=128, lengths=(3, 100, 1000, 10000), ticks=20000):
+    """Time SnakeState.step for snakes of increasing length.
+
+    The snake follows a Hamiltonian cycle so it never dies, and the food is
+    parked off its path so the length stays fixed for the whole run.
+    """
+    n = number_of_cells
+    cycle = hamiltonian_cycle(n)
+    succ = {cell: cycle[(i + 1) % len(cycle)] for i, cell in enumerate(cycle)}
+    results = []
+    for length in lengths:
+        state = SnakeState(n, random.Random(0))
+        body = [cycle[(length - 1 - i)] for i in range(length)]
+        state.reset(body=[state.to_xy(c) for c in body])
+        directions = {}
+        for cell, nxt in succ.items():
+            (x0, y0), (x1, y1) = state.to_xy(cell), state.to_xy(nxt)
+            directions[cell] = (x1 - x0, y1 - y0)
+        state.food = -1
+        start = time.perf_counter()
+        for _ in range(ticks):
+            state.step(directions[state.body[0]])
+        elapsed = time.perf_counter() - start
+        assert state.alive and len(state.body) == length
+        results.append((length, elapsed / ticks * 1e6))
+
+    # Food placement with the board 99% covered
+    state = SnakeState(n, random.Random(0))
+    fill = int(n * n * 0.99)
+    state.reset(body=[state.to_xy(c) for c in reversed(cycle[:fill])])
+    start = time.perf_counter()
+    for _ in range(ticks):
+        state.place_food()
+    food_us = (time.perf_counter() - start) / ticks * 1e6
+    return results, food_us
+
+
+if __name__ == "__main__":
+    results, food_us = benchmark()
+    for length, us in results:
+        print(f"length {length:>6}: {us:6.2f} us/tick")
+    print(f"place_food at 99% fill: {food_us:.2f} us")